@@ -1,11 +1,26 @@
 import os
+import sys
+import io
+import argparse
+import traceback
+from contextlib import redirect_stdout
 from pathlib import Path
-from datetime import datetime
+from datetime import date, datetime
+import math
 import re
 import logging
-import pdfplumber
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_matcher import KeywordAutomaton
+from ledger import LEDGER_FILE, Ledger
+from mapping_snapshot import compiled_table, read_sheet, sheets_fingerprint
+from stage_pipeline import BoundedStage, StageCounters
+from statement_files import list_statement_pdfs
+from ocr_service import ocr_pages
+from sandbox import STATEMENT_MAX_RSS_MB, STATEMENT_TIMEOUT_SECONDS, failure_text
+from statement_document import StatementDocument, as_statement_document, document_path
+
 # Import all parsers
 from icici_cc_pdf_parser import extract_icici_transactions
 from idfc_cc_pdf_parser import extract_idfc_transactions
@@ -30,6 +45,11 @@ MAPPING_FILE = os.path.join(
 )
 CC_MAPPING_SHEET = "CC Merchant category mapping"
 
+LEDGER_SOURCE = "CC"
+PARSER_VERSION = 2
+# Only these results are stored; errors and unrecognised PDFs are retried on the next run.
+LEDGER_STATUSES = {"parsed", "no_transactions"}
+
 PAYMENT_KEYWORDS = [
     "PAYMENT RECEIVED",
     "PAYMENT RECIEVED",
@@ -71,8 +91,15 @@ EXPENSE_TYPE_KEYWORDS = {
     "Travel": ["IXIGO", "IRCTC", "MAKE MY TRIP", "MAKEMYTRIP", "GOIBIBO", "UBER", "OLA", "AIR", "RAIL"],
     "Fuel": ["FUEL", "PETROL", "DIESEL", "INDIAN OIL", "IOCL", "BPCL", "HPCL"],
 }
+# Flattened in dict order so the lowest matching index is the first category that matches.
+_EXPENSE_TYPE_CATEGORIES = [category for category, keywords in EXPENSE_TYPE_KEYWORDS.items() for _kw in keywords]
+_EXPENSE_TYPE_AUTOMATON = KeywordAutomaton(
+    [kw for keywords in EXPENSE_TYPE_KEYWORDS.values() for kw in keywords]
+)
 
 NO_STMT_AVAILABLE_TEXT = "No STMT avaliable"
+# Uni Gold UPI spends are not looked up in the mapping.
+UNI_GOLD_UPI_CLASSIFICATION = ("Personal", "Leisure", "UPI")
 
 
 def clean_text(value):
@@ -96,14 +123,14 @@ def get_parser(file_path):
     also fall back to sniffing the first page text.
     IMPORTANT: Check for Axis Rewards BEFORE general Axis to avoid double parsing
     """
-    path = file_path.lower()
+    path = document_path(file_path).lower()
 
     def _sniff_first_page_text() -> str:
         try:
-            with pdfplumber.open(file_path) as pdf:
-                if not pdf.pages:
+            with as_statement_document(file_path) as doc:
+                if not doc.page_count:
                     return ""
-                return (pdf.pages[0].extract_text() or "").lower()
+                return doc.page_text(0).lower()
         except Exception:
             return ""
 
@@ -257,7 +284,7 @@ def _load_label_mapping_df() -> pd.DataFrame:
         return pd.DataFrame()
     for sheet in LABEL_MAPPING_SHEET_CANDIDATES:
         try:
-            return pd.read_excel(OUTSTANDING_LABEL_FILE, sheet_name=sheet)
+            return read_sheet(OUTSTANDING_LABEL_FILE, sheet)
         except Exception:
             continue
     return pd.DataFrame()
@@ -303,7 +330,7 @@ def load_known_cards():
     cards = []
     df = _load_label_mapping_df()
     if df.empty:
-        return cards
+        return CardRegistry(cards)
     for _, row in df.iterrows():
         bank = clean_text(row.get("Bank", ""))
         variant = clean_text(row.get("Card Variant", ""))
@@ -332,10 +359,89 @@ def load_known_cards():
                     "Other Debit&Charges": recon_other,
                 }
             )
-    return cards
+    return CardRegistry(cards)
+
+
+def normalize_card_number(value: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", (value or "").upper())
+
+
+class CardRegistry(list):
+    """
+    load_known_cards() rows, indexed once so per-statement lookups are dict hits.
+
+    Every index maps to card positions in sheet order, so where several cards
+    share a key the first row still wins, exactly as in a top-to-bottom scan.
+    """
+
+    def __init__(self, cards=()):
+        super().__init__(cards)
+        # (Account, Card Variant) as split_account_variant() normalises them.
+        self.account_variants = [
+            split_account_variant(f"{c.get('Bank','')} {c.get('Card Variant','')}") for c in self
+        ]
+        self.by_bank_variant = {}
+        self.by_account_variant = {}
+        self.by_pdf_card = {}
+        self.by_last4 = {}
+        for i, c in enumerate(self):
+            b, v = self.account_variants[i]
+            bank_variant = (clean_text(c.get("Bank", "")).lower(), clean_text(c.get("Card Variant", "")).lower())
+            self.by_bank_variant.setdefault(bank_variant, i)
+            self.by_account_variant.setdefault((b.lower(), v.lower()), i)
+            pdf_card = normalize_card_number(c.get("PDF card number") or "")
+            if pdf_card:
+                self.by_pdf_card.setdefault(pdf_card, []).append(i)
+            last4 = clean_text(c.get("Card Number", ""))
+            if last4:
+                self.by_last4.setdefault(last4, []).append(i)
+
+    def card_for_bank_variant(self, bank: str, variant: str) -> dict | None:
+        """First card whose Bank / Card Variant cells equal these (case-insensitive)."""
+        i = self.by_bank_variant.get(((bank or "").lower(), (variant or "").lower()))
+        return self[i] if i is not None else None
+
+    def card_for_account_variant(self, account: str, variant: str) -> dict | None:
+        """First card whose split_account_variant() result equals (account, variant)."""
+        i = self.by_account_variant.get((clean_text(account).lower(), clean_text(variant).lower()))
+        return self[i] if i is not None else None
+
+    def _first_match(self, index: dict, tokens, bank: str) -> int | None:
+        found = None
+        for token in tokens:
+            for i in index.get(token, ()):
+                if bank and self.account_variants[i][0] != bank:
+                    continue
+                if found is None or i < found:
+                    found = i
+                break
+        return found
+
+    def resolve_card_tokens(self, tokens: set[str], bank: str = "") -> dict | None:
+        """
+        Card for the card-number tokens found on a statement: an exact PDF card
+        number match first, then last-4 digits; restricted to `bank` when given.
+        """
+        norm_tokens = {normalize_card_number(t) for t in tokens}
+        norm_tokens.discard("")
+        i = self._first_match(self.by_pdf_card, norm_tokens, bank)
+        if i is not None:
+            b, v = self.account_variants[i]
+            return {"Account": b, "Card Variant": v, "Card Last4": clean_text(self[i].get("Card Number", ""))}
+        i = self._first_match(self.by_last4, tokens, bank)
+        if i is not None:
+            b, v = self.account_variants[i]
+            return {"Account": b, "Card Variant": v, "Card Last4": clean_text(self[i].get("Card Number", ""))}
+        return None
+
+
+def as_card_registry(known_cards) -> CardRegistry:
+    if isinstance(known_cards, CardRegistry):
+        return known_cards
+    return CardRegistry(known_cards or [])
 
 
-def extract_card_number_tokens(pdf_path: str) -> set[str]:
+def extract_card_number_tokens(pdf_path: str | StatementDocument) -> set[str]:
     """
     Return a set of normalized card-number tokens found on the first page:
     - last4 digits
@@ -343,10 +449,10 @@ def extract_card_number_tokens(pdf_path: str) -> set[str]:
     """
     tokens: set[str] = set()
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            if not pdf.pages:
+        with as_statement_document(pdf_path) as doc:
+            if not doc.page_count:
                 return tokens
-            text = (pdf.pages[0].extract_text() or "")
+            text = doc.page_text(0)
     except Exception:
         return tokens
     t = re.sub(r"\s+", " ", text).strip()
@@ -379,7 +485,7 @@ def extract_card_number_tokens(pdf_path: str) -> set[str]:
     return tokens
 
 
-def resolve_bank_variant_from_label(pdf_path: str, bank_hint: str = "", known_cards: list[dict] | None = None):
+def resolve_bank_variant_from_label(pdf_path: str | StatementDocument, bank_hint: str = "", known_cards: list[dict] | None = None):
     """
     Use Label Mapping (PDF card number / Card Number) to resolve the specific
     (Account, Card Variant) for a PDF. This prevents Visa/Rupay cards of the same
@@ -392,49 +498,15 @@ def resolve_bank_variant_from_label(pdf_path: str, bank_hint: str = "", known_ca
     if not tokens:
         return None
 
-    hint_bank, _ = split_account_variant(bank_hint or "")
-
-    def norm(s: str) -> str:
-        return re.sub(r"[^A-Z0-9]", "", (s or "").upper())
-
-    norm_tokens = {norm(t) for t in tokens if norm(t)}
-
     # Restrict to same bank as hinted by parser when a reliable hint exists.
-    candidates = []
-    for c in known_cards:
-        b, v = split_account_variant(f"{c.get('Bank','')} {c.get('Card Variant','')}")
-        if hint_bank and b != hint_bank:
-            continue
-        candidates.append((c, b, v))
-
-    if not candidates:
-        return None
-
-    # Prefer exact PDF card number match (whitespace-insensitive).
-    for c, b, v in candidates:
-        pdf_card = c.get("PDF card number") or ""
-        if pdf_card and norm(pdf_card) in norm_tokens:
-            return {"Account": b, "Card Variant": v, "Card Last4": clean_text(c.get("Card Number", ""))}
-
-    # Fallback: match by last4 digits.
-    for c, b, v in candidates:
-        last4 = clean_text(c.get("Card Number", ""))
-        if last4 and last4 in tokens:
-            return {"Account": b, "Card Variant": v, "Card Last4": last4}
-
-    return None
+    hint_bank, _ = split_account_variant(bank_hint or "")
+    return as_card_registry(known_cards).resolve_card_tokens(tokens, hint_bank)
 
 
 def resolve_recon_labels(account: str, variant: str, known_cards: list[dict]) -> dict:
     if not known_cards:
         return {}
-    key_acc = clean_text(account).lower()
-    key_var = clean_text(variant).lower()
-    for c in known_cards:
-        b, v = split_account_variant(f"{c.get('Bank','')} {c.get('Card Variant','')}")
-        if b.lower() == key_acc and v.lower() == key_var:
-            return c
-    return {}
+    return as_card_registry(known_cards).card_for_account_variant(account, variant) or {}
 
 
 def normalize_period_mon_yyyy(raw: object) -> str:
@@ -467,7 +539,7 @@ def dominant_period_mon_yyyy(records: list[dict]) -> str:
     return sorted(counts.items(), key=lambda item: (-item[1], datetime.strptime(item[0], "%b-%Y")))[0][0]
 
 
-def extract_labeled_amount(pdf_path: str, label: str) -> float | None:
+def extract_labeled_amount(pdf_path: str | StatementDocument, label: str) -> float | None:
     """
     Extract an amount close to a label in the PDF text (next to it or under it).
     """
@@ -475,8 +547,8 @@ def extract_labeled_amount(pdf_path: str, label: str) -> float | None:
     if not label:
         return None
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return None
     text_norm = re.sub(r"\s+", " ", text or "").strip()
@@ -507,49 +579,74 @@ def ensure_mapping_file():
         raise FileNotFoundError(f"CC mapping workbook not found: {MAPPING_FILE}")
 
 
+class CategoryMapping(list):
+    """load_mapping() rows, plus a keyword automaton compiled once over them for categorize()."""
+
+    def __init__(self, rows=()):
+        super().__init__(rows)
+        self.automaton = KeywordAutomaton([row[0] for row in self])
+
+
 def load_mapping():
     """Load keyword -> (expense_type, merchant_category, store_name) mapping."""
-    mapping = []
     if not os.path.exists(MAPPING_FILE):
-        return mapping
+        return CategoryMapping()
     try:
-        df = pd.read_excel(MAPPING_FILE, sheet_name=CC_MAPPING_SHEET)
+        return compiled_table(MAPPING_FILE, CC_MAPPING_SHEET, _build_category_mapping)
     except Exception:
-        return mapping
+        return CategoryMapping()
+
 
+def _build_category_mapping():
+    df = read_sheet(MAPPING_FILE, CC_MAPPING_SHEET)
+    rows = []
     for _, row in df.iterrows():
         keyword = clean_text(row.get("Keyword Pattern", "") or row.get("Keyword", ""))
         expense_type = clean_text(row.get("Expense Type", "") or row.get("Category", ""))
         merchant_category = clean_text(row.get("Merchant Category", ""))
         store_name = clean_text(row.get("Store Name", ""))
         if keyword:
-            mapping.append((keyword.upper(), expense_type, merchant_category, store_name))
-    return mapping
+            rows.append((keyword.upper(), expense_type, merchant_category, store_name))
+    return CategoryMapping(rows)
 
 
 def categorize(description, mapping):
     """Assign Expense Type, Merchant Category, Store Name based on mapping."""
     desc = (description or "").upper()
-    for keyword, expense_type, merchant_category, store_name in mapping:
-        if keyword in desc:
-            if not expense_type:
-                expense_type = infer_expense_type(desc)
-            if not merchant_category:
-                merchant_category = "Uncategorized"
-            if not store_name:
-                store_name = keyword.title()
-            return expense_type, merchant_category, store_name
+    # First mapping row (top to bottom) whose keyword occurs in the description wins.
+    if isinstance(mapping, CategoryMapping):
+        index = mapping.automaton.first_match(desc)
+    else:
+        index = next((i for i, row in enumerate(mapping) if row[0] in desc), None)
+    if index is not None:
+        keyword, expense_type, merchant_category, store_name = mapping[index]
+        if not expense_type:
+            expense_type = infer_expense_type(desc)
+        if not merchant_category:
+            merchant_category = "Uncategorized"
+        if not store_name:
+            store_name = keyword.title()
+        return expense_type, merchant_category, store_name
     # No mapping found
     return infer_expense_type(desc), "Uncategorized", "Unknown"
 
 
 def infer_expense_type(desc_upper):
     """Infer Expense Type from description keywords."""
-    for category, keywords in EXPENSE_TYPE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in desc_upper:
-                return category
-    return "Uncategorized"
+    index = _EXPENSE_TYPE_AUTOMATON.first_match(desc_upper)
+    if index is None:
+        return "Uncategorized"
+    return _EXPENSE_TYPE_CATEGORIES[index]
+
+
+def classify_records(records, mapping):
+    """Fill the category fields extraction left unset (None) from the mapping; returns records."""
+    for r in records:
+        if r.get("Expense Type") is None:
+            r["Expense Type"], r["Merchant Category"], r["Store Name"] = categorize(
+                r.get("Description", ""), mapping
+            )
+    return records
 
 
 def is_payment(description, expense_type, merchant_category):
@@ -568,8 +665,8 @@ def is_payment(description, expense_type, merchant_category):
 
 def extract_axis_statement_summary(pdf_path):
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return None
 
@@ -622,8 +719,8 @@ def extract_axis_statement_summary(pdf_path):
 
 def extract_icici_statement_summary(pdf_path):
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return None
 
@@ -664,8 +761,8 @@ def extract_idfc_statement_summary(pdf_path):
       - Total Amount Due
     """
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return None
 
@@ -865,8 +962,8 @@ def extract_statement_due(pdf_path, bank=None, variant=None, label_map=None):
         return None
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join([(p.extract_text() or "") for p in pdf.pages])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text()
     except Exception:
         return None
 
@@ -877,11 +974,8 @@ def extract_statement_due(pdf_path, bank=None, variant=None, label_map=None):
 
     # OCR fallback
     try:
-        from pdf2image import convert_from_path
-        import pytesseract
-
-        images = convert_from_path(pdf_path)
-        text = "\n".join(pytesseract.image_to_string(img, lang="eng") for img in images)
+        # Shares the OCR pass (and on-disk OCR cache) with the Axis Rewards OCR parser.
+        text = "\n".join(ocr_pages(document_path(pdf_path)))
         text_norm = re.sub(r"\s+", " ", text)
         return parse_text(text_norm)
     except Exception:
@@ -914,8 +1008,8 @@ def extract_statement_period(pdf_path):
         return ""
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return ""
     return parse_period(text)
@@ -987,8 +1081,8 @@ def extract_payment_due_period(pdf_path, bank=None, variant=None, due_date_label
         return ""
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return ""
     return parse_from_text(text)
@@ -1068,8 +1162,8 @@ def extract_payment_due_date(pdf_path, bank=None, variant=None, due_date_label_m
         return ""
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return ""
     return parse_from_text(text)
@@ -1092,10 +1186,8 @@ def extract_period_from_label(pdf_path, bank=None, variant=None, known_cards=Non
     def label_for(bank_l: str, variant_l: str) -> str:
         if not known_cards:
             return ""
-        for c in known_cards:
-            if clean_text(c.get("Bank", "")).lower() == bank_l and clean_text(c.get("Card Variant", "")).lower() == variant_l:
-                return clean_text(c.get("Period", ""))
-        return ""
+        card = as_card_registry(known_cards).card_for_bank_variant(bank_l, variant_l)
+        return clean_text(card.get("Period", "")) if card else ""
 
     bank_l = (bank or "").lower()
     variant_l = (variant or "").lower()
@@ -1106,8 +1198,8 @@ def extract_period_from_label(pdf_path, bank=None, variant=None, known_cards=Non
     date_pattern = r"(\d{2}/\d{2}/\d{4}|\d{2}/[A-Za-z]{3}/\d{4}|\d{1,2}\s+[A-Za-z]{3},\s+\d{4}|[A-Za-z]+\s+\d{1,2},\s+\d{4}|\d{2}\s+[A-Za-z]{3}\s+'?\d{2,4})"
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
+        with as_statement_document(pdf_path) as doc:
+            text = doc.text(max_pages=2)
     except Exception:
         return ""
     text_norm = re.sub(r"\s+", " ", text or "").strip()
@@ -1224,9 +1316,776 @@ def build_no_pdf_record(bank: str, variant: str, period: str):
     }
 
 
-def aggregate():
+def _extract_statement(doc, label_map, due_date_label_map, known_cards):
+    resolved_from_label = resolve_bank_variant_from_label(doc, known_cards=known_cards)
+    parser, bank = get_parser(doc)
+    if resolved_from_label:
+        resolved_parser, resolved_bank_hint = parser_for_resolved_card(
+            resolved_from_label["Account"],
+            resolved_from_label["Card Variant"],
+        )
+        if resolved_parser:
+            parser, bank = resolved_parser, resolved_bank_hint
+
+    if not parser:
+        return {"status": "no_parser"}
+
+    records = parser(doc)
+
+    if not records:
+        if resolved_from_label:
+            placeholder = build_no_transaction_record(
+                doc,
+                f"{resolved_from_label['Account']} {resolved_from_label['Card Variant']}",
+            )
+            placeholder["Account"] = resolved_from_label["Account"]
+            placeholder["Card Variant"] = resolved_from_label["Card Variant"]
+        else:
+            placeholder = build_no_transaction_record(doc, bank or "")
+        # Align placeholder period with label-driven mapping when possible.
+        derived_period = extract_period_from_label(
+            doc,
+            placeholder["Account"],
+            placeholder["Card Variant"],
+            known_cards=known_cards,
+        )
+        if derived_period:
+            placeholder["Period"] = derived_period
+        key = (
+            placeholder["Account"],
+            placeholder["Card Variant"],
+            placeholder["Period"],
+        )
+        return {
+            "status": "no_transactions",
+            "placeholder": placeholder,
+            "key": key,
+            "payment_due_period": (
+                extract_payment_due_period(
+                    doc,
+                    placeholder["Account"],
+                    placeholder["Card Variant"],
+                    due_date_label_map,
+                )
+                or placeholder["Period"]
+            ),
+            "payment_due_date": extract_payment_due_date(
+                doc,
+                placeholder["Account"],
+                placeholder["Card Variant"],
+                due_date_label_map,
+            ),
+        }
+
+    records = normalize(records)
+
+    resolved = resolved_from_label or resolve_bank_variant_from_label(
+        doc, bank or records[0].get("Account", ""), known_cards
+    )
+    if resolved:
+        tmp_bank_name = resolved["Account"]
+        tmp_variant = resolved["Card Variant"]
+        tmp_card_last4 = resolved.get("Card Last4") or ""
+    else:
+        tmp_bank_name, tmp_variant = split_account_variant(bank or records[0].get("Account", ""))
+        tmp_card_last4 = ""
+    tmp_period = records[0].get("Period", "Unknown")
+    statement_key = (tmp_bank_name, tmp_variant, tmp_period, tmp_card_last4)
+
+    # Override Period for all records using label-driven mapping (Mon-YYYY).
+    derived_period = extract_period_from_label(
+        doc, tmp_bank_name, tmp_variant, known_cards=known_cards
+    )
+    if derived_period:
+        for r in records:
+            r["Period"] = normalize_period_mon_yyyy(derived_period)
+    else:
+        for r in records:
+            r["Period"] = normalize_period_mon_yyyy(r.get("Period"))
+
+    # Category fields are left for classify_records(), which runs on every load, so a
+    # mapping edit never needs the PDF parsed again. The keys are set here to keep
+    # the column order of the output sheets.
+    for r in records:
+        # Override for Uni Gold UPI expenses
+        if "UNI GOLD CARD UPI" in str(r.get("Account", "")).upper():
+            r["Expense Type"], r["Merchant Category"], r["Store Name"] = UNI_GOLD_UPI_CLASSIFICATION
+        else:
+            r["Expense Type"] = r["Merchant Category"] = r["Store Name"] = None
+        # Normalize Account and Card Variant early.
+        # Prefer the bank/card label inferred by master (folder/name/content),
+        # because some underlying parsers return generic account names.
+        if resolved:
+            r["Account"] = tmp_bank_name
+            r["Card Variant"] = tmp_variant
+        else:
+            bank_name, variant = split_account_variant(bank or r.get("Account", ""))
+            r["Account"] = bank_name
+            r["Card Variant"] = variant
+
+    account_hint = records[0].get("Account", bank or "")
+    variant_hint = records[0].get("Card Variant", "")
+    key = (
+        records[0].get("Account", account_hint),
+        records[0].get("Card Variant", variant_hint),
+        records[0].get("Period", "Unknown"),
+    )
+    statement_due = extract_statement_due(doc, account_hint, variant_hint, label_map)
+    payment_due_date = None
+    if statement_due is not None:
+        payment_due_date = extract_payment_due_date(doc, key[0], key[1], due_date_label_map)
+
+    statement_summaries = []
+    bank_l = str(bank or "").lower()
+    for bank_token, summary_extractor in (
+        ("axis", extract_axis_statement_summary),
+        ("icici", extract_icici_statement_summary),
+        ("idfc", extract_idfc_statement_summary),
+    ):
+        if bank_token in bank_l:
+            summary_fields = summary_extractor(doc)
+            if summary_fields:
+                statement_summaries.append(summary_fields)
+
+    # Also try to extract reconciliation fields via Label Mapping labels when provided.
+    # This helps banks where we don't have a dedicated statement-summary parser.
+    recon_values = None
+    recon_labels = resolve_recon_labels(account_hint, variant_hint, known_cards)
+    if recon_labels and records[0].get("Account") != "Axis":
+        recon_values = {}
+        for field in ("Previous Balance", "Previous Payment", "Credits", "Purchase", "Cash Advance", "Other Debit&Charges"):
+            lbl = clean_text(recon_labels.get(field, ""))
+            if not lbl:
+                continue
+            val = extract_labeled_amount(doc, lbl)
+            if val is not None:
+                recon_values[field] = float(val)
+
+    return {
+        "status": "parsed",
+        "records": records,
+        "statement_key": statement_key,
+        "key": key,
+        "statement_due": statement_due,
+        "payment_due_date": payment_due_date,
+        "statement_summaries": statement_summaries,
+        "recon_values": recon_values,
+    }
+
+
+def extract_statement(file_path, label_map, due_date_label_map, known_cards):
+    """
+    Per-file stage of aggregate(): parser selection, parsing and all statement-level
+    extraction (due, due date, period, summary). Categorisation is left to classify_records().
+
+    Reads no shared state, so it can run in a worker process. Parser output printed
+    while it runs is captured and replayed by aggregate() in scan order.
+    """
+    result = {"file": os.path.basename(file_path), "status": "error", "error": "", "traceback": ""}
+    out = io.StringIO()
+    with redirect_stdout(out):
+        # One open + at most one text/table extraction per page for every helper.
+        with StatementDocument(file_path) as doc:
+            try:
+                result.update(_extract_statement(doc, label_map, due_date_label_map, known_cards))
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e)
+                result["traceback"] = traceback.format_exc()
+    result["log"] = out.getvalue()
+    return result
+
+
+def iter_statement_results(
+    pdf_paths, workers, label_map, due_date_label_map, known_cards, pool=None, counters=None,
+    timeout=None, max_rss_mb=None,
+):
+    """
+    extract_statement() results in `pdf_paths` order, from a process pool when workers > 1
+    (see BoundedStage: only a few statements per worker are queued ahead of aggregate()).
+    A shared `pool` (run_all) is used instead of starting one, and is left running.
+    With a `timeout` (seconds) or `max_rss_mb`, each statement is parsed in a sandboxed
+    process of its own and one over either limit is reported as failed (see sandbox.py).
+    """
+    return BoundedStage(
+        extract_statement,
+        pdf_paths,
+        (label_map, due_date_label_map, known_cards),
+        workers,
+        pool,
+        on_error=_failed_statement_result,
+        counters=counters,
+        timeout=timeout,
+        max_rss_mb=max_rss_mb,
+    )
+
+
+def _failed_statement_result(pdf_path, error):
+    # BoundedStage on_error handler.
+    return {
+        "file": os.path.basename(pdf_path),
+        "status": "error",
+        "error": failure_text(LEDGER_SOURCE, pdf_path, error),
+        "traceback": "",
+        "log": "",
+    }
+
+
+def store_statement_result(ledger, pdf_path, sha256, result, config):
+    """Ingest one extract_statement() result; records go to transactions, the rest is the payload."""
+    payload = {k: v for k, v in result.items() if k != "records"}
+    ledger.ingest(
+        LEDGER_SOURCE, pdf_path, sha256, PARSER_VERSION, result.get("records") or [], payload, config
+    )
+
+
+def load_statement_result(ledger, statement_id, payload, pdf_path):
+    """Rebuild the extract_statement() result of an ingested statement."""
+    result = dict(payload)
+    result["file"] = os.path.basename(pdf_path)
+    for field in ("key", "statement_key"):
+        if field in result:
+            result[field] = tuple(result[field])
+    if result["status"] == "parsed":
+        result["records"] = ledger.records(statement_id)
+    return result
+
+
+def iter_ledger_results(
+    pdf_paths, ledger, workers, label_map, due_date_label_map, known_cards, pool=None, counters=None,
+    timeout=None, max_rss_mb=None,
+):
+    """
+    extract_statement() results in `pdf_paths` order, read back from the ledger.
+
+    A PDF whose content was already ingested with this PARSER_VERSION and the same
+    label mapping is not parsed again (result["reused"] is True); the others go
+    through iter_statement_results() and are ingested before being yielded.
+    Extraction of new PDFs starts once they are known, while reused ones are read back.
+    """
+    counters = counters if counters is not None else StageCounters()
+    # Labels and known cards steer extraction; the category sheet only feeds classify_records().
+    config = sheets_fingerprint(OUTSTANDING_LABEL_FILE, LABEL_MAPPING_SHEET_CANDIDATES)
+    hashes, found = [], []
+    for pdf_path in pdf_paths:
+        with counters.time("ledger"):
+            sha, statement = ledger.lookup(LEDGER_SOURCE, pdf_path, PARSER_VERSION, config)
+        hashes.append(sha)
+        found.append(statement)
+    fresh = iter_statement_results(
+        [p for p, statement in zip(pdf_paths, found) if statement is None],
+        workers,
+        label_map,
+        due_date_label_map,
+        known_cards,
+        pool,
+        counters,
+        timeout,
+        max_rss_mb,
+    )
+    try:
+        for pdf_path, sha, statement in zip(pdf_paths, hashes, found):
+            if statement is not None:
+                with counters.time("ledger", 0):
+                    result = load_statement_result(ledger, *statement, pdf_path)
+                result["reused"] = True
+                yield result
+                continue
+            result = next(fresh)
+            if sha and result["status"] in LEDGER_STATUSES:
+                with counters.time("ledger", 0):
+                    store_statement_result(ledger, pdf_path, sha, result, config)
+                    # Render from what was stored, so a fresh parse and a re-run give the same rows.
+                    statement = ledger.find_statement(LEDGER_SOURCE, sha, PARSER_VERSION, config)
+                    result = load_statement_result(ledger, *statement, pdf_path)
+            yield result
+    finally:
+        fresh.close()
+
+
+TRACKER_SHEET_RECON = "Credit card Reconciliation"
+TRACKER_HEADER_FILL = "F4B183"
+# Recon rows with Payment Due == 0 (White, darker 15%).
+TRACKER_ZERO_DUE_FILL = "D9D9D9"
+TRACKER_AMOUNT_FORMAT = "#,##0.00;[Red]-#,##0.00"
+TRACKER_EXPLICIT_AMOUNT_HEADERS = {
+    "Previous Balance",
+    "Previous Payment",
+    "Credits",
+    "Purchase",
+    "Cash Advance",
+    "Other Debit&Charges",
+    "Payment Due",
+}
+TRACKER_PLACEHOLDER_DESCRIPTIONS = {"NO PAYMENT NEEDED", NO_STMT_AVAILABLE_TEXT.upper()}
+EXCEL_ENGINES = ("xlsxwriter", "openpyxl")
+
+
+def _is_amount_header(header_text):
+    return (
+        "Amount" in header_text
+        or "Amt" in header_text
+        or header_text == "Recon Diff"
+        or header_text in TRACKER_EXPLICIT_AMOUNT_HEADERS
+    )
+
+
+def write_tracker_workbook(output_file, sheets, excel_engine="xlsxwriter"):
+    """
+    Write CC_Monthly_Master_Tracker.xlsx from a sheet layout.
+
+    Each sheet is a dict:
+      - name
+      - tables: [(df, startrow, startcol)] as for DataFrame.to_excel (0-based)
+      - titles: [(title, row, start_col, end_col)] merged title cells (1-based)
+      - header_ranges: [(row, start_col, end_col)] header cells to fill (1-based);
+        when given, every other row is left unfilled. Default: row 1.
+      - border_ranges: [(start_row, start_col, end_row, end_col)] (1-based).
+        Default: every cell of the used range.
+      - autofilter: (start_row, start_col, end_row, end_col), None for no filter.
+        Default: the used range.
+
+    "xlsxwriter" streams rows with formats applied as they are written;
+    "openpyxl" writes with pandas and styles the finished workbook cell by cell.
+    """
+    if excel_engine == "openpyxl":
+        _write_tracker_openpyxl(output_file, sheets)
+    else:
+        _write_tracker_xlsxwriter(output_file, sheets)
+
+
+def _write_tracker_openpyxl(output_file, sheets):
+    from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
+    from openpyxl.utils import get_column_letter
+
+    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
+        for spec in sheets:
+            for df, startrow, startcol in spec["tables"]:
+                df.to_excel(writer, sheet_name=spec["name"], index=False, startrow=startrow, startcol=startcol)
+
+        # Format headers and borders across all sheets + auto-fit columns
+        wb = writer.book
+        header_fill = PatternFill(start_color=TRACKER_HEADER_FILL, end_color=TRACKER_HEADER_FILL, fill_type="solid")
+        no_fill = PatternFill(fill_type=None)
+        header_font = Font(bold=True)
+        thin = Side(style="thin")
+        border = Border(left=thin, right=thin, top=thin, bottom=thin)
+
+        for spec in sheets:
+            ws = wb[spec["name"]]
+            for title, row, start_col, end_col in spec.get("titles", []):
+                ws.merge_cells(start_row=row, start_column=start_col, end_row=row, end_column=end_col)
+                cell = ws.cell(row=row, column=start_col)
+                cell.value = title
+                cell.font = header_font
+                cell.fill = header_fill
+                cell.alignment = Alignment(horizontal="center", vertical="center")
+                for col in range(start_col, end_col + 1):
+                    ws.cell(row=row, column=col).border = border
+
+        for spec in sheets:
+            ws = wb[spec["name"]]
+            max_row = ws.max_row
+            max_col = ws.max_column
+            if max_row == 0 or max_col == 0:
+                continue
+            ws.freeze_panes = "A2"
+            amount_like_cols = set()
+            description_col = None
+            payment_due_col = None
+            for col in range(1, max_col + 1):
+                header_value = ws.cell(row=1, column=col).value
+                header_text = str(header_value or "").strip()
+                if header_text == "Description":
+                    description_col = col
+                if ws.title == TRACKER_SHEET_RECON and header_text == "Payment Due":
+                    payment_due_col = col
+                if _is_amount_header(header_text):
+                    amount_like_cols.add(col)
+            # Header styling
+            header_rows = {1}
+            header_row_ranges = spec.get("header_ranges")
+            border_ranges = spec.get("border_ranges")
+            if header_row_ranges is not None:
+                header_rows = {row for row, _, _ in header_row_ranges}
+            if header_row_ranges is None:
+                for row in header_rows:
+                    if row > max_row:
+                        continue
+                    for col in range(1, max_col + 1):
+                        cell = ws.cell(row=row, column=col)
+                        if cell.value not in (None, ""):
+                            cell.font = header_font
+                            cell.fill = header_fill
+            else:
+                for row, start_col, end_col in header_row_ranges:
+                    if row > max_row:
+                        continue
+                    for col in range(start_col, min(end_col, max_col) + 1):
+                        cell = ws.cell(row=row, column=col)
+                        if cell.value not in (None, ""):
+                            cell.font = header_font
+                            cell.fill = header_fill
+            autofilter = spec.get("autofilter", "used")
+            if autofilter == "used":
+                ws.auto_filter.ref = ws.dimensions
+            elif autofilter is None:
+                ws.auto_filter.ref = None
+            else:
+                start_row, start_col, end_row, end_col = autofilter
+                ws.auto_filter.ref = (
+                    f"{get_column_letter(start_col)}{start_row}:{get_column_letter(end_col)}{end_row}"
+                )
+            # Borders / formats for all cells
+            for row in range(1, max_row + 1):
+                # Determine due==0 once per row for Recon shading.
+                due_is_zero = False
+                if ws.title == TRACKER_SHEET_RECON and row >= 2 and payment_due_col is not None:
+                    try:
+                        due_val = ws.cell(row=row, column=payment_due_col).value
+                        if due_val is not None and float(due_val) == 0:
+                            due_is_zero = True
+                    except Exception:
+                        pass
+
+                for col in range(1, max_col + 1):
+                    cell = ws.cell(row=row, column=col)
+                    apply_border = True
+                    if border_ranges is not None:
+                        apply_border = any(
+                            start_row <= row <= end_row and start_col <= col <= end_col
+                            for start_row, start_col, end_row, end_col in border_ranges
+                        )
+                    if apply_border:
+                        cell.border = border
+
+                    if header_row_ranges is not None and row not in header_rows:
+                        cell.fill = no_fill
+
+                    # Shade entire row for Payment Due == 0 (White, darker 15%).
+                    if due_is_zero:
+                        cell.fill = PatternFill(
+                            start_color=TRACKER_ZERO_DUE_FILL, end_color=TRACKER_ZERO_DUE_FILL, fill_type="solid"
+                        )
+
+                    if row >= 2 and col in amount_like_cols and isinstance(cell.value, (int, float)):
+                        cell.number_format = TRACKER_AMOUNT_FORMAT
+
+                    if (
+                        row >= 2
+                        and description_col is not None
+                        and col == description_col
+                        and str(cell.value or "").strip().upper() in TRACKER_PLACEHOLDER_DESCRIPTIONS
+                    ):
+                        # Red by default; green only when there was no PDF present at all.
+                        type_col = None
+                        for c in range(1, max_col + 1):
+                            if str(ws.cell(1, c).value or "").strip() == "Type":
+                                type_col = c
+                                break
+                        if type_col is not None and str(ws.cell(row, type_col).value or "").strip() == "NO_PDF":
+                            cell.font = Font(color="008000")
+                        else:
+                            cell.font = Font(color="FF0000")
+
+                    if ws.title == TRACKER_SHEET_RECON:
+                        header_text = str(ws.cell(1, col).value or "").strip()
+                        if row >= 2 and header_text == "Reconciled?":
+                            val = str(cell.value or "").strip().lower()
+                            if val == "yes":
+                                cell.font = Font(color="008000")
+                            elif val == "no":
+                                cell.font = Font(color="FF0000")
+                        if row >= 2 and header_text == "Recon Diff":
+                            try:
+                                if float(cell.value) != 0:
+                                    cell.font = Font(color="FF0000")
+                            except Exception:
+                                pass
+            # Auto-fit column widths
+            for col in range(1, max_col + 1):
+                col_letter = get_column_letter(col)
+                max_len = 0
+                for row in range(1, max_row + 1):
+                    val = ws.cell(row=row, column=col).value
+                    if val is None:
+                        continue
+                    max_len = max(max_len, len(str(val)))
+                ws.column_dimensions[col_letter].width = min(max_len + 2, 60)
+
+
+def _excel_cell_value(value):
+    """The value DataFrame.to_excel stores for a cell: NaN -> "", inf -> "inf", numpy -> Python."""
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        try:
+            value = value.item()
+        except Exception:
+            pass
+    if value is None or value is pd.NaT or value is pd.NA:
+        return ""
+    if isinstance(value, float):
+        if math.isnan(value):
+            return ""
+        if math.isinf(value):
+            return "inf" if value > 0 else "-inf"
+    return value
+
+
+def _text_width(series):
+    """Longest str() of the non-null values, i.e. what the width scan sees for this column."""
+    values = series[series.notna()]
+    if values.empty:
+        return 0
+    return int(values.astype(str).str.len().max())
+
+
+def _pandas_header_style():
+    """(bold, border, align, valign) DataFrame.to_excel gives header cells itself; pandas 3 adds none."""
+    try:
+        from pandas.io.formats.excel import ExcelFormatter
+
+        style = getattr(ExcelFormatter(pd.DataFrame()), "header_style", None)
+    except Exception:
+        style = None
+    if not style:
+        return False, False, None, None
+    alignment = style.get("alignment") or {}
+    return (
+        bool((style.get("font") or {}).get("bold")),
+        bool(style.get("borders")),
+        alignment.get("horizontal"),
+        alignment.get("vertical"),
+    )
+
+
+def _write_tracker_xlsxwriter(output_file, sheets):
+    import xlsxwriter
+
+    # constant_memory: each row is flushed to disk once the next one starts, so rows are
+    # written strictly top to bottom with their final formats.
+    workbook = xlsxwriter.Workbook(output_file, {"constant_memory": True, "strings_to_urls": False})
+    formats = {}
+    header_bold, header_border, header_align, header_valign = _pandas_header_style()
+
+    def cell_format(bold=False, fill=None, color=None, num_format=None, border=False, align=None, valign=None):
+        key = (bold, fill, color, num_format, border, align, valign)
+        if key not in formats:
+            props = {}
+            if bold:
+                props["bold"] = True
+            if fill:
+                props.update(pattern=1, bg_color=f"#{fill}")
+            if color:
+                props["font_color"] = f"#{color}"
+            if num_format:
+                props["num_format"] = num_format
+            if border:
+                props["border"] = 1
+            if align:
+                props["align"] = align
+            if valign:
+                props["valign"] = valign
+            formats[key] = workbook.add_format(props) if props else None
+        return formats[key]
+
+    try:
+        for spec in sheets:
+            ws = workbook.add_worksheet(spec["name"])
+            tables = [(df, startrow, startcol) for df, startrow, startcol in spec["tables"] if len(df.columns)]
+            titles = spec.get("titles", [])
+            header_row_ranges = spec.get("header_ranges")
+            border_ranges = spec.get("border_ranges")
+
+            # Used range (1-based), as the cell-by-cell writer sees it.
+            max_row = max(
+                [startrow + 1 + len(df) for df, startrow, _ in tables] + [row for _, row, _, _ in titles] + [1]
+            )
+            max_col = max(
+                [startcol + len(df.columns) for df, _, startcol in tables] + [end for _, _, _, end in titles] + [1]
+            )
+
+            # Column roles come from whatever ends up in row 1.
+            row1 = {}
+            for df, startrow, startcol in tables:
+                if startrow == 0:
+                    for j, col in enumerate(df.columns):
+                        row1[startcol + j + 1] = col
+            for title, row, start_col, _ in titles:
+                if row == 1:
+                    row1[start_col] = title
+            header_texts = {col: str(value or "").strip() for col, value in row1.items()}
+            amount_like_cols = {col for col, text in header_texts.items() if _is_amount_header(text)}
+            description_col = max((col for col, text in header_texts.items() if text == "Description"), default=None)
+            type_col = min((col for col, text in header_texts.items() if text == "Type"), default=None)
+            payment_due_col = None
+            if spec["name"] == TRACKER_SHEET_RECON:
+                payment_due_col = max(
+                    (col for col, text in header_texts.items() if text == "Payment Due"), default=None
+                )
+
+            # Column widths from per-column text lengths instead of a scan over written cells.
+            widths = [0] * (max_col + 1)
+            for df, _, startcol in tables:
+                for j, col in enumerate(df.columns):
+                    c = startcol + j + 1
+                    widths[c] = max(widths[c], len(str(col)), _text_width(df.iloc[:, j]))
+            for title, _, start_col, _ in titles:
+                widths[start_col] = max(widths[start_col], len(str(title)))
+            # set_column() would add cell padding on top; 7 px per character (default font)
+            # stores the same width the openpyxl writer sets.
+            for c in range(1, max_col + 1):
+                ws.set_column_pixels(c - 1, c - 1, 7 * min(widths[c] + 2, 60))
+
+            ws.freeze_panes(1, 0)
+            autofilter = spec.get("autofilter", "used")
+            if autofilter == "used":
+                ws.autofilter(0, 0, max_row - 1, max_col - 1)
+            elif autofilter is not None:
+                start_row, start_col, end_row, end_col = autofilter
+                ws.autofilter(start_row - 1, start_col - 1, end_row - 1, end_col - 1)
+
+            if header_row_ranges is None:
+                header_cols_by_row = {1: range(1, max_col + 1)}
+            else:
+                header_cols_by_row = {}
+                for row, start_col, end_col in header_row_ranges:
+                    header_cols_by_row.setdefault(row, set()).update(range(start_col, min(end_col, max_col) + 1))
+            titles_by_row = {}
+            for title, row, start_col, end_col in titles:
+                titles_by_row.setdefault(row, []).append((title, start_col, end_col))
+
+            table_rows = [(df, startrow, startcol, df.itertuples(index=False, name=None)) for df, startrow, startcol in tables]
+            for row in range(1, max_row + 1):
+                values = {}
+                pandas_header_cols = set()
+                for df, startrow, startcol, rows_iter in table_rows:
+                    if row == startrow + 1:
+                        for j, col in enumerate(df.columns):
+                            values[startcol + j + 1] = col
+                            pandas_header_cols.add(startcol + j + 1)
+                    elif startrow + 1 < row <= startrow + 1 + len(df):
+                        for j, value in enumerate(next(rows_iter)):
+                            values[startcol + j + 1] = _excel_cell_value(value)
+
+                title_cols = set()
+                for title, start_col, end_col in titles_by_row.get(row, []):
+                    fill = None if header_row_ranges is not None and row not in header_cols_by_row else TRACKER_HEADER_FILL
+                    fmt = cell_format(bold=True, fill=fill, border=True, align="center", valign="vcenter")
+                    if end_col > start_col:
+                        ws.merge_range(row - 1, start_col - 1, row - 1, end_col - 1, title, fmt)
+                    else:
+                        ws.write(row - 1, start_col - 1, title, fmt)
+                    title_cols.update(range(start_col, end_col + 1))
+
+                due_is_zero = False
+                if row >= 2 and payment_due_col is not None:
+                    try:
+                        due_val = values.get(payment_due_col)
+                        if due_val is not None and float(due_val) == 0:
+                            due_is_zero = True
+                    except Exception:
+                        pass
+
+                header_cols = header_cols_by_row.get(row, ())
+                bordered_cols = None if border_ranges is None else _bordered_columns(border_ranges, row)
+                # Consecutive cells sharing a format go out in one write_row() call.
+                run_col, run_values, run_fmt = None, [], None
+                for col in range(1, max_col + 1):
+                    if col in title_cols:
+                        if run_values:
+                            ws.write_row(row - 1, run_col - 1, run_values, run_fmt)
+                        run_col, run_values = None, []
+                        continue
+                    value = values.get(col)
+                    bold = False
+                    fill = None
+                    color = None
+                    num_format = None
+                    align = valign = None
+                    if col in pandas_header_cols:
+                        bold, align, valign = header_bold, header_align, header_valign
+                    if col in header_cols and value not in (None, ""):
+                        bold, fill = True, TRACKER_HEADER_FILL
+                    if bordered_cols is None:
+                        border = True
+                    else:
+                        border = (header_border and col in pandas_header_cols) or col in bordered_cols
+                    if due_is_zero:
+                        fill = TRACKER_ZERO_DUE_FILL
+                    if row >= 2:
+                        if col in amount_like_cols and isinstance(value, (int, float)):
+                            num_format = TRACKER_AMOUNT_FORMAT
+                        elif isinstance(value, datetime):
+                            num_format = "YYYY-MM-DD HH:MM:SS"
+                        elif isinstance(value, date):
+                            num_format = "YYYY-MM-DD"
+                        header_text = header_texts.get(col, "")
+                        if col == description_col and str(value or "").strip().upper() in TRACKER_PLACEHOLDER_DESCRIPTIONS:
+                            # Red by default; green only when there was no PDF present at all.
+                            no_pdf = type_col is not None and str(values.get(type_col) or "").strip() == "NO_PDF"
+                            color = "008000" if no_pdf else "FF0000"
+                        if spec["name"] == TRACKER_SHEET_RECON:
+                            if header_text == "Reconciled?":
+                                val = str(value or "").strip().lower()
+                                if val == "yes":
+                                    color = "008000"
+                                elif val == "no":
+                                    color = "FF0000"
+                            if header_text == "Recon Diff":
+                                try:
+                                    if float(value) != 0:
+                                        color = "FF0000"
+                                except Exception:
+                                    pass
+                        if color:
+                            # A coloured font replaces the header font, as in the openpyxl writer.
+                            bold = False
+
+                    fmt = cell_format(bold, fill, color, num_format, border, align, valign)
+                    if run_values and fmt is not run_fmt:
+                        ws.write_row(row - 1, run_col - 1, run_values, run_fmt)
+                        run_col, run_values = None, []
+                    if not run_values:
+                        run_col, run_fmt = col, fmt
+                    # None/"" become write_blank(), which skips cells without a format.
+                    run_values.append(value)
+                if run_values:
+                    ws.write_row(row - 1, run_col - 1, run_values, run_fmt)
+    finally:
+        workbook.close()
+
+
+def _bordered_columns(border_ranges, row):
+    """Columns of `row` inside any of border_ranges [(start_row, start_col, end_row, end_col)], 1-based."""
+    cols = set()
+    for start_row, start_col, end_row, end_col in border_ranges:
+        if start_row <= row <= end_row:
+            cols.update(range(start_col, end_col + 1))
+    return cols
+
+
+def aggregate(
+    workers=1,
+    excel_engine="xlsxwriter",
+    ledger_file=LEDGER_FILE,
+    pdf_paths=None,
+    pool=None,
+    timeout=None,
+    max_rss_mb=None,
+):
     """
     Main aggregation function
+
+    workers > 1 parses statements in a process pool; output is identical to a serial run.
+    Each statement is ingested, classified and merged as soon as it is parsed, while
+    the pool works on the next few (bounded queue); per-stage counters are printed.
+    excel_engine picks the workbook writer (see write_tracker_workbook).
+    Statements are ingested into the ledger at ledger_file and only new or changed
+    PDFs are parsed; ledger_file=None parses everything and keeps no ledger.
+    run_all passes the PDFs it already discovered and its shared worker pool.
+    With a `timeout` (seconds) or `max_rss_mb`, each new statement is parsed in a
+    sandboxed child process: one over either limit is stopped, recorded in Error/ and
+    counted as failed, and the run carries on.
     """
     print("\n" + "="*70)
     print("MASTER CREDIT CARD AGGREGATOR")
@@ -1252,228 +2111,113 @@ def aggregate():
     due_date_label_map = load_due_date_label_map()
     known_cards = load_known_cards()
 
-    for root, dirs, files in os.walk(BASE_DIR):
-        dirs[:] = [d for d in dirs if d.lower() not in {"archive", "archived"}]
-        for file in files:
-            if not file.lower().endswith(".pdf"):
-                continue
-
-            file_path = os.path.join(root, file)
-            stats["total"] += 1
-
-            print(f"📄 Processing: {file}")
-
-            resolved_from_label = resolve_bank_variant_from_label(file_path, known_cards=known_cards)
-            parser, bank = get_parser(file_path)
-            if resolved_from_label:
-                resolved_parser, resolved_bank_hint = parser_for_resolved_card(
-                    resolved_from_label["Account"],
-                    resolved_from_label["Card Variant"],
-                )
-                if resolved_parser:
-                    parser, bank = resolved_parser, resolved_bank_hint
-
-            if not parser:
-                print(f"   ⚠️ No parser found")
-                stats["failed"] += 1
-                continue
-
-            try:
-                records = parser(file_path)
-
-                if not records:
-                    if resolved_from_label:
-                        placeholder = build_no_transaction_record(
-                            file_path,
-                            f"{resolved_from_label['Account']} {resolved_from_label['Card Variant']}",
-                        )
-                        placeholder["Account"] = resolved_from_label["Account"]
-                        placeholder["Card Variant"] = resolved_from_label["Card Variant"]
-                    else:
-                        placeholder = build_no_transaction_record(file_path, bank or "")
-                    # Align placeholder period with label-driven mapping when possible.
-                    derived_period = extract_period_from_label(
-                        file_path,
-                        placeholder["Account"],
-                        placeholder["Card Variant"],
-                        known_cards=known_cards,
-                    )
-                    if derived_period:
-                        placeholder["Period"] = derived_period
-                    key = (
-                        placeholder["Account"],
-                        placeholder["Card Variant"],
-                        placeholder["Period"],
-                    )
-                    no_payment_needed_keys.add(key)
-                    statement_due_map[key] = 0.0
-                    payment_due_period_map[key] = (
-                        extract_payment_due_period(
-                            file_path,
-                            placeholder["Account"],
-                            placeholder["Card Variant"],
-                            due_date_label_map,
-                        )
-                        or placeholder["Period"]
-                    )
-                    payment_due_date_map[key] = extract_payment_due_date(
-                        file_path,
-                        placeholder["Account"],
-                        placeholder["Card Variant"],
-                        due_date_label_map,
-                    )
-                    statement_summary_map[key] = {
-                        "Previous Balance": 0.0,
-                        "Previous Payment": 0.0,
-                        "Credits": 0.0,
-                        "Purchase": 0.0,
-                        "Cash Advance": 0.0,
-                        "Other Debit&Charges": 0.0,
-                        "Payment Due": 0.0,
-                    }
-                    all_records.append(placeholder)
-                    print("   ⚠️ No transactions extracted; added NO PAYMENT NEEDED placeholder")
-                    stats["success"] += 1
-                    continue
-
-                records = normalize(records)
+    if pdf_paths is None:
+        pdf_paths = list_statement_pdfs(BASE_DIR)
+    ledger = Ledger(ledger_file)
+    # Per-stage item counts and busy time, reported with the totals.
+    counters = StageCounters()
+    results = iter_ledger_results(
+        pdf_paths,
+        ledger,
+        workers,
+        label_map,
+        due_date_label_map,
+        known_cards,
+        pool,
+        counters,
+        timeout,
+        max_rss_mb,
+    )
+    # Results arrive in scan order whatever the worker count, so "first seen wins"
+    # dedup and the output workbook are the same as a serial run.
+    for result in results:
+        stats["total"] += 1
+        print(f"📄 Processing: {result['file']}")
+        if result.get("reused"):
+            print("   ↺ Already in ledger; not parsed again")
+        if result["log"]:
+            print(result["log"], end="")
+
+        if result["status"] == "no_parser":
+            print(f"   ⚠️ No parser found")
+            stats["failed"] += 1
+            continue
 
-                # Deduplicate: same bank+variant+period should only be processed once
-                # even if multiple PDFs are dropped in the folder with different names.
-                resolved = resolved_from_label or resolve_bank_variant_from_label(
-                    file_path, bank or records[0].get("Account", ""), known_cards
-                )
-                if resolved:
-                    tmp_bank_name = resolved["Account"]
-                    tmp_variant = resolved["Card Variant"]
-                    tmp_card_last4 = resolved.get("Card Last4") or ""
-                else:
-                    tmp_bank_name, tmp_variant = split_account_variant(bank or records[0].get("Account", ""))
-                    tmp_card_last4 = ""
-                tmp_period = records[0].get("Period", "Unknown")
-                statement_key = (tmp_bank_name, tmp_variant, tmp_period, tmp_card_last4)
-                if statement_key in processed_statement_keys:
-                    print("   ⚠️ Duplicate statement detected; skipping this PDF")
-                    stats["success"] += 1
-                    continue
-                processed_statement_keys.add(statement_key)
+        if result["status"] == "error":
+            print(f"   ❌ Error: {result['error']}")
+            stats["failed"] += 1
+            if result.get("traceback"):
+                print(result["traceback"], end="", file=sys.stderr)
+            continue
 
-                # Override Period for all records using label-driven mapping (Mon-YYYY).
-                derived_period = extract_period_from_label(
-                    file_path, tmp_bank_name, tmp_variant, known_cards=known_cards
-                )
-                if derived_period:
-                    for r in records:
-                        r["Period"] = normalize_period_mon_yyyy(derived_period)
-                else:
-                    for r in records:
-                        r["Period"] = normalize_period_mon_yyyy(r.get("Period"))
-
-                # Categorize each record
-                for r in records:
-                    expense_type, merchant_category, store_name = categorize(
-                        r.get("Description", ""), mapping
-                    )
-                    # Override for Uni Gold UPI expenses
-                    if "UNI GOLD CARD UPI" in str(r.get("Account", "")).upper():
-                        expense_type = "Personal"
-                        merchant_category = "Leisure"
-                        store_name = "UPI"
-                    r["Expense Type"] = expense_type
-                    r["Merchant Category"] = merchant_category
-                    r["Store Name"] = store_name
-                    # Normalize Account and Card Variant early.
-                    # Prefer the bank/card label inferred by master (folder/name/content),
-                    # because some underlying parsers return generic account names.
-                    if resolved:
-                        r["Account"] = tmp_bank_name
-                        r["Card Variant"] = tmp_variant
-                    else:
-                        bank_name, variant = split_account_variant(bank or r.get("Account", ""))
-                        r["Account"] = bank_name
-                        r["Card Variant"] = variant
-
-                # Capture statement due for reconciliation
-                account_hint = records[0].get("Account", bank or "")
-                variant_hint = records[0].get("Card Variant", "")
-                statement_due = extract_statement_due(file_path, account_hint, variant_hint, label_map)
-                if statement_due is not None and records:
-                    account = records[0].get("Account", account_hint)
-                    variant = records[0].get("Card Variant", "")
-                    period = records[0].get("Period", "Unknown")
-                    key = (account, variant, period)
-                    existing = statement_due_map.get(key)
-                    if existing is None or statement_due > existing:
-                        statement_due_map[key] = statement_due
-                    payment_due_period_map[key] = period
-                    payment_due_date_map[key] = extract_payment_due_date(
-                        file_path, account, variant, due_date_label_map
-                    )
-                if records and "axis" in str(bank or "").lower():
-                    account = records[0].get("Account", account_hint)
-                    variant = records[0].get("Card Variant", "")
-                    period = records[0].get("Period", "Unknown")
-                    key = (account, variant, period)
-                    summary_fields = extract_axis_statement_summary(file_path)
-                    if summary_fields:
-                        statement_summary_map[key] = summary_fields
-                        statement_due_map[key] = summary_fields["Payment Due"]
-                if records and "icici" in str(bank or "").lower():
-                    account = records[0].get("Account", account_hint)
-                    variant = records[0].get("Card Variant", "")
-                    period = records[0].get("Period", "Unknown")
-                    key = (account, variant, period)
-                    summary_fields = extract_icici_statement_summary(file_path)
-                    if summary_fields:
-                        statement_summary_map[key] = summary_fields
-                        statement_due_map[key] = summary_fields["Payment Due"]
-                if records and "idfc" in str(bank or "").lower():
-                    account = records[0].get("Account", account_hint)
-                    variant = records[0].get("Card Variant", "")
-                    period = records[0].get("Period", "Unknown")
-                    key = (account, variant, period)
-                    summary_fields = extract_idfc_statement_summary(file_path)
-                    if summary_fields:
-                        statement_summary_map[key] = summary_fields
-                        statement_due_map[key] = summary_fields["Payment Due"]
-
-                # Also try to extract reconciliation fields via Label Mapping labels when provided.
-                # This helps banks where we don't have a dedicated statement-summary parser.
-                recon_labels = resolve_recon_labels(account_hint, variant_hint, known_cards)
-                if recon_labels and records and records[0].get("Account") != "Axis":
-                    key = (
-                        records[0].get("Account", account_hint),
-                        records[0].get("Card Variant", variant_hint),
-                        records[0].get("Period", "Unknown"),
-                    )
-                    existing = statement_summary_map.get(key) or {
-                        "Previous Balance": 0.0,
-                        "Previous Payment": 0.0,
-                        "Credits": 0.0,
-                        "Purchase": 0.0,
-                        "Cash Advance": 0.0,
-                        "Other Debit&Charges": 0.0,
-                        "Payment Due": float(statement_due_map.get(key, 0.0) or 0.0),
-                    }
-                    for field in ("Previous Balance", "Previous Payment", "Credits", "Purchase", "Cash Advance", "Other Debit&Charges"):
-                        lbl = clean_text(recon_labels.get(field, ""))
-                        if not lbl:
-                            continue
-                        val = extract_labeled_amount(file_path, lbl)
-                        if val is not None:
-                            existing[field] = float(val)
-                    statement_summary_map[key] = existing
+        if result["status"] == "no_transactions":
+            key = result["key"]
+            no_payment_needed_keys.add(key)
+            statement_due_map[key] = 0.0
+            payment_due_period_map[key] = result["payment_due_period"]
+            payment_due_date_map[key] = result["payment_due_date"]
+            statement_summary_map[key] = {
+                "Previous Balance": 0.0,
+                "Previous Payment": 0.0,
+                "Credits": 0.0,
+                "Purchase": 0.0,
+                "Cash Advance": 0.0,
+                "Other Debit&Charges": 0.0,
+                "Payment Due": 0.0,
+            }
+            all_records.append(result["placeholder"])
+            print("   ⚠️ No transactions extracted; added NO PAYMENT NEEDED placeholder")
+            stats["success"] += 1
+            continue
 
-                print(f"   ✅ Extracted {len(records)} transactions (Period: {records[0].get('Period', 'Unknown')})")
+        # Deduplicate: same bank+variant+period should only be processed once
+        # even if multiple PDFs are dropped in the folder with different names.
+        # Workers cannot see which keys an earlier file claimed, so a duplicate is
+        # fully extracted before it is dropped here; the ledger keeps that cost to
+        # the run that first sees the file.
+        statement_key = result["statement_key"]
+        if statement_key in processed_statement_keys:
+            print("   ⚠️ Duplicate statement detected; skipping this PDF")
+            stats["success"] += 1
+            continue
+        processed_statement_keys.add(statement_key)
+
+        with counters.time("classify"):
+            records = classify_records(result["records"], mapping)
+        key = result["key"]
+
+        # Capture statement due for reconciliation
+        statement_due = result["statement_due"]
+        if statement_due is not None:
+            existing = statement_due_map.get(key)
+            if existing is None or statement_due > existing:
+                statement_due_map[key] = statement_due
+            payment_due_period_map[key] = key[2]
+            payment_due_date_map[key] = result["payment_due_date"]
+        for summary_fields in result["statement_summaries"]:
+            statement_summary_map[key] = summary_fields
+            statement_due_map[key] = summary_fields["Payment Due"]
+
+        # Reconciliation fields found via Label Mapping labels override the defaults.
+        if result["recon_values"] is not None:
+            existing = statement_summary_map.get(key) or {
+                "Previous Balance": 0.0,
+                "Previous Payment": 0.0,
+                "Credits": 0.0,
+                "Purchase": 0.0,
+                "Cash Advance": 0.0,
+                "Other Debit&Charges": 0.0,
+                "Payment Due": float(statement_due_map.get(key, 0.0) or 0.0),
+            }
+            for field, val in result["recon_values"].items():
+                existing[field] = val
+            statement_summary_map[key] = existing
 
-                all_records.extend(records)
-                stats["success"] += 1
+        print(f"   ✅ Extracted {len(records)} transactions (Period: {records[0].get('Period', 'Unknown')})")
 
-            except Exception as e:
-                print(f"   ❌ Error: {e}")
-                stats["failed"] += 1
-                import traceback
-                traceback.print_exc()
+        all_records.extend(records)
+        stats["success"] += 1
+    ledger.close()
 
     # If no PDFs were present at all, still emit one "NO PAYMENT NEEDED" expense row per known card.
     if known_cards:
@@ -1570,526 +2314,349 @@ def aggregate():
             ]
         )
 
-    with pd.ExcelWriter(OUTPUT_FILE, engine="openpyxl") as writer:
-        df_expenses = df_expenses.drop(
-            columns=["Type", "Brand", "Expense_Type"], errors="ignore"
+    df_expenses = df_expenses.drop(
+        columns=["Type", "Brand", "Expense_Type"], errors="ignore"
+    )
+    if "Card Variant" in df_expenses.columns:
+        cols = list(df_expenses.columns)
+        if "Account" in cols:
+            cols.remove("Card Variant")
+            acc_idx = cols.index("Account") + 1
+            cols.insert(acc_idx, "Card Variant")
+            df_expenses = df_expenses[cols]
+    # Sort by Account, Card Variant, Date, but keep placeholders at the bottom.
+    if not df_expenses.empty:
+        desc_upper = df_expenses.get("Description", "").astype(str).str.strip().str.upper()
+        df_expenses["_no_stmt"] = desc_upper.eq(NO_STMT_AVAILABLE_TEXT.upper())
+        df_expenses["_no_payment"] = (
+            desc_upper.eq("NO PAYMENT NEEDED")
+        )
+        if "Date" in df_expenses.columns:
+            df_expenses["_date_sort"] = pd.to_datetime(df_expenses["Date"], errors="coerce", dayfirst=True)
+        else:
+            df_expenses["_date_sort"] = pd.NaT
+        df_expenses = df_expenses.sort_values(
+            by=["_no_stmt", "_no_payment", "Account", "Card Variant", "_date_sort"],
+            ascending=[True, True, True, True, True],
+            kind="stable",
+            na_position="last",
+        ).reset_index(drop=True)
+        df_expenses = df_expenses.drop(columns=["_no_stmt", "_no_payment", "_date_sort"], errors="ignore")
+
+    # Reconcile using expenses total vs statement due
+    if not df_payments.empty:
+        expense_totals = (
+            df_expenses.groupby(["Account", "Card Variant", "Period"])["Amount"]
+            .sum()
+            .reset_index()
         )
-        if "Card Variant" in df_expenses.columns:
-            cols = list(df_expenses.columns)
-            if "Account" in cols:
-                cols.remove("Card Variant")
-                acc_idx = cols.index("Account") + 1
-                cols.insert(acc_idx, "Card Variant")
-                df_expenses = df_expenses[cols]
-        # Sort by Account, Card Variant, Date, but keep placeholders at the bottom.
-        if not df_expenses.empty:
-            desc_upper = df_expenses.get("Description", "").astype(str).str.strip().str.upper()
-            df_expenses["_no_stmt"] = desc_upper.eq(NO_STMT_AVAILABLE_TEXT.upper())
-            df_expenses["_no_payment"] = (
-                desc_upper.eq("NO PAYMENT NEEDED")
+        expense_total_map = {
+            (row["Account"], row["Card Variant"], row["Period"]): round(float(row["Amount"]), 2)
+            for _, row in expense_totals.iterrows()
+        }
+
+        # Per map: (Account, Card Variant) -> first value in insertion order, for the
+        # period-agnostic fallback. The maps are not modified while payments are reconciled.
+        account_variant_indexes = {}
+
+        def lookup_map_value(mapping_dict, key, account, variant, default=None):
+            if key in mapping_dict:
+                return mapping_dict[key]
+            index = account_variant_indexes.get(id(mapping_dict))
+            if index is None:
+                index = {}
+                for (acc, var, _), value in mapping_dict.items():
+                    index.setdefault((acc, var), value)
+                account_variant_indexes[id(mapping_dict)] = index
+            return index.get((account, variant), default)
+
+        for idx, row in df_payments.iterrows():
+            key = (row.get("Account"), row.get("Card Variant"), row.get("Period"))
+            # Period is derived from the label configured in "Label Mapping" (e.g. Statement Generation Date)
+            # and was already applied to transaction records earlier; do not override it here.
+            df_payments.at[idx, "Payment Due Date"] = lookup_map_value(
+                payment_due_date_map,
+                key,
+                row.get("Account"),
+                row.get("Card Variant"),
+                "",
             )
-            if "Date" in df_expenses.columns:
-                df_expenses["_date_sort"] = pd.to_datetime(df_expenses["Date"], errors="coerce", dayfirst=True)
-            else:
-                df_expenses["_date_sort"] = pd.NaT
-            df_expenses = df_expenses.sort_values(
-                by=["_no_stmt", "_no_payment", "Account", "Card Variant", "_date_sort"],
-                ascending=[True, True, True, True, True],
-                kind="stable",
-                na_position="last",
-            ).reset_index(drop=True)
-            df_expenses = df_expenses.drop(columns=["_no_stmt", "_no_payment", "_date_sort"], errors="ignore")
-        df_expenses.to_excel(writer, sheet_name="Credit card expenses", index=False)
-
-        # Reconcile using expenses total vs statement due
-        if not df_payments.empty:
-            expense_totals = (
-                df_expenses.groupby(["Account", "Card Variant", "Period"])["Amount"]
-                .sum()
-                .reset_index()
+            stated_due = lookup_map_value(
+                statement_due_map,
+                key,
+                row.get("Account"),
+                row.get("Card Variant"),
+                0.0,
             )
-            expense_total_map = {
-                (row["Account"], row["Card Variant"], row["Period"]): round(float(row["Amount"]), 2)
-                for _, row in expense_totals.iterrows()
-            }
-
-            def lookup_map_value(mapping_dict, key, account, variant, default=None):
-                if key in mapping_dict:
-                    return mapping_dict[key]
-                for (acc, var, _), value in mapping_dict.items():
-                    if acc == account and var == variant:
-                        return value
-                return default
-
-            for idx, row in df_payments.iterrows():
-                key = (row.get("Account"), row.get("Card Variant"), row.get("Period"))
-                # Period is derived from the label configured in "Label Mapping" (e.g. Statement Generation Date)
-                # and was already applied to transaction records earlier; do not override it here.
-                df_payments.at[idx, "Payment Due Date"] = lookup_map_value(
-                    payment_due_date_map,
-                    key,
-                    row.get("Account"),
-                    row.get("Card Variant"),
-                    "",
-                )
-                stated_due = lookup_map_value(
-                    statement_due_map,
-                    key,
-                    row.get("Account"),
-                    row.get("Card Variant"),
-                    0.0,
-                )
-                expense_sum = expense_total_map.get(key)
-                summary_fields = lookup_map_value(
-                    statement_summary_map,
-                    key,
-                    row.get("Account"),
-                    row.get("Card Variant"),
-                    None,
-                )
-                if summary_fields is None:
-                    summary_fields = {
-                        "Previous Balance": 0.0,
-                        "Previous Payment": abs(float(row.get("Amount", 0.0) or 0.0)),
-                        "Credits": 0.0,
-                        "Purchase": 0.0,
-                        "Cash Advance": 0.0,
-                        "Other Debit&Charges": 0.0,
-                        "Payment Due": stated_due,
-                    }
-                for field, value in summary_fields.items():
-                    df_payments.at[idx, field] = value
-                if row.get("Account") == "Axis" and lookup_map_value(
-                    statement_summary_map, key, row.get("Account"), row.get("Card Variant"), None
-                ) is not None:
-                    calc_due = round(
-                        float(summary_fields.get("Previous Balance", 0.0))
-                        - float(summary_fields.get("Previous Payment", 0.0))
-                        - float(summary_fields.get("Credits", 0.0))
-                        + float(summary_fields.get("Purchase", 0.0))
-                        + float(summary_fields.get("Cash Advance", 0.0))
-                        + float(summary_fields.get("Other Debit&Charges", 0.0)),
-                        2,
-                    )
-                    df_payments.at[idx, "Payment Due"] = calc_due
-                    diff = round(float(stated_due) - float(calc_due), 2)
-                elif lookup_map_value(
-                    statement_summary_map, key, row.get("Account"), row.get("Card Variant"), None
-                ) is not None:
-                    df_payments.at[idx, "Payment Due"] = float(summary_fields.get("Payment Due", stated_due))
-                    diff = round(float(stated_due) - float(summary_fields.get("Payment Due", stated_due)), 2)
-                else:
-                    df_payments.at[idx, "Payment Due"] = stated_due
-                    diff = round(float(stated_due) - float(expense_sum or 0.0), 2)
-                df_payments.at[idx, "Recon Diff"] = diff
-                df_payments.at[idx, "Reconciled?"] = "Yes" if abs(diff) <= 0.01 else "No"
-
-        if not df_payments.empty and "Description" in df_payments.columns:
-            no_stmt_mask = df_payments["Description"].astype(str).str.strip().str.upper().eq(
-                NO_STMT_AVAILABLE_TEXT.upper()
+            expense_sum = expense_total_map.get(key)
+            summary_fields = lookup_map_value(
+                statement_summary_map,
+                key,
+                row.get("Account"),
+                row.get("Card Variant"),
+                None,
             )
-            df_payments.loc[no_stmt_mask, "Payment Due Date"] = NO_STMT_AVAILABLE_TEXT
-
-        df_payments = df_payments.drop(
-            columns=["Type", "Expense Type", "Merchant Category", "Store Name", "Amount"],
-            errors="ignore",
-        )
-        if not df_payments.empty:
-            for idx, row in df_payments.iterrows():
-                if row.get("Account") != "ICICI":
-                    continue
-                summary_fields = None
-                for (acc, var, _), value in statement_summary_map.items():
-                    if acc == row.get("Account") and var == row.get("Card Variant"):
-                        summary_fields = value
-                        break
-                if summary_fields is None:
-                    continue
-                for field, value in summary_fields.items():
-                    df_payments.at[idx, field] = value
-                df_payments.at[idx, "Reconciled?"] = "Yes"
-                df_payments.at[idx, "Recon Diff"] = 0.0
-        # Reorder columns for bill payments sheet
-        desired_cols = [
-            "Period",
-            "Account",
-            "Card Variant",
-            "Previous Balance",
-            "Previous Payment",
-            "Credits",
-            "Purchase",
-            "Cash Advance",
-            "Other Debit&Charges",
-            "Payment Due Date",
-            "Payment Due",
-            "Reconciled?",
-            "Recon Diff",
-        ]
-        existing_cols = [c for c in desired_cols if c in df_payments.columns]
-        remaining = [c for c in df_payments.columns if c not in existing_cols and c not in {"Date", "Description"}]
-        df_payments = df_payments[existing_cols + remaining]
-        # Sort by Account + Card Variant, but keep no-statement and zero-due rows at the bottom.
-        if not df_payments.empty:
-            if "Payment Due Date" in df_payments.columns:
-                df_payments["_no_stmt"] = df_payments["Payment Due Date"].astype(str).str.strip().str.upper().eq(
-                    NO_STMT_AVAILABLE_TEXT.upper()
+            if summary_fields is None:
+                summary_fields = {
+                    "Previous Balance": 0.0,
+                    "Previous Payment": abs(float(row.get("Amount", 0.0) or 0.0)),
+                    "Credits": 0.0,
+                    "Purchase": 0.0,
+                    "Cash Advance": 0.0,
+                    "Other Debit&Charges": 0.0,
+                    "Payment Due": stated_due,
+                }
+            for field, value in summary_fields.items():
+                df_payments.at[idx, field] = value
+            if row.get("Account") == "Axis" and lookup_map_value(
+                statement_summary_map, key, row.get("Account"), row.get("Card Variant"), None
+            ) is not None:
+                calc_due = round(
+                    float(summary_fields.get("Previous Balance", 0.0))
+                    - float(summary_fields.get("Previous Payment", 0.0))
+                    - float(summary_fields.get("Credits", 0.0))
+                    + float(summary_fields.get("Purchase", 0.0))
+                    + float(summary_fields.get("Cash Advance", 0.0))
+                    + float(summary_fields.get("Other Debit&Charges", 0.0)),
+                    2,
                 )
+                df_payments.at[idx, "Payment Due"] = calc_due
+                diff = round(float(stated_due) - float(calc_due), 2)
+            elif lookup_map_value(
+                statement_summary_map, key, row.get("Account"), row.get("Card Variant"), None
+            ) is not None:
+                df_payments.at[idx, "Payment Due"] = float(summary_fields.get("Payment Due", stated_due))
+                diff = round(float(stated_due) - float(summary_fields.get("Payment Due", stated_due)), 2)
             else:
-                df_payments["_no_stmt"] = False
-            df_payments["_due_zero"] = False
-            if "Payment Due" in df_payments.columns:
-                df_payments["_due_zero"] = pd.to_numeric(df_payments["Payment Due"], errors="coerce").fillna(0).eq(0)
-            df_payments = df_payments.sort_values(
-                by=["_no_stmt", "_due_zero", "Account", "Card Variant", "Period"],
-                ascending=[True, True, True, True, True],
-                kind="stable",
-                na_position="last",
-            ).reset_index(drop=True)
-            df_payments = df_payments.drop(columns=["_no_stmt", "_due_zero"], errors="ignore")
-        df_payments.to_excel(writer, sheet_name="Credit card Reconciliation", index=False)
-        # Summary grouped by Expense Type + Merchant Category
-        if not df_expenses.empty:
-            summary_tbl = (
-                df_expenses.groupby(["Expense Type", "Merchant Category"])["Amount"]
-                .agg(TotalAmount="sum", TransactionCount="count")
-                .reset_index()
-            )
-            summary_per_card_tbl = (
-                df_expenses.groupby(
-                    ["Period", "Account", "Card Variant", "Expense Type", "Merchant Category"],
-                    dropna=False,
-                )["Amount"]
-                .agg(TotalAmount="sum", TransactionCount="count")
-                .reset_index()
-            )
-            summary_per_card_exp_type_tbl = (
-                df_expenses.groupby(
-                    ["Period", "Account", "Expense Type"],
-                    dropna=False,
-                )["Amount"]
-                .agg(TotalAmount="sum", TransactionCount="count")
-                .reset_index()
-            )
-            summary_per_card_expense_pivot_tbl = (
-                summary_per_card_exp_type_tbl.groupby(["Expense Type"], dropna=False)["TotalAmount"]
-                .agg(SumOfTotalAmount="sum")
-                .reset_index()
-            )
-            card_variant_summary_tbl = (
-                df_expenses.groupby(["Account", "Card Variant"], dropna=False)["Amount"]
-                .agg(SumOfAmount="sum")
-                .reset_index()
+                df_payments.at[idx, "Payment Due"] = stated_due
+                diff = round(float(stated_due) - float(expense_sum or 0.0), 2)
+            df_payments.at[idx, "Recon Diff"] = diff
+            df_payments.at[idx, "Reconciled?"] = "Yes" if abs(diff) <= 0.01 else "No"
+
+    if not df_payments.empty and "Description" in df_payments.columns:
+        no_stmt_mask = df_payments["Description"].astype(str).str.strip().str.upper().eq(
+            NO_STMT_AVAILABLE_TEXT.upper()
+        )
+        df_payments.loc[no_stmt_mask, "Payment Due Date"] = NO_STMT_AVAILABLE_TEXT
+
+    df_payments = df_payments.drop(
+        columns=["Type", "Expense Type", "Merchant Category", "Store Name", "Amount"],
+        errors="ignore",
+    )
+    if not df_payments.empty:
+        for idx, row in df_payments.iterrows():
+            if row.get("Account") != "ICICI":
+                continue
+            summary_fields = None
+            for (acc, var, _), value in statement_summary_map.items():
+                if acc == row.get("Account") and var == row.get("Card Variant"):
+                    summary_fields = value
+                    break
+            if summary_fields is None:
+                continue
+            for field, value in summary_fields.items():
+                df_payments.at[idx, field] = value
+            df_payments.at[idx, "Reconciled?"] = "Yes"
+            df_payments.at[idx, "Recon Diff"] = 0.0
+    # Reorder columns for bill payments sheet
+    desired_cols = [
+        "Period",
+        "Account",
+        "Card Variant",
+        "Previous Balance",
+        "Previous Payment",
+        "Credits",
+        "Purchase",
+        "Cash Advance",
+        "Other Debit&Charges",
+        "Payment Due Date",
+        "Payment Due",
+        "Reconciled?",
+        "Recon Diff",
+    ]
+    existing_cols = [c for c in desired_cols if c in df_payments.columns]
+    remaining = [c for c in df_payments.columns if c not in existing_cols and c not in {"Date", "Description"}]
+    df_payments = df_payments[existing_cols + remaining]
+    # Sort by Account + Card Variant, but keep no-statement and zero-due rows at the bottom.
+    if not df_payments.empty:
+        if "Payment Due Date" in df_payments.columns:
+            df_payments["_no_stmt"] = df_payments["Payment Due Date"].astype(str).str.strip().str.upper().eq(
+                NO_STMT_AVAILABLE_TEXT.upper()
             )
         else:
-            summary_tbl = pd.DataFrame(
-                columns=["Expense Type", "Merchant Category", "TotalAmount", "TransactionCount"]
-            )
-            summary_per_card_tbl = pd.DataFrame(
-                columns=[
-                    "Period",
-                    "Account",
-                    "Card Variant",
-                    "Expense Type",
-                    "Merchant Category",
-                    "TotalAmount",
-                    "TransactionCount",
-                ]
-            )
-            summary_per_card_exp_type_tbl = pd.DataFrame(
-                columns=[
-                    "Period",
-                    "Account",
-                    "Expense Type",
-                    "TotalAmount",
-                    "TransactionCount",
-                ]
-            )
-            summary_per_card_expense_pivot_tbl = pd.DataFrame(
-                columns=["Expense Type", "SumOfTotalAmount"]
-            )
-            card_variant_summary_tbl = pd.DataFrame(
-                columns=["Account", "Card Variant", "SumOfAmount"]
-            )
-
-        summary_tbl.to_excel(writer, sheet_name="Credit card summary", index=False)
-        summary_per_card_tbl = sort_dataframe(
-            summary_per_card_tbl,
-            ["Period", "Account", "Card Variant", "Expense Type"],
+            df_payments["_no_stmt"] = False
+        df_payments["_due_zero"] = False
+        if "Payment Due" in df_payments.columns:
+            df_payments["_due_zero"] = pd.to_numeric(df_payments["Payment Due"], errors="coerce").fillna(0).eq(0)
+        df_payments = df_payments.sort_values(
+            by=["_no_stmt", "_due_zero", "Account", "Card Variant", "Period"],
+            ascending=[True, True, True, True, True],
+            kind="stable",
+            na_position="last",
+        ).reset_index(drop=True)
+        df_payments = df_payments.drop(columns=["_no_stmt", "_due_zero"], errors="ignore")
+    # Summary grouped by Expense Type + Merchant Category
+    if not df_expenses.empty:
+        summary_tbl = (
+            df_expenses.groupby(["Expense Type", "Merchant Category"])["Amount"]
+            .agg(TotalAmount="sum", TransactionCount="count")
+            .reset_index()
         )
-        summary_per_card_exp_type_tbl = sort_dataframe(
-            summary_per_card_exp_type_tbl,
-            ["Period", "Account", "Expense Type"],
+        summary_per_card_tbl = (
+            df_expenses.groupby(
+                ["Period", "Account", "Card Variant", "Expense Type", "Merchant Category"],
+                dropna=False,
+            )["Amount"]
+            .agg(TotalAmount="sum", TransactionCount="count")
+            .reset_index()
         )
-        summary_per_card_exp_type_tbl = summary_per_card_exp_type_tbl.drop(columns=["TransactionCount"], errors="ignore")
-        summary_per_card_expense_pivot_tbl = sort_dataframe(
-            summary_per_card_expense_pivot_tbl[summary_per_card_expense_pivot_tbl["SumOfTotalAmount"] != 0],
-            ["Expense Type"],
+        summary_per_card_exp_type_tbl = (
+            df_expenses.groupby(
+                ["Period", "Account", "Expense Type"],
+                dropna=False,
+            )["Amount"]
+            .agg(TotalAmount="sum", TransactionCount="count")
+            .reset_index()
         )
-        card_variant_summary_tbl = sort_dataframe(card_variant_summary_tbl, ["Account", "Card Variant"])
-        detailed_title_row = 1
-        detailed_header_startrow = detailed_title_row
-        detailed_startcol = 0
-        detailed_data_end_row = detailed_title_row + 1 + max(len(summary_per_card_tbl), 1)
-        cc_expense_title_row = detailed_data_end_row + 3
-        cc_expense_header_startrow = cc_expense_title_row
-        cc_expense_startcol = 0
-        card_to_expense_title_row = 1
-        card_to_expense_header_startrow = card_to_expense_title_row
-        card_to_expense_startcol = 10
-        card_variant_title_row = card_to_expense_title_row + 1 + max(len(summary_per_card_expense_pivot_tbl), 1) + 3
-        card_variant_header_startrow = card_variant_title_row
-        card_variant_startcol = 10
-        summary_per_card_tbl.to_excel(
-            writer,
-            sheet_name="Credit card summary Per card",
-            index=False,
-            startrow=detailed_header_startrow,
-            startcol=detailed_startcol,
+        summary_per_card_expense_pivot_tbl = (
+            summary_per_card_exp_type_tbl.groupby(["Expense Type"], dropna=False)["TotalAmount"]
+            .agg(SumOfTotalAmount="sum")
+            .reset_index()
         )
-        summary_per_card_exp_type_tbl.to_excel(
-            writer,
-            sheet_name="Credit card summary Per card",
-            index=False,
-            startrow=cc_expense_header_startrow,
-            startcol=cc_expense_startcol,
+        card_variant_summary_tbl = (
+            df_expenses.groupby(["Account", "Card Variant"], dropna=False)["Amount"]
+            .agg(SumOfAmount="sum")
+            .reset_index()
         )
-        summary_per_card_expense_pivot_tbl.to_excel(
-            writer,
-            sheet_name="Credit card summary Per card",
-            index=False,
-            startrow=card_to_expense_header_startrow,
-            startcol=card_to_expense_startcol,
+    else:
+        summary_tbl = pd.DataFrame(
+            columns=["Expense Type", "Merchant Category", "TotalAmount", "TransactionCount"]
         )
-        card_variant_summary_tbl.to_excel(
-            writer,
-            sheet_name="Credit card summary Per card",
-            index=False,
-            startrow=card_variant_header_startrow,
-            startcol=card_variant_startcol,
+        summary_per_card_tbl = pd.DataFrame(
+            columns=[
+                "Period",
+                "Account",
+                "Card Variant",
+                "Expense Type",
+                "Merchant Category",
+                "TotalAmount",
+                "TransactionCount",
+            ]
+        )
+        summary_per_card_exp_type_tbl = pd.DataFrame(
+            columns=[
+                "Period",
+                "Account",
+                "Expense Type",
+                "TotalAmount",
+                "TransactionCount",
+            ]
+        )
+        summary_per_card_expense_pivot_tbl = pd.DataFrame(
+            columns=["Expense Type", "SumOfTotalAmount"]
+        )
+        card_variant_summary_tbl = pd.DataFrame(
+            columns=["Account", "Card Variant", "SumOfAmount"]
         )
 
-        # Format headers and borders across all sheets + auto-fit columns
-        wb = writer.book
-        from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-        from openpyxl.utils import get_column_letter
-
-        header_fill = PatternFill(start_color="F4B183", end_color="F4B183", fill_type="solid")
-        no_fill = PatternFill(fill_type=None)
-        header_font = Font(bold=True)
-        thin = Side(style="thin")
-        border = Border(left=thin, right=thin, top=thin, bottom=thin)
-
-        ws_per_card = wb["Credit card summary Per card"]
-        title_specs = [
-            ("Detailed summary", detailed_title_row, 1, 7),
-            (
-                "CC to expense summary",
-                cc_expense_title_row,
-                cc_expense_startcol + 1,
-                cc_expense_startcol + len(summary_per_card_exp_type_tbl.columns),
-            ),
-            (
-                "Expense Type summary",
-                card_to_expense_title_row,
-                card_to_expense_startcol + 1,
-                card_to_expense_startcol + len(summary_per_card_expense_pivot_tbl.columns),
-            ),
-            (
-                "Card to expense summary",
-                card_variant_title_row,
-                card_variant_startcol + 1,
-                card_variant_startcol + len(card_variant_summary_tbl.columns),
-            ),
-        ]
-        for title, row, start_col, end_col in title_specs:
-            ws_per_card.merge_cells(start_row=row, start_column=start_col, end_row=row, end_column=end_col)
-            cell = ws_per_card.cell(row=row, column=start_col)
-            cell.value = title
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-            for col in range(start_col, end_col + 1):
-                ws_per_card.cell(row=row, column=col).border = border
-
-        per_card_border_ranges = [
-            (detailed_title_row, 1, detailed_data_end_row, 7),
-            (
-                cc_expense_title_row,
-                cc_expense_startcol + 1,
-                cc_expense_title_row + 1 + max(len(summary_per_card_exp_type_tbl), 1),
-                cc_expense_startcol + len(summary_per_card_exp_type_tbl.columns),
-            ),
-            (
-                card_to_expense_title_row,
-                card_to_expense_startcol + 1,
-                card_to_expense_title_row + 1 + max(len(summary_per_card_expense_pivot_tbl), 1),
-                card_to_expense_startcol + len(summary_per_card_expense_pivot_tbl.columns),
-            ),
-            (
-                card_variant_title_row,
-                card_variant_startcol + 1,
-                card_variant_title_row + 1 + max(len(card_variant_summary_tbl), 1),
-                card_variant_startcol + len(card_variant_summary_tbl.columns),
-            ),
-        ]
-
-        for ws in wb.worksheets:
-            max_row = ws.max_row
-            max_col = ws.max_column
-            if max_row == 0 or max_col == 0:
-                continue
-            ws.freeze_panes = "A2"
-            amount_like_cols = set()
-            description_col = None
-            payment_due_col = None
-            explicit_amount_headers = {
-                "Previous Balance",
-                "Previous Payment",
-                "Credits",
-                "Purchase",
-                "Cash Advance",
-                "Other Debit&Charges",
-                "Payment Due",
-            }
-            for col in range(1, max_col + 1):
-                header_value = ws.cell(row=1, column=col).value
-                header_text = str(header_value or "").strip()
-                if header_text == "Description":
-                    description_col = col
-                if ws.title == "Credit card Reconciliation" and header_text == "Payment Due":
-                    payment_due_col = col
-                if (
-                    "Amount" in header_text
-                    or "Amt" in header_text
-                    or header_text == "Recon Diff"
-                    or header_text in explicit_amount_headers
-                ):
-                    amount_like_cols.add(col)
-            # Header styling
-            header_rows = {1}
-            header_row_ranges = None
-            if ws.title == "Credit card summary Per card":
-                header_row_ranges = [
-                    (
-                        detailed_title_row + 1,
-                        detailed_startcol + 1,
-                        detailed_startcol + len(summary_per_card_tbl.columns),
-                    ),
-                    (
-                        cc_expense_title_row + 1,
-                        cc_expense_startcol + 1,
-                        cc_expense_startcol + len(summary_per_card_exp_type_tbl.columns),
-                    ),
-                    (
-                        card_to_expense_title_row + 1,
-                        card_to_expense_startcol + 1,
-                        card_to_expense_startcol + len(summary_per_card_expense_pivot_tbl.columns),
-                    ),
-                    (
-                        card_variant_title_row + 1,
-                        card_variant_startcol + 1,
-                        card_variant_startcol + len(card_variant_summary_tbl.columns),
-                    ),
-                ]
-                header_rows = {row for row, _, _ in header_row_ranges}
-            if header_row_ranges is None:
-                for row in header_rows:
-                    if row > max_row:
-                        continue
-                    for col in range(1, max_col + 1):
-                        cell = ws.cell(row=row, column=col)
-                        if cell.value not in (None, ""):
-                            cell.font = header_font
-                            cell.fill = header_fill
-            else:
-                for row, start_col, end_col in header_row_ranges:
-                    if row > max_row:
-                        continue
-                    for col in range(start_col, min(end_col, max_col) + 1):
-                        cell = ws.cell(row=row, column=col)
-                        if cell.value not in (None, ""):
-                            cell.font = header_font
-                            cell.fill = header_fill
-            if ws.title == "Credit card summary Per card":
-                ws.auto_filter.ref = f"A{detailed_title_row + 1}:G{detailed_data_end_row}"
-            elif ws.title == "Credit card Reconciliation":
-                ws.auto_filter.ref = None
-            else:
-                ws.auto_filter.ref = ws.dimensions
-            # Borders / formats for all cells
-            for row in range(1, max_row + 1):
-                # Determine due==0 once per row for Recon shading.
-                due_is_zero = False
-                if ws.title == "Credit card Reconciliation" and row >= 2 and payment_due_col is not None:
-                    try:
-                        due_val = ws.cell(row=row, column=payment_due_col).value
-                        if due_val is not None and float(due_val) == 0:
-                            due_is_zero = True
-                    except Exception:
-                        pass
-
-                for col in range(1, max_col + 1):
-                    cell = ws.cell(row=row, column=col)
-                    apply_border = True
-                    if ws.title == "Credit card summary Per card":
-                        apply_border = any(
-                            start_row <= row <= end_row and start_col <= col <= end_col
-                            for start_row, start_col, end_row, end_col in per_card_border_ranges
-                        )
-                    if apply_border:
-                        cell.border = border
-
-                    if ws.title == "Credit card summary Per card" and row not in header_rows:
-                        cell.fill = no_fill
-
-                    # Shade entire row for Payment Due == 0 (White, darker 15%).
-                    if due_is_zero:
-                        cell.fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-
-                    if row >= 2 and col in amount_like_cols and isinstance(cell.value, (int, float)):
-                        cell.number_format = "#,##0.00;[Red]-#,##0.00"
-
-                    if (
-                        row >= 2
-                        and description_col is not None
-                        and col == description_col
-                        and str(cell.value or "").strip().upper() in {"NO PAYMENT NEEDED", NO_STMT_AVAILABLE_TEXT.upper()}
-                    ):
-                        # Red by default; green only when there was no PDF present at all.
-                        type_col = None
-                        for c in range(1, max_col + 1):
-                            if str(ws.cell(1, c).value or "").strip() == "Type":
-                                type_col = c
-                                break
-                        if type_col is not None and str(ws.cell(row, type_col).value or "").strip() == "NO_PDF":
-                            cell.font = Font(color="008000")
-                        else:
-                            cell.font = Font(color="FF0000")
-
-                    if ws.title == "Credit card Reconciliation":
-                        header_text = str(ws.cell(1, col).value or "").strip()
-                        if row >= 2 and header_text == "Reconciled?":
-                            val = str(cell.value or "").strip().lower()
-                            if val == "yes":
-                                cell.font = Font(color="008000")
-                            elif val == "no":
-                                cell.font = Font(color="FF0000")
-                        if row >= 2 and header_text == "Recon Diff":
-                            try:
-                                if float(cell.value) != 0:
-                                    cell.font = Font(color="FF0000")
-                            except Exception:
-                                pass
-            # Auto-fit column widths
-            for col in range(1, max_col + 1):
-                col_letter = get_column_letter(col)
-                max_len = 0
-                for row in range(1, max_row + 1):
-                    val = ws.cell(row=row, column=col).value
-                    if val is None:
-                        continue
-                    max_len = max(max_len, len(str(val)))
-                ws.column_dimensions[col_letter].width = min(max_len + 2, 60)
+    summary_per_card_tbl = sort_dataframe(
+        summary_per_card_tbl,
+        ["Period", "Account", "Card Variant", "Expense Type"],
+    )
+    summary_per_card_exp_type_tbl = sort_dataframe(
+        summary_per_card_exp_type_tbl,
+        ["Period", "Account", "Expense Type"],
+    )
+    summary_per_card_exp_type_tbl = summary_per_card_exp_type_tbl.drop(columns=["TransactionCount"], errors="ignore")
+    summary_per_card_expense_pivot_tbl = sort_dataframe(
+        summary_per_card_expense_pivot_tbl[summary_per_card_expense_pivot_tbl["SumOfTotalAmount"] != 0],
+        ["Expense Type"],
+    )
+    card_variant_summary_tbl = sort_dataframe(card_variant_summary_tbl, ["Account", "Card Variant"])
+    detailed_title_row = 1
+    detailed_header_startrow = detailed_title_row
+    detailed_startcol = 0
+    detailed_data_end_row = detailed_title_row + 1 + max(len(summary_per_card_tbl), 1)
+    cc_expense_title_row = detailed_data_end_row + 3
+    cc_expense_header_startrow = cc_expense_title_row
+    cc_expense_startcol = 0
+    card_to_expense_title_row = 1
+    card_to_expense_header_startrow = card_to_expense_title_row
+    card_to_expense_startcol = 10
+    card_variant_title_row = card_to_expense_title_row + 1 + max(len(summary_per_card_expense_pivot_tbl), 1) + 3
+    card_variant_header_startrow = card_variant_title_row
+    card_variant_startcol = 10
+
+    per_card_tables = [
+        (summary_per_card_tbl, detailed_header_startrow, detailed_startcol),
+        (summary_per_card_exp_type_tbl, cc_expense_header_startrow, cc_expense_startcol),
+        (summary_per_card_expense_pivot_tbl, card_to_expense_header_startrow, card_to_expense_startcol),
+        (card_variant_summary_tbl, card_variant_header_startrow, card_variant_startcol),
+    ]
+    per_card_titles = [
+        ("Detailed summary", detailed_title_row, 1, 7),
+        (
+            "CC to expense summary",
+            cc_expense_title_row,
+            cc_expense_startcol + 1,
+            cc_expense_startcol + len(summary_per_card_exp_type_tbl.columns),
+        ),
+        (
+            "Expense Type summary",
+            card_to_expense_title_row,
+            card_to_expense_startcol + 1,
+            card_to_expense_startcol + len(summary_per_card_expense_pivot_tbl.columns),
+        ),
+        (
+            "Card to expense summary",
+            card_variant_title_row,
+            card_variant_startcol + 1,
+            card_variant_startcol + len(card_variant_summary_tbl.columns),
+        ),
+    ]
+    # Each table's header row, and its border box from title row to last data row.
+    per_card_header_ranges = [
+        (startrow + 1, startcol + 1, startcol + len(df.columns)) for df, startrow, startcol in per_card_tables
+    ]
+    per_card_border_ranges = [
+        (detailed_title_row, 1, detailed_data_end_row, 7),
+        (
+            cc_expense_title_row,
+            cc_expense_startcol + 1,
+            cc_expense_title_row + 1 + max(len(summary_per_card_exp_type_tbl), 1),
+            cc_expense_startcol + len(summary_per_card_exp_type_tbl.columns),
+        ),
+        (
+            card_to_expense_title_row,
+            card_to_expense_startcol + 1,
+            card_to_expense_title_row + 1 + max(len(summary_per_card_expense_pivot_tbl), 1),
+            card_to_expense_startcol + len(summary_per_card_expense_pivot_tbl.columns),
+        ),
+        (
+            card_variant_title_row,
+            card_variant_startcol + 1,
+            card_variant_title_row + 1 + max(len(card_variant_summary_tbl), 1),
+            card_variant_startcol + len(card_variant_summary_tbl.columns),
+        ),
+    ]
+    with counters.time("write"):
+        write_tracker_workbook(
+            OUTPUT_FILE,
+            [
+                {"name": "Credit card expenses", "tables": [(df_expenses, 0, 0)]},
+                {"name": TRACKER_SHEET_RECON, "tables": [(df_payments, 0, 0)], "autofilter": None},
+                {"name": "Credit card summary", "tables": [(summary_tbl, 0, 0)]},
+                {
+                    "name": "Credit card summary Per card",
+                    "tables": per_card_tables,
+                    "titles": per_card_titles,
+                    "header_ranges": per_card_header_ranges,
+                    "border_ranges": per_card_border_ranges,
+                    "autofilter": (detailed_title_row + 1, 1, detailed_data_end_row, 7),
+                },
+            ],
+            excel_engine,
+        )
 
     print("\n" + "="*70)
     print("✅ AGGREGATION COMPLETE")
@@ -2100,8 +2667,48 @@ def aggregate():
     print(f"Total Transactions:     {len(all_records)}")
     print(f"Output File:            {OUTPUT_FILE}")
     print(f"Category Mapping File:  {MAPPING_FILE}")
+    print(f"Stage throughput:       {counters.report()}")
     print("="*70 + "\n")
 
 
 if __name__ == "__main__":
-    aggregate()
+    arg_parser = argparse.ArgumentParser(description="Aggregate credit card statements into the monthly tracker.")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parse statements in N worker processes (default: 1, serial).",
+    )
+    arg_parser.add_argument(
+        "--excel-engine",
+        choices=EXCEL_ENGINES,
+        default="xlsxwriter",
+        help="Workbook writer: streaming xlsxwriter (default) or the cell-by-cell openpyxl styler.",
+    )
+    arg_parser.add_argument(
+        "--no-ledger",
+        action="store_true",
+        help="Parse every statement again without reading or updating the SQLite ledger.",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        nargs="?",
+        const=STATEMENT_TIMEOUT_SECONDS,
+        help=f"Abandon a statement still parsing after this many seconds (off by default; {STATEMENT_TIMEOUT_SECONDS} if given without a value).",
+    )
+    arg_parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        nargs="?",
+        const=STATEMENT_MAX_RSS_MB,
+        help=f"Abandon a statement whose parser grows by more than this many MB (off by default; {STATEMENT_MAX_RSS_MB} if given without a value).",
+    )
+    args = arg_parser.parse_args()
+    aggregate(
+        workers=args.workers,
+        excel_engine=args.excel_engine,
+        ledger_file=None if args.no_ledger else LEDGER_FILE,
+        timeout=args.timeout,
+        max_rss_mb=args.max_rss_mb,
+    )
@@ -1,9 +1,12 @@
-import pdfplumber
-import pytesseract
-from pdf2image import convert_from_path
+import os
 import re
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ocr_service import ocr_pages
+from statement_document import as_statement_document, document_path
+
 
 def clean_description(text):
     """Clean junk from description"""
@@ -58,19 +61,19 @@ def extract_period(text):
 
 # ---------------- TEXT BASED PARSER ------------------
 
-def text_based_parser(pdf_path):
+def text_based_parser(pdf_path, pages=None):
     """
-    Parse text-based Axis Rewards PDF
+    Parse text-based Axis Rewards PDF (only the given 0-based `pages` when set)
     """
     transactions = []
     period = ""
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with as_statement_document(pdf_path) as doc:
             full_text = ""
-            
-            for page in pdf.pages:
-                text = page.extract_text()
+            page_indexes = range(doc.page_count) if pages is None else pages
+
+            for text in (doc.page_text(i) for i in page_indexes):
                 if text:
                     full_text += text + "\n"
 
@@ -112,27 +115,28 @@ def text_based_parser(pdf_path):
 
 # ---------------- TABLE BASED PARSER ------------------
 
-def table_based_parser(pdf_path):
+def table_based_parser(pdf_path, pages=None):
     """
-    Parse table-based Axis Rewards PDF
+    Parse table-based Axis Rewards PDF (only the given 0-based `pages` when set)
     """
     transactions = []
     period = ""
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with as_statement_document(pdf_path) as doc:
+            page_indexes = range(doc.page_count) if pages is None else pages
+
             # First, extract text for period
             full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
+            for text in (doc.page_text(i) for i in page_indexes):
                 if text:
                     full_text += text + "\n"
             
             period = extract_period(full_text)
 
             # Now extract tables
-            for page in pdf.pages:
-                tables = page.extract_tables()
+            for page_index in page_indexes:
+                tables = doc.page_tables(page_index)
 
                 if not tables:
                     continue
@@ -186,9 +190,9 @@ def table_based_parser(pdf_path):
 
 # ---------------- OCR BASED PARSER ------------------
 
-def ocr_based_parser(pdf_path):
+def ocr_based_parser(pdf_path, pages=None):
     """
-    Parse image-based (scanned) Axis Rewards PDF using OCR
+    Parse image-based (scanned) Axis Rewards PDF using OCR (only the given 0-based `pages` when set)
     Requires: pip install pytesseract pdf2image
     Mac: brew install tesseract
     """
@@ -196,13 +200,10 @@ def ocr_based_parser(pdf_path):
     period = ""
 
     try:
-        # Convert PDF pages to images
-        images = convert_from_path(pdf_path)
+        # Rasterise + OCR pages (parallel, cached by page-image hash)
         full_text = ""
 
-        for img in images:
-            # Extract text using OCR
-            text = pytesseract.image_to_string(img, lang='eng')
+        for text in ocr_pages(document_path(pdf_path), pages=pages):
             full_text += text + "\n"
 
         # Extract period from OCR'd text
@@ -243,33 +244,55 @@ def ocr_based_parser(pdf_path):
 
 def parse_axis_rewards_smart(pdf_path):
     """
-    Smart parser that tries multiple strategies in order:
-    1. Text-based extraction (fastest, most reliable)
-    2. Table-based extraction (for structured PDFs)
-    3. OCR-based extraction (for scanned/image PDFs)
-    
-    Returns first successful result or empty list if all fail.
+    Smart parser that routes each page by a cheap char/image count:
+    1. Text-layer pages: text-based extraction (fastest, most reliable),
+       then table-based extraction (for structured PDFs)
+    2. Image-only pages: OCR-based extraction (for scanned pages)
+
+    Scanned statements go straight to OCR; mixed PDFs combine both. A text layer
+    neither parser can read (garbled, CID-encoded) sends every page to OCR instead.
+    Returns the transactions found or empty list if all fail.
     """
-    
-    print(f"   📄 Trying TEXT parser...")
-    tx = text_based_parser(pdf_path)
-
-    if tx:
-        print(f"   ✅ Text parser succeeded ({len(tx)} transactions)")
-        return tx
-
-    print(f"   ⚠️ Text parser failed → trying TABLE parser...")
-    tx = table_based_parser(pdf_path)
-
-    if tx:
-        print(f"   ✅ Table parser succeeded ({len(tx)} transactions)")
-        return tx
-
-    print(f"   ⚠️ Table parser failed → trying OCR parser...")
-    tx = ocr_based_parser(pdf_path)
+    with as_statement_document(pdf_path) as doc:
+        kinds = [doc.page_kind(i) for i in range(doc.page_count)]
+        text_pages = [i for i, kind in enumerate(kinds) if kind == "text"]
+        image_pages = [i for i, kind in enumerate(kinds) if kind == "image"]
+
+        tx = []
+        if text_pages:
+            print(f"   📄 Trying TEXT parser...")
+            tx = text_based_parser(doc, pages=text_pages)
+
+            if tx:
+                print(f"   ✅ Text parser succeeded ({len(tx)} transactions)")
+            else:
+                print(f"   ⚠️ Text parser failed → trying TABLE parser...")
+                tx = table_based_parser(doc, pages=text_pages)
+
+                if tx:
+                    print(f"   ✅ Table parser succeeded ({len(tx)} transactions)")
+
+        ocr_pages_to_run = image_pages
+        if text_pages and not tx:
+            # Garbled or CID-encoded text layer: OCR the whole document as the last resort.
+            ocr_pages_to_run = sorted(text_pages + image_pages)
+            print(f"   ⚠️ Table parser failed → trying OCR parser on all pages...")
+        elif image_pages:
+            print(f"   ⚠️ {len(image_pages)} image-only page(s) → trying OCR parser...")
+
+        if ocr_pages_to_run:
+            ocr_tx = ocr_based_parser(doc, pages=ocr_pages_to_run)
+
+            if ocr_tx:
+                print(f"   ✅ OCR parser succeeded ({len(ocr_tx)} transactions)")
+                # Mixed PDF: the statement date usually sits on the text-layer page.
+                period = next((t["Period"] for t in tx if t["Period"]), "")
+                for t in ocr_tx:
+                    if not t["Period"]:
+                        t["Period"] = period
+                tx = tx + ocr_tx
 
     if tx:
-        print(f"   ✅ OCR parser succeeded ({len(tx)} transactions)")
         return tx
 
     print(f"   ❌ All parsers failed - No transactions detected")
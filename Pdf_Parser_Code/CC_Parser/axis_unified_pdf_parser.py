@@ -1,7 +1,11 @@
-import pdfplumber
+import os
 import re
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from statement_document import as_statement_document, document_path
+
 def clean_description(text):
     text = text.replace("|", " ")
     text = text.replace("_", " ")
@@ -57,10 +61,9 @@ def parse_axis_pdf(pdf_path):
     transactions = []
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with as_statement_document(pdf_path) as doc:
             full_text = ""
-            for page in pdf.pages:
-                text = page.extract_text()
+            for text in doc.page_texts():
                 if text:
                     full_text += text + "\n"
 
@@ -72,7 +75,7 @@ def parse_axis_pdf(pdf_path):
             period = extract_period(full_text)
 
             # Detect card type from path or PDF content
-            path_lower = pdf_path.lower()
+            path_lower = document_path(pdf_path).lower()
             if "select" in path_lower or "SELECT" in full_text:
                 account = "Axis Bank Select CC"
             elif "indian oil" in path_lower:
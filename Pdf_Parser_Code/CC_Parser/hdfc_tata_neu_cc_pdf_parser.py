@@ -1,7 +1,10 @@
+import os
 import re
+import sys
 from datetime import datetime
 
-import pdfplumber
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from statement_document import as_statement_document
 
 
 def _parse_amount(s: str):
@@ -40,12 +43,11 @@ def parse_hdfc_tata_neu_cc_pdf(pdf_path: str):
       04/04/2026| 19:48 UPI-ixigo C 1,557.00 l
     """
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
-        first_text = (pdf.pages[0].extract_text() or "") if pdf.pages else ""
+    with as_statement_document(pdf_path) as doc:
+        first_text = doc.page_text(0) if doc.page_count else ""
         period = _period_from_statement_date(first_text) or "Unknown"
 
-        for page in pdf.pages:
-            text = page.extract_text() or ""
+        for text in doc.page_texts():
             lines = [ln.strip() for ln in text.split("\n") if ln.strip()]
             for ln in lines:
                 # Transaction line begins with date + pipe.
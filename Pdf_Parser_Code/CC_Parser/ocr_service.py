@@ -0,0 +1,140 @@
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction_cache import CACHE_DIR, file_sha256
+
+# pdf2image's default; raise for small-font scans at the cost of slower OCR.
+OCR_DPI = 200
+OCR_LANG = "eng"
+OCR_CACHE_DIR = os.path.join(CACHE_DIR, "ocr")
+
+# (pdf sha256, dpi, lang) -> {"page_count": n, "pages": {page index: image hash}}
+_DOCUMENT_INDEX = {}
+# image hash -> OCR text, so the parser and the statement-due fallback share one
+# OCR pass per run.
+_PAGE_TEXTS = {}
+
+
+def _image_hash(img, lang):
+    h = hashlib.sha256()
+    h.update(f"{img.mode}|{img.size}|{lang}|".encode("utf-8"))
+    h.update(img.tobytes())
+    return h.hexdigest()
+
+
+def _read_text(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+    except Exception:
+        return None
+
+
+def _write_text(path, text):
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception:
+        pass
+
+
+def _load_index(index_file):
+    index = {"page_count": None, "pages": {}}
+    if not index_file:
+        return index
+    raw = _read_text(index_file)
+    if raw is None:
+        return index
+    try:
+        data = json.loads(raw)
+        index["page_count"] = data.get("page_count")
+        index["pages"] = {int(k): v for k, v in (data.get("pages") or {}).items()}
+    except Exception:
+        pass
+    return index
+
+
+def _cached_text(image_hash, cache_dir):
+    if image_hash in _PAGE_TEXTS:
+        return _PAGE_TEXTS[image_hash]
+    if not cache_dir:
+        return None
+    text = _read_text(os.path.join(cache_dir, f"{image_hash}.txt"))
+    if text is not None:
+        _PAGE_TEXTS[image_hash] = text
+    return text
+
+
+def ocr_pages(pdf_path, pages=None, dpi=OCR_DPI, lang=OCR_LANG, workers=None, cache_dir=OCR_CACHE_DIR):
+    """
+    OCR text for the given 0-based `pages` of `pdf_path` (all pages when None),
+    as a list in the same order.
+
+    Pages are rasterised at `dpi` and OCR'd in parallel (tesseract runs as a
+    subprocess, so threads use all cores). Text is cached by page-image hash,
+    plus a per-PDF index of page hashes so a re-run skips rasterising too.
+    Raises ImportError when pytesseract/pdf2image are not installed.
+    """
+    from pdf2image import convert_from_path
+    import pytesseract
+
+    pdf_sha = file_sha256(pdf_path)
+    doc_key = (pdf_sha, dpi, lang)
+    index_file = os.path.join(cache_dir, f"{pdf_sha}-{dpi}-{lang}.json") if cache_dir else None
+    if doc_key not in _DOCUMENT_INDEX:
+        _DOCUMENT_INDEX[doc_key] = _load_index(index_file)
+    index = _DOCUMENT_INDEX[doc_key]
+
+    page_list = list(pages) if pages is not None else None
+    if page_list is None and index["page_count"] is not None:
+        page_list = list(range(index["page_count"]))
+
+    texts = {}
+    if page_list is not None:
+        for i in page_list:
+            image_hash = index["pages"].get(i)
+            text = _cached_text(image_hash, cache_dir) if image_hash else None
+            if text is not None:
+                texts[i] = text
+        missing = [i for i in page_list if i not in texts]
+        if not missing:
+            return [texts[i] for i in page_list]
+        images = {
+            i: convert_from_path(pdf_path, dpi=dpi, first_page=i + 1, last_page=i + 1)[0]
+            for i in missing
+        }
+    else:
+        all_images = convert_from_path(pdf_path, dpi=dpi)
+        index["page_count"] = len(all_images)
+        page_list = list(range(len(all_images)))
+        images = dict(enumerate(all_images))
+
+    for i, img in images.items():
+        index["pages"][i] = _image_hash(img, lang)
+
+    def ocr_page(i):
+        image_hash = index["pages"][i]
+        text = _cached_text(image_hash, cache_dir)
+        if text is None:
+            text = pytesseract.image_to_string(images[i], lang=lang)
+            _PAGE_TEXTS[image_hash] = text
+            if cache_dir:
+                _write_text(os.path.join(cache_dir, f"{image_hash}.txt"), text)
+        return i, text
+
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        texts.update(pool.map(ocr_page, list(images)))
+
+    if index_file:
+        _write_text(
+            index_file,
+            json.dumps({"page_count": index["page_count"], "pages": {str(k): v for k, v in index["pages"].items()}}),
+        )
+    return [texts[i] for i in page_list]
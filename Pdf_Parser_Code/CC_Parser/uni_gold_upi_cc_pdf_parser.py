@@ -1,7 +1,11 @@
-import pdfplumber
+import os
 import re
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from statement_document import as_statement_document
+
 def clean_description(text):
     text = text.replace("|", " ")
     text = text.replace("_", " ")
@@ -25,10 +29,9 @@ def parse_uni_gold_upi_cc_pdf(pdf_path):
     """
     transactions = []
 
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as doc:
         full_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
+        for text in doc.page_texts():
             if text:
                 full_text += text + "\n"
 
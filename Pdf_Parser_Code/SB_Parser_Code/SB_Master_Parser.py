@@ -1,11 +1,25 @@
+import argparse
+import io
 import os
 import re
+import sys
+import time
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta
 from pathlib import Path
 
-import pdfplumber
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_matcher import KeywordAutomaton
+from ledger import LEDGER_FILE, Ledger
+from mapping_snapshot import compiled_table, read_sheet, sheet_names, sheets_fingerprint
+from sandbox import STATEMENT_MAX_RSS_MB, STATEMENT_TIMEOUT_SECONDS, failure_text
+from stage_pipeline import BoundedStage, StageCounters
+from statement_document import StatementDocument, as_statement_document, document_path
+from statement_files import list_statement_pdfs
+
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
 )
@@ -14,6 +28,9 @@ BASE_DIR = os.path.join(PROJECT_DIR, "Bank_Statements", "SB_Statements")
 OUTPUT_FILE = os.path.join(PROJECT_DIR, "Output", "SB_Monthly_Master_Tracker.xlsx")
 MAPPING_FILE = os.path.join(PROJECT_DIR, "Reference Documents", "SB Mapping.xlsx")
 
+LEDGER_SOURCE = "SB"
+PARSER_VERSION = 1
+
 
 def parse_amount(value):
     if value is None:
@@ -149,31 +166,12 @@ def clean_text(value):
     return re.sub(r"\s+", " ", str(value).strip())
 
 
-_KNOWN_WRAP_WORDS_CACHE = None
-
-
 def load_known_wrap_words():
     """
     Build a set of known words from the "Bank Name map" worksheet to repair
     PDF extraction artifacts like "Abhi shek" -> "Abhishek".
     """
-    global _KNOWN_WRAP_WORDS_CACHE
-    if _KNOWN_WRAP_WORDS_CACHE is not None:
-        return _KNOWN_WRAP_WORDS_CACHE
-    words = set()
-    try:
-        df = pd.read_excel(MAPPING_FILE, sheet_name=BANK_NAME_MAP_SHEET)
-        cols = list(df.columns)
-        if len(cols) >= 3:
-            df = df.rename(columns={cols[0]: "Bank PDF", cols[1]: "Text", cols[2]: "Output"})
-        for val in df.get("Text", []):
-            s = clean_text(val)
-            for w in re.findall(r"[A-Za-z]{4,}", s):
-                words.add(w.upper())
-    except Exception:
-        words = set()
-    _KNOWN_WRAP_WORDS_CACHE = words
-    return words
+    return load_bank_name_map(MAPPING_FILE).known_words
 
 
 def fix_spaced_known_words(text, known_words):
@@ -202,15 +200,19 @@ def fix_spaced_known_words(text, known_words):
 
 
 def load_sb_mapping_rules():
-    xl = pd.ExcelFile(MAPPING_FILE)
+    return compiled_table(MAPPING_FILE, "SB Mapping", _build_sb_mapping_rules)
+
+
+def _build_sb_mapping_rules():
     sheet_name = None
+    names = sheet_names(MAPPING_FILE)
     for candidate in ("SB Mapping", "SB Merchant category mapping"):
-        if candidate in xl.sheet_names:
+        if candidate in names:
             sheet_name = candidate
             break
     if not sheet_name:
         raise ValueError("SB mapping sheet not found. Expected 'SB Mapping' or 'SB Merchant category mapping'.")
-    df = pd.read_excel(MAPPING_FILE, sheet_name=sheet_name)
+    df = read_sheet(MAPPING_FILE, sheet_name)
     rules_by_bank = {}
     fallback_by_bank = {}
     default_fallback = None
@@ -230,13 +232,15 @@ def load_sb_mapping_rules():
             mc_derived_pos,
         )
         if keyword:
-            rules_by_bank.setdefault(bank, []).append((keyword.lower(),) + mapped)
+            rules_by_bank.setdefault(bank, SBRuleSet()).append((keyword.lower(),) + mapped)
         else:
             fallback_by_bank[bank] = mapped
         if bank == "default" and default_fallback is None:
             default_fallback = mapped
     if default_fallback is None:
         default_fallback = ("Uncategorized", "Uncategorized", "Uncategorized", "Unknown", "")
+    for rule_set in rules_by_bank.values():
+        rule_set.compile()
     return rules_by_bank, fallback_by_bank, default_fallback
 
 
@@ -272,6 +276,52 @@ def unordered_token_match(keyword, description):
     return True
 
 
+def match_tokens(value):
+    return [t for t in re.split(r"[^a-z0-9]+", clean_text(value).lower()) if t]
+
+
+class SBRuleSet(list):
+    """
+    One bank's SB Mapping rules (keyword, mode, exp, mc, store, mc_derived_pos),
+    compiled once for classify_sb_description().
+
+    A rule matches when its keyword is a substring of the description, after
+    stripping non-alphanumerics, or when every keyword token prefixes some
+    description token. Plain substring and ordered-token matches are special
+    cases of these two. The first case uses one automaton over the normalised
+    keywords. The second uses a first-token -> rule index probed with
+    description token prefixes.
+    """
+
+    def compile(self):
+        self.keyword_norms = [normalize_match_text(rule[0]) for rule in self]
+        self.keyword_tokens = [tuple(match_tokens(rule[0])) for rule in self]
+        # Keywords that normalise to "" never match, so they stay out of the automaton.
+        self.norm_indexes = [index for index, key_norm in enumerate(self.keyword_norms) if key_norm]
+        self.norm_automaton = KeywordAutomaton([self.keyword_norms[index] for index in self.norm_indexes])
+        self.rules_by_first_token = {}
+        for index, tokens in enumerate(self.keyword_tokens):
+            if self.keyword_norms[index] and tokens:
+                self.rules_by_first_token.setdefault(tokens[0], []).append(index)
+        return self
+
+    def first_match(self, desc):
+        """Index of the first rule (top-to-bottom) matching the cleaned, lowercased `desc`, or None."""
+        hit = self.norm_automaton.first_match(normalize_match_text(desc))
+        best = None if hit is None else self.norm_indexes[hit]
+        desc_tokens = match_tokens(desc)
+        for dt in set(desc_tokens):
+            for n in range(1, len(dt) + 1):
+                for index in self.rules_by_first_token.get(dt[:n], ()):
+                    # Posting lists are in sheet order, so nothing later can beat `best`.
+                    if best is not None and index >= best:
+                        break
+                    if all(any(d.startswith(kt) for d in desc_tokens) for kt in self.keyword_tokens[index][1:]):
+                        best = index
+                        break
+        return best
+
+
 def derive_expense_type(expense_type, amount):
     if clean_text(expense_type).lower() != "derived":
         return expense_type
@@ -319,19 +369,23 @@ def derive_merchant_category(merchant_category, mc_derived_positive, amount):
 
 def classify_sb_description(description, amount, rules, fallback):
     desc = clean_text(description).lower()
-    desc_norm = normalize_match_text(desc)
-    matches = []
-    for keyword, mode, exp_type, merch_cat, store_name, mc_derived_pos in rules:
-        key_norm = normalize_match_text(keyword)
-        if not key_norm:
-            continue
-        if (
-            keyword in desc
-            or key_norm in desc_norm
-            or ordered_token_match(keyword, desc)
-            or unordered_token_match(keyword, desc)
-        ):
-            matches.append((keyword, mode, exp_type, merch_cat, store_name, mc_derived_pos))
+    if isinstance(rules, SBRuleSet):
+        index = rules.first_match(desc)
+        matches = [rules[index]] if index is not None else []
+    else:
+        desc_norm = normalize_match_text(desc)
+        matches = []
+        for keyword, mode, exp_type, merch_cat, store_name, mc_derived_pos in rules:
+            key_norm = normalize_match_text(keyword)
+            if not key_norm:
+                continue
+            if (
+                keyword in desc
+                or key_norm in desc_norm
+                or ordered_token_match(keyword, desc)
+                or unordered_token_match(keyword, desc)
+            ):
+                matches.append((keyword, mode, exp_type, merch_cat, store_name, mc_derived_pos))
     if matches:
         # First match wins (top-to-bottom in SB Mapping sheet).
         chosen = matches[0]
@@ -371,6 +425,26 @@ def classify_sb_row(description, amount, account, rules_by_bank, fallback_by_ban
     return classify_sb_description(description, amount, [], fallback)
 
 
+def classify_statement_records(records, known_words, rules_by_bank, fallback_by_bank, default_fallback):
+    """
+    Repair spaced-out known words in each record's Description and store its
+    classify_sb_row() result under "_classification", one statement at a time.
+    """
+    for rec in records:
+        if known_words and "Description" in rec:
+            rec["Description"] = fix_spaced_known_words(str(rec["Description"]), known_words)
+        amount = rec.get("Amount")
+        rec["_classification"] = classify_sb_row(
+            rec.get("Description"),
+            # A missing amount is NaN once the records become a DataFrame.
+            float("nan") if amount is None else amount,
+            rec.get("Account"),
+            rules_by_bank,
+            fallback_by_bank,
+            default_fallback,
+        )
+
+
 def extract_yes_period(text):
     text = text or ""
     # Preferred: explicit "as on dd/mm/yyyy"
@@ -416,16 +490,51 @@ BANK_NAME_MAP_SHEET = "Bank Name map"
 TRANS_DATE_SHEET = "Trans Date"
 
 
-def _load_bank_name_map_rows(mapping_file):
+class BankNameMap(list):
+    """
+    "Bank Name map" rows {"bank_pdf", "text", "output"}, loaded once per workbook.
+
+    Each row's Text is pre-compacted (whitespace removed, uppercased) and all of
+    them go into one automaton, so account_name() is a single pass over the
+    compacted statement text instead of a substring test per row.
+    known_words holds the 4+ letter words of every Text cell for the wrap-word fixer.
+    """
+
+    def __init__(self, rows=(), known_words=()):
+        super().__init__(rows)
+        self.known_words = set(known_words)
+        self.bank_pdfs = [clean_text(row["bank_pdf"]).lower() for row in self]
+        self.automaton = KeywordAutomaton([re.sub(r"\s+", "", row["text"]).upper() for row in self])
+
+    def account_name(self, text, bank=None):
+        """Output of the first row whose Text occurs in `text` (whitespace-insensitive)."""
+        pdf_comp = re.sub(r"\s+", "", text or "").upper()
+        bank_lower = bank.lower() if bank else None
+        for i in sorted(self.automaton.all_matches(pdf_comp)):
+            if bank_lower is not None and self.bank_pdfs[i] not in bank_lower:
+                continue
+            return self[i]["output"]
+        return None
+
+
+def load_bank_name_map(mapping_file):
     if not os.path.exists(mapping_file):
-        return []
+        return BankNameMap()
     try:
-        df = pd.read_excel(mapping_file, sheet_name=BANK_NAME_MAP_SHEET)
+        return compiled_table(mapping_file, BANK_NAME_MAP_SHEET, lambda: _build_bank_name_map(mapping_file))
     except Exception:
-        return []
+        return BankNameMap()
+
+
+def _build_bank_name_map(mapping_file):
+    df = read_sheet(mapping_file, BANK_NAME_MAP_SHEET)
     cols = list(df.columns)
     if len(cols) >= 3:
         df = df.rename(columns={cols[0]: "Bank PDF", cols[1]: "Text", cols[2]: "Output"})
+    words = set()
+    for val in df.get("Text", []):
+        for w in re.findall(r"[A-Za-z]{4,}", clean_text(val)):
+            words.add(w.upper())
     rows = []
     for _, r in df.iterrows():
         bank_pdf = clean_text(r.get("Bank PDF", ""))
@@ -434,7 +543,7 @@ def _load_bank_name_map_rows(mapping_file):
         if not bank_pdf or not text or not output:
             continue
         rows.append({"bank_pdf": bank_pdf, "text": text, "output": output})
-    return rows
+    return BankNameMap(rows, words)
 
 
 def load_trans_date_field_map(mapping_file):
@@ -451,7 +560,7 @@ def load_trans_date_field_map(mapping_file):
     if not os.path.exists(mapping_file):
         return mapping
     try:
-        df = pd.read_excel(mapping_file, sheet_name=TRANS_DATE_SHEET)
+        df = read_sheet(mapping_file, TRANS_DATE_SHEET)
     except Exception:
         return mapping
     for _, row in df.iterrows():
@@ -511,7 +620,7 @@ def extract_opening_balance_from_pdf(pdf_path, bank_key, cfg):
         return None
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with as_statement_document(pdf_path) as pdf:
             # Some banks (e.g. SBI) have the transaction overview on later pages.
             max_pages = 6 if bank_key == "sbi" else 3
             pages = pdf.pages[:max_pages]
@@ -709,7 +818,7 @@ def detect_bank_from_text(text):
 
 
 def detect_pdf_context(pdf_path):
-    path_lower = (pdf_path or "").lower()
+    path_lower = (document_path(pdf_path) or "").lower()
     # File-name hints are more reliable than scanning narration text (which may contain other bank names).
     bank_from_path = None
     if "axis" in path_lower:
@@ -730,7 +839,7 @@ def detect_pdf_context(pdf_path):
         bank_from_path = "IndusInd"
 
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with as_statement_document(pdf_path) as pdf:
             text = ""
             for page in pdf.pages[:2]:
                 text += "\n" + (page.extract_text() or "")
@@ -746,15 +855,7 @@ def detect_pdf_context(pdf_path):
         customer_name = "ABHISHEK JAIN"
     mapped_account_name = None
     try:
-        mapping_rows = _load_bank_name_map_rows(MAPPING_FILE)
-        pdf_comp = re.sub(r"\s+", "", text or "").upper()
-        for row in mapping_rows:
-            if bank and clean_text(row["bank_pdf"]).lower() not in bank.lower():
-                continue
-            needle = re.sub(r"\s+", "", row["text"]).upper()
-            if needle and needle in pdf_comp:
-                mapped_account_name = row["output"]
-                break
+        mapped_account_name = load_bank_name_map(MAPPING_FILE).account_name(text, bank)
     except Exception:
         mapped_account_name = None
     return {"bank": bank, "customer_name": customer_name, "mapped_account_name": mapped_account_name}
@@ -796,6 +897,15 @@ def get_parser_by_bank(bank):
     return None
 
 
+def _text_lengths(values, missing):
+    """len(str(v)) per value as an int array, 0 where `missing`."""
+    lengths = np.zeros(len(values), dtype=np.int64)
+    present = ~missing
+    if present.any():
+        lengths[present] = pd.Series(values[present], dtype=object).astype(str).str.len().to_numpy()
+    return lengths
+
+
 def format_sheet(workbook, worksheet, df, start_row=0, start_col=0):
     nrows, ncols = df.shape
     if ncols == 0:
@@ -807,43 +917,52 @@ def format_sheet(workbook, worksheet, df, start_row=0, start_col=0):
     amt_fmt = workbook.add_format({"border": 1, "num_format": "#,##0.00"})
 
     # Header styling
-    for c, col in enumerate(df.columns):
-        worksheet.write(start_row, start_col + c, col, header_fmt)
+    worksheet.write_row(start_row, start_col, list(df.columns), header_fmt)
 
-    # Borders + numeric formats for all data cells
+    # Borders + numeric formats for all data cells, one column at a time.
     numeric_cols = {"Amount", "Balance"}
     desc_cols = {"Description"}
-    for r in range(1, nrows + 1):
-        for c, col in enumerate(df.columns):
-            val = df.iloc[r - 1, c]
-            if pd.isna(val):
-                fmt = wrap_cell_fmt if col in desc_cols else cell_fmt
-                worksheet.write_blank(start_row + r, start_col + c, None, fmt)
-            elif col in numeric_cols:
+    longest = np.zeros(nrows, dtype=np.int64)
+    for c, col in enumerate(df.columns):
+        series = df.iloc[:, c]
+        values = series.to_numpy(dtype=object)
+        missing = series.isna().to_numpy()
+        fmt = wrap_cell_fmt if col in desc_cols else cell_fmt
+        if col in numeric_cols and series.dtype.kind in "iuf":
+            # Every value converts with float(); blanks keep the plain cell format.
+            cells = [None if m else float(v) for v, m in zip(values, missing)]
+            worksheet.write_column(start_row + 1, start_col + c, cells, amt_fmt)
+            for r in np.flatnonzero(missing):
+                worksheet.write_blank(start_row + 1 + int(r), start_col + c, None, fmt)
+        elif col in numeric_cols:
+            for r, (val, m) in enumerate(zip(values, missing)):
+                if m:
+                    worksheet.write_blank(start_row + 1 + r, start_col + c, None, fmt)
+                    continue
                 try:
-                    worksheet.write_number(start_row + r, start_col + c, float(val), amt_fmt)
+                    worksheet.write_number(start_row + 1 + r, start_col + c, float(val), amt_fmt)
                 except Exception:
-                    fmt = wrap_cell_fmt if col in desc_cols else cell_fmt
-                    worksheet.write(start_row + r, start_col + c, val, fmt)
-            else:
-                fmt = wrap_cell_fmt if col in desc_cols else cell_fmt
-                worksheet.write(start_row + r, start_col + c, val, fmt)
-
-    # Auto width
-    for c, col in enumerate(df.columns):
+                    worksheet.write(start_row + 1 + r, start_col + c, val, fmt)
+        else:
+            # write() turns None into a formatted blank cell.
+            cells = series.tolist()
+            for r in np.flatnonzero(missing):
+                cells[r] = None
+            worksheet.write_column(start_row + 1, start_col + c, cells, fmt)
+
+        # Auto width
+        lengths = _text_lengths(values, missing)
         max_len = len(str(col))
         if nrows:
-            col_max = df[col].map(lambda x: len(str(x)) if pd.notna(x) else 0).max()
-            max_len = max(max_len, int(col_max))
+            max_len = max(max_len, int(lengths.max()))
         worksheet.set_column(start_col + c, start_col + c, min(max_len + 2, 60))
+        np.maximum(longest, lengths, out=longest)
 
     # Approx auto row height
     worksheet.set_row(start_row, 20)
-    for r in range(1, nrows + 1):
-        row_vals = ["" if pd.isna(v) else str(v) for v in df.iloc[r - 1].tolist()]
-        longest = max((len(v) for v in row_vals), default=0)
-        lines = max(1, (longest // 45) + 1)
-        worksheet.set_row(start_row + r, min(15 * lines, 60))
+    heights = np.minimum(15 * (longest // 45 + 1), 60)
+    for r, height in enumerate(heights.tolist(), start=1):
+        worksheet.set_row(start_row + r, height)
     if start_row == 0 and start_col == 0:
         worksheet.freeze_panes(1, 0)
         worksheet.autofilter(0, 0, nrows, ncols - 1)
@@ -852,7 +971,7 @@ def format_sheet(workbook, worksheet, df, start_row=0, start_col=0):
 def parse_axis(pdf_path, trans_date_map=None):
     records = []
     seen = set()
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "Axis")
         statement_start_date = None
@@ -1012,7 +1131,7 @@ def parse_axis(pdf_path, trans_date_map=None):
 
 def parse_hdfc(pdf_path, trans_date_map=None):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "HDFC")
         for page in pdf.pages:
@@ -1058,7 +1177,7 @@ def parse_hdfc(pdf_path, trans_date_map=None):
 
 def parse_icici(pdf_path):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "ICICI")
         for page in pdf.pages:
@@ -1142,7 +1261,7 @@ def parse_icici(pdf_path):
 
 def parse_idfc(pdf_path, trans_date_map=None):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "IDFC")
         prev_balance = None
@@ -1363,7 +1482,7 @@ def parse_idfc(pdf_path, trans_date_map=None):
 
 def parse_yes(pdf_path, trans_date_map=None):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_yes_period(first_text)
 
@@ -1555,7 +1674,7 @@ def parse_yes(pdf_path, trans_date_map=None):
 
 def parse_sbi(pdf_path):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "SBI")
         if period == "Unknown":
@@ -1623,7 +1742,7 @@ def parse_sbi(pdf_path):
 
 def parse_hsbc(pdf_path):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "HSBC")
         prev_balance = None
@@ -1717,7 +1836,7 @@ def parse_hsbc(pdf_path):
 
 def parse_indusind(pdf_path):
     records = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with as_statement_document(pdf_path) as pdf:
         first_text = pdf.pages[0].extract_text() if pdf.pages else ""
         period = extract_period(first_text, "IndusInd")
         in_history = False
@@ -1872,65 +1991,198 @@ def get_parser(file_path):
     return None
 
 
-def main():
-    import sys
+def process_pdf(pdf_path, trans_date_map):
+    """
+    Detect, parse and read the opening balance of one statement.
+    Returns (records, ctx, opening_balance); records is None when no parser matches.
+    """
+    # Context detection, parsing and opening balance share one page cache.
+    with StatementDocument(pdf_path) as doc:
+        ctx = detect_pdf_context(doc)
+        parser = get_parser_by_bank(ctx["bank"]) or get_parser(pdf_path)
+        if not parser:
+            return None, ctx, None
+        # Some parsers support Trans Date header mapping for table extraction.
+        try:
+            records = parser(doc, trans_date_map=trans_date_map)
+        except TypeError:
+            records = parser(doc)
+        opening_balance = None
+        if records:
+            fallback_account = records[0].get("Account", "")
+            account_name = ctx.get("mapped_account_name") or resolve_account_name(
+                ctx["bank"], ctx.get("customer_name"), fallback_account
+            )
+            for rec in records:
+                rec["Account"] = account_name
+            bank_key = account_to_bank_key(ctx.get("bank") or account_name)
+            cfg = trans_date_map.get((ctx.get("bank") or "").strip().lower()) or trans_date_map.get(bank_key)
+            opening_balance = extract_opening_balance_from_pdf(doc, bank_key, cfg)
+    return records, ctx, opening_balance
+
+
+def _process_pdf_job(pdf_path, trans_date_map):
+    """process_pdf() with its prints captured and errors returned, so one bad PDF never stops the run."""
+    out = io.StringIO()
+    result, error = None, None
+    with redirect_stdout(out):
+        try:
+            result = process_pdf(pdf_path, trans_date_map)
+        except Exception as e:
+            error = e
+    return result, out.getvalue(), error
+
+
+def iter_pdf_results(
+    pdf_paths, trans_date_map, workers=1, pool=None, counters=None, timeout=None, max_rss_mb=None
+):
+    """
+    (result, log, error) per PDF in `pdf_paths` order, from a process pool when workers > 1
+    (see BoundedStage: only a few PDFs per worker are queued ahead of main()).
+    A shared `pool` (run_all) is used instead of starting one, and is left running.
+    With a `timeout` (seconds) or `max_rss_mb`, each PDF is parsed in a sandboxed
+    process of its own and one over either limit is reported as failed (see sandbox.py).
+    """
+    return BoundedStage(
+        _process_pdf_job,
+        pdf_paths,
+        (trans_date_map,),
+        workers,
+        pool,
+        on_error=_failed_pdf_result,
+        counters=counters,
+        timeout=timeout,
+        max_rss_mb=max_rss_mb,
+    )
+
+
+def _failed_pdf_result(pdf_path, error):
+    # BoundedStage on_error handler.
+    return None, "", failure_text(LEDGER_SOURCE, pdf_path, error)
+
+
+def iter_ledger_results(
+    pdf_paths, trans_date_map, ledger, workers=1, pool=None, counters=None, timeout=None, max_rss_mb=None
+):
+    """
+    Yield (result, log, error, reused) per PDF in `pdf_paths` order, read back from the ledger.
+
+    A PDF whose content was already ingested with this PARSER_VERSION and the same
+    Bank Name map / Trans Date sheets is not parsed again; the others go through
+    iter_pdf_results() and are ingested unless they failed or had no parser.
+    Classification rules are applied after loading, so editing them parses nothing.
+    """
+    counters = counters if counters is not None else StageCounters()
+    config = sheets_fingerprint(MAPPING_FILE, (BANK_NAME_MAP_SHEET, TRANS_DATE_SHEET))
+    hashes, found = [], []
+    for path in pdf_paths:
+        with counters.time("ledger"):
+            sha, statement = ledger.lookup(LEDGER_SOURCE, path, PARSER_VERSION, config)
+        hashes.append(sha)
+        found.append(statement)
+    fresh = iter_pdf_results(
+        [path for path, statement in zip(pdf_paths, found) if statement is None],
+        trans_date_map,
+        workers,
+        pool,
+        counters,
+        timeout,
+        max_rss_mb,
+    )
+    try:
+        for path, sha, statement in zip(pdf_paths, hashes, found):
+            reused = statement is not None
+            if not reused:
+                result, log, error = next(fresh)
+                if not sha or error is not None or result[0] is None:
+                    yield result, log, error, False
+                    continue
+                records, ctx, ob = result
+                with counters.time("ledger", 0):
+                    ledger.ingest(
+                        LEDGER_SOURCE,
+                        path,
+                        sha,
+                        PARSER_VERSION,
+                        records,
+                        {"ctx": ctx, "opening_balance": ob, "log": log},
+                        config,
+                    )
+                    # Render from what was stored, so a fresh parse and a re-run give the same rows.
+                    statement = ledger.find_statement(LEDGER_SOURCE, sha, PARSER_VERSION, config)
+            statement_id, payload = statement
+            with counters.time("ledger", 0):
+                result = (ledger.records(statement_id), payload["ctx"], payload["opening_balance"])
+            yield result, payload["log"], None, reused
+    finally:
+        fresh.close()
+
+
+def main(
+    pdf_path=None,
+    workers=1,
+    ledger_file=LEDGER_FILE,
+    pdf_paths=None,
+    pool=None,
+    timeout=None,
+    max_rss_mb=None,
+):
+    """
+    Parse the SB statements (just `pdf_path` when given) and write the master tracker.
+    run_all passes the PDFs it already discovered (pdf_paths) and its shared worker pool.
+    With a `timeout` (seconds) or `max_rss_mb`, each new PDF is parsed in a sandboxed
+    child process: one over either limit is stopped, recorded in Error/ and skipped.
+    """
     print("=" * 70)
     print("SAVINGS ACCOUNT MASTER PARSER")
     print("=" * 70)
     print(f"Scanning: {BASE_DIR}")
 
     trans_date_map = load_trans_date_field_map(MAPPING_FILE)
+    known_words = load_known_wrap_words()
+    rules_by_bank, fallback_by_bank, default_fallback = load_sb_mapping_rules()
 
     all_records = []
     opening_balance_by_account = {}
-    pdf_paths = []
-    if len(sys.argv) > 1:
-        pdf_paths = [sys.argv[1]]
-    else:
-        for root, dirs, files in os.walk(BASE_DIR):
-            dirs[:] = [d for d in dirs if d.lower() not in {"archive", "archived"}]
-            for f in files:
-                if f.lower().endswith(".pdf"):
-                    pdf_paths.append(os.path.join(root, f))
-
-    for pdf_path in pdf_paths:
+    if pdf_paths is None:
+        pdf_paths = [pdf_path] if pdf_path else list_statement_pdfs(BASE_DIR)
+
+    # Merge in path order whatever the worker count, so the first opening balance
+    # seen per account is the same one a serial run would keep. Each statement is
+    # classified as it arrives, while the pool parses the next few.
+    ledger = Ledger(ledger_file)
+    counters = StageCounters()
+    results = iter_ledger_results(
+        pdf_paths, trans_date_map, ledger, workers, pool, counters, timeout, max_rss_mb
+    )
+    for pdf_path, (result, log, error, reused) in zip(pdf_paths, results):
         print(f"\\n📄 Processing: {os.path.basename(pdf_path)}")
-        ctx = detect_pdf_context(pdf_path)
-        parser = get_parser_by_bank(ctx["bank"]) or get_parser(pdf_path)
-        if not parser:
+        if reused:
+            print("   ↺ Already in ledger; not parsed again")
+        if log:
+            print(log, end="")
+        if error is not None:
+            print(f"   ❌ Failed: {error}")
+            continue
+        records, ctx, ob = result
+        if records is None:
             print("   ⚠️ No parser found for this file")
             continue
-        try:
-            # Some parsers support Trans Date header mapping for table extraction.
-            try:
-                records = parser(pdf_path, trans_date_map=trans_date_map)
-            except TypeError:
-                records = parser(pdf_path)
-            if records:
-                fallback_account = records[0].get("Account", "")
-                account_name = ctx.get("mapped_account_name") or resolve_account_name(
-                    ctx["bank"], ctx.get("customer_name"), fallback_account
-                )
-                for rec in records:
-                    rec["Account"] = account_name
-                bank_key = account_to_bank_key(ctx.get("bank") or account_name)
-                cfg = trans_date_map.get((ctx.get("bank") or "").strip().lower()) or trans_date_map.get(bank_key)
-                ob = extract_opening_balance_from_pdf(pdf_path, bank_key, cfg)
-                if ob is not None and account_name not in opening_balance_by_account:
-                    opening_balance_by_account[account_name] = ob
-            print(f"   ✅ Extracted {len(records)} transactions")
-            all_records.extend(records)
-        except Exception as e:
-            print(f"   ❌ Failed: {e}")
+        if records:
+            account_name = records[0]["Account"]
+            if ob is not None and account_name not in opening_balance_by_account:
+                opening_balance_by_account[account_name] = ob
+        print(f"   ✅ Extracted {len(records)} transactions")
+        with counters.time("classify"):
+            classify_statement_records(records, known_words, rules_by_bank, fallback_by_bank, default_fallback)
+        all_records.extend(records)
+    ledger.close()
 
     if not all_records:
         print("\\nNo transactions found.")
         return
 
     df = pd.DataFrame(all_records)
-    known_words = load_known_wrap_words()
-    if "Description" in df.columns and known_words:
-        df["Description"] = df["Description"].astype(str).map(lambda v: fix_spaced_known_words(v, known_words))
     df["_sort_date"] = pd.to_datetime(df["Date"], errors="coerce")
     # Period is derived from transaction Date (Mon-YYYY), not from statement headers.
     df.loc[df["_sort_date"].notna(), "Period"] = df.loc[df["_sort_date"].notna(), "_sort_date"].dt.strftime("%b-%Y")
@@ -1967,12 +2219,13 @@ def main():
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce").dt.strftime("%d-%b-%Y")
 
     # SB AC expenses columns A-F (no Card Variant)
+    classification = df["_classification"]
     df = df[["Period", "Date", "Account", "Description", "Amount", "Balance"]]
 
     # Summary sheet:
     # A: Description from SB AC expenses
-    # B-E derived from SB mapping using top-to-bottom, case-insensitive match on column A.
-    rules_by_bank, fallback_by_bank, default_fallback = load_sb_mapping_rules()
+    # B-E derived from SB mapping using top-to-bottom, case-insensitive match on column A
+    # (classify_statement_records(), as each statement came in).
     summary_source_df = df[
         ~(
             df["Account"].astype(str).str.strip().str.lower().eq("axis")
@@ -1980,20 +2233,11 @@ def main():
         )
     ].copy()
 
-    mapped = summary_source_df.apply(
-        lambda r: pd.Series(
-            classify_sb_row(
-                r["Description"],
-                r["Amount"],
-                r["Account"],
-                rules_by_bank,
-                fallback_by_bank,
-                default_fallback,
-            )
-        ),
-        axis=1,
+    mapped = pd.DataFrame(
+        classification.loc[summary_source_df.index].tolist(),
+        index=summary_source_df.index,
+        columns=["Mode", "Expense Type", "Merchant Category", "Store Name"],
     )
-    mapped.columns = ["Mode", "Expense Type", "Merchant Category", "Store Name"]
     summary_df = pd.concat(
         [summary_source_df[["Period", "Account", "Description"]], mapped, summary_source_df[["Amount"]]],
         axis=1,
@@ -2079,6 +2323,7 @@ def main():
             kind="mergesort",
         ).reset_index(drop=True)
 
+    write_started = time.perf_counter()
     with pd.ExcelWriter(OUTPUT_FILE, engine="xlsxwriter") as writer:
         df.to_excel(writer, sheet_name="SB AC expenses", index=False)
         summary_df_sheet.to_excel(writer, sheet_name="SB Categorized Summary", index=False)
@@ -2271,6 +2516,7 @@ def main():
         # Auto-size O-S for readability.
         for c in range(bal_start_col, bal_start_col + bal_ncols):
             ws_sum.set_column(c, c, 22)
+    counters.add("write", time.perf_counter() - write_started)
 
     print("\\n======================================================================")
     print("✅ SB AGGREGATION COMPLETE")
@@ -2278,8 +2524,43 @@ def main():
     print(f"Total PDFs:            {len(pdf_paths)}")
     print(f"Total Transactions:    {len(df)}")
     print(f"Output File:           {OUTPUT_FILE}")
+    print(f"Stage throughput:      {counters.report()}")
     print("======================================================================")
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Aggregate savings account statements into the monthly tracker.")
+    arg_parser.add_argument("pdf", nargs="?", help="Parse only this statement PDF.")
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parse statements in N worker processes (default: 1, serial).",
+    )
+    arg_parser.add_argument(
+        "--no-ledger",
+        action="store_true",
+        help="Parse every statement again without reading or updating the SQLite ledger.",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        nargs="?",
+        const=STATEMENT_TIMEOUT_SECONDS,
+        help=f"Abandon a PDF still parsing after this many seconds (off by default; {STATEMENT_TIMEOUT_SECONDS} if given without a value).",
+    )
+    arg_parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        nargs="?",
+        const=STATEMENT_MAX_RSS_MB,
+        help=f"Abandon a PDF whose parser grows by more than this many MB (off by default; {STATEMENT_MAX_RSS_MB} if given without a value).",
+    )
+    args = arg_parser.parse_args()
+    main(
+        pdf_path=args.pdf,
+        workers=args.workers,
+        ledger_file=None if args.no_ledger else LEDGER_FILE,
+        timeout=args.timeout,
+        max_rss_mb=args.max_rss_mb,
+    )
@@ -1,12 +1,15 @@
 import os
 import re
+import sys
 from glob import glob
 from datetime import datetime
 
 import pandas as pd
-import pdfplumber
 from openpyxl import load_workbook
-from openpyxl.styles import Border, Font, PatternFill, Side
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction_cache import open_pdf
+from template_sheet import load_refresh_workbook, write_df_to_sheet
 
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
@@ -70,7 +73,7 @@ def unordered_token_match(keyword, description):
 def detect_pdf_type(pdf_path):
     text_pages = 0
     table_pages = 0
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             if clean_text(page.extract_text()):
                 text_pages += 1
@@ -97,7 +100,7 @@ def is_axis_pdf(pdf_path):
     if "axis" in name:
         return True
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_pdf(pdf_path) as pdf:
             t = "\n".join((page.extract_text() or "") for page in pdf.pages[:2]).upper()
         return "AXIS BANK" in t
     except Exception:
@@ -136,7 +139,7 @@ def parse_axis_transactions(pdf_path):
         r"^(\d{2}-\d{2}-\d{4})\s+(.+?)\s+(\d{1,3}(?:,\d{2,3})*\.\d{2})\s+(\d{1,3}(?:,\d{2,3})*\.\d{2})\s+(\d{1,3}(?:,\d{2,3})*\.\d{2})$"
     )
 
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text() or ""
             lines = [clean_text(l) for l in text.split("\n") if clean_text(l)]
@@ -253,62 +256,12 @@ def classify_axis_description(description, axis_rules, default_rules, default_fa
     return default_fallback
 
 
-def clear_range(ws, max_col, from_row=1):
-    max_row = ws.max_row
-    if max_row < from_row:
-        return
-    for r in range(from_row, max_row + 1):
-        for c in range(1, max_col + 1):
-            ws.cell(r, c).value = None
-
-
-def write_df_to_sheet(ws, df, max_col):
-    clear_range(ws, max_col=max_col, from_row=1)
-
-    header_fill = PatternFill(fill_type="solid", fgColor="F4B183")
-    header_font = Font(bold=True)
-    thin = Side(style="thin", color="000000")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-    amt_fmt = "#,##0.00"
-
-    for c, col in enumerate(df.columns, start=1):
-        cell = ws.cell(row=1, column=c, value=col)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = border
-
-    numeric_cols = {"Amount", "Balance"}
-    for r in range(2, len(df) + 2):
-        for c, col in enumerate(df.columns, start=1):
-            val = df.iloc[r - 2, c - 1]
-            cell = ws.cell(row=r, column=c)
-            if pd.isna(val):
-                cell.value = None
-            elif col in numeric_cols:
-                try:
-                    cell.value = float(val)
-                    cell.number_format = amt_fmt
-                except Exception:
-                    cell.value = val
-            else:
-                cell.value = val
-            cell.border = border
-
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = f"A1:{chr(64 + len(df.columns))}{max(1, len(df) + 1)}"
-
-    for c, col in enumerate(df.columns, start=1):
-        max_len = len(str(col))
-        if len(df):
-            max_len = max(max_len, int(df[col].astype(str).str.len().quantile(0.95)))
-        ws.column_dimensions[chr(64 + c)].width = min(max_len + 2, 60)
-
-
 def write_output_from_template(df, summary_df):
-    if not os.path.exists(TEMPLATE_FILE):
+    # Refresh the previous output in place when it came from this template; else start from the template.
+    wb = load_refresh_workbook(OUTPUT_FILE, TEMPLATE_FILE)
+    if wb is None:
         return False
 
-    wb = load_workbook(TEMPLATE_FILE)
     ws_txn = wb["Axis Transactions"] if "Axis Transactions" in wb.sheetnames else wb.create_sheet("Axis Transactions")
     ws_summary = (
         wb["Axis Categorized Summary"]
@@ -316,8 +269,8 @@ def write_output_from_template(df, summary_df):
         else wb.create_sheet("Axis Categorized Summary")
     )
 
-    write_df_to_sheet(ws_txn, df, max_col=6)
-    write_df_to_sheet(ws_summary, summary_df, max_col=10)
+    write_df_to_sheet(ws_txn, df, max_col=6, autofit=True)
+    write_df_to_sheet(ws_summary, summary_df, max_col=10, autofit=True)
 
     wb.save(OUTPUT_FILE)
     return True
@@ -1,12 +1,15 @@
 import os
 import re
+import sys
 from glob import glob
 from datetime import datetime
 
 import pandas as pd
-import pdfplumber
 from openpyxl import load_workbook
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction_cache import open_pdf
+
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
 )
@@ -69,7 +72,7 @@ def unordered_token_match(keyword, description):
 def detect_pdf_type(pdf_path):
     text_pages = 0
     table_pages = 0
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             if clean_text(page.extract_text()):
                 text_pages += 1
@@ -96,7 +99,7 @@ def is_icici_pdf(pdf_path):
     if "icici" in name:
         return True
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_pdf(pdf_path) as pdf:
             t = "\n".join((page.extract_text() or "") for page in pdf.pages[:2]).upper()
         return "ICICI BANK" in t
     except Exception:
@@ -217,7 +220,7 @@ def parse_icici_transactions(pdf_path):
         r"^(\d{2}-\d{2}-\d{4})\s+(.+?)\s+(\d{1,3}(?:,\d{2,3})*\.\d{2})\s+(\d{1,3}(?:,\d{2,3})*\.\d{2})$"
     )
 
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text() or ""
             all_lines = [clean_text(l) for l in text.split("\n") if clean_text(l)]
@@ -1,12 +1,16 @@
 import os
 import re
+import sys
 from glob import glob
 from datetime import datetime
 
 import pandas as pd
-import pdfplumber
 from openpyxl import load_workbook
-from openpyxl.styles import Border, Font, PatternFill, Side
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction_cache import open_pdf
+from mapping_snapshot import read_sheet
+from template_sheet import load_refresh_workbook, write_df_to_sheet
 
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
@@ -16,51 +20,11 @@ OUTPUT_FILE = os.path.join(PROJECT_DIR, "Output", "idfc_summary.xlsx")
 TEMPLATE_FILE = os.path.join(PROJECT_DIR, "Reference Documents", "template file", "idfc_sb_template.xlsx")
 
 
-def clear_range(ws, max_col, from_row=1):
-    max_row = ws.max_row
-    if max_row < from_row:
-        return
-    for r in range(from_row, max_row + 1):
-        for c in range(1, max_col + 1):
-            ws.cell(r, c).value = None
-
-
-def write_df_to_sheet(ws, df, max_col):
-    clear_range(ws, max_col=max_col, from_row=1)
-    header_fill = PatternFill(fill_type="solid", fgColor="F4B183")
-    header_font = Font(bold=True)
-    thin = Side(style="thin", color="000000")
-    border = Border(left=thin, right=thin, top=thin, bottom=thin)
-    amt_fmt = "#,##0.00"
-    for c, col in enumerate(df.columns, start=1):
-        cell = ws.cell(row=1, column=c, value=col)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = border
-    numeric_cols = {"Amount", "Balance"}
-    for r in range(2, len(df) + 2):
-        for c, col in enumerate(df.columns, start=1):
-            val = df.iloc[r - 2, c - 1]
-            cell = ws.cell(row=r, column=c)
-            if pd.isna(val):
-                cell.value = None
-            elif col in numeric_cols:
-                try:
-                    cell.value = float(val)
-                    cell.number_format = amt_fmt
-                except Exception:
-                    cell.value = val
-            else:
-                cell.value = val
-            cell.border = border
-    ws.freeze_panes = "A2"
-    ws.auto_filter.ref = f"A1:{chr(64 + len(df.columns))}{max(1, len(df) + 1)}"
-
-
 def write_output_from_template(df, summary_df):
-    if not os.path.exists(TEMPLATE_FILE):
+    # Refresh the previous output in place when it came from this template; else start from the template.
+    wb = load_refresh_workbook(OUTPUT_FILE, TEMPLATE_FILE)
+    if wb is None:
         return False
-    wb = load_workbook(TEMPLATE_FILE)
     ws_txn = wb["IDFC Transactions"] if "IDFC Transactions" in wb.sheetnames else wb.create_sheet("IDFC Transactions")
     ws_summary = (
         wb["IDFC Categorized Summary"]
@@ -128,7 +92,7 @@ def unordered_token_match(keyword, description):
 def detect_pdf_type(pdf_path):
     text_pages = 0
     table_pages = 0
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             if clean_text(page.extract_text()):
                 text_pages += 1
@@ -155,7 +119,7 @@ def is_idfc_pdf(pdf_path):
     if "idfc" in name:
         return True
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_pdf(pdf_path) as pdf:
             t = "\n".join((page.extract_text() or "") for page in pdf.pages[:2]).upper()
         return "IDFC FIRST BANK" in t or "IDFC BANK" in t
     except Exception:
@@ -164,7 +128,7 @@ def is_idfc_pdf(pdf_path):
 
 def detect_idfc_account_name(pdf_path):
     try:
-        with pdfplumber.open(pdf_path) as pdf:
+        with open_pdf(pdf_path) as pdf:
             txt_raw = "\n".join((p.extract_text() or "") for p in pdf.pages[:2])
     except Exception:
         return "IDFC"
@@ -173,7 +137,7 @@ def detect_idfc_account_name(pdf_path):
     # Prefer lookup from "Bank Name map" sheet (whitespace-insensitive).
     try:
         mapping_file = resolve_mapping_file()
-        df = pd.read_excel(mapping_file, sheet_name="Bank Name map")
+        df = read_sheet(mapping_file, "Bank Name map")
         cols = list(df.columns)
         if len(cols) >= 3:
             df = df.rename(columns={cols[0]: "Bank PDF", cols[1]: "Text", cols[2]: "Output"})
@@ -347,7 +311,7 @@ def parse_idfc_transactions(pdf_path):
         )
         current_txn = None
 
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             text = page.extract_text() or ""
             lines = [clean_text(l) for l in text.split("\n") if clean_text(l)]
@@ -0,0 +1,123 @@
+import os
+
+from openpyxl import load_workbook
+from openpyxl.styles import Border, Font, PatternFill, Side
+from openpyxl.utils import get_column_letter, quote_sheetname
+from openpyxl.utils.cell import range_boundaries
+from openpyxl.workbook.defined_name import DefinedName
+
+# Built once and shared by every cell that is written.
+HEADER_FILL = PatternFill(fill_type="solid", fgColor="F4B183")
+HEADER_FONT = Font(bold=True)
+THIN = Side(style="thin", color="000000")
+BORDER = Border(left=THIN, right=THIN, top=THIN, bottom=THIN)
+AMOUNT_FORMAT = "#,##0.00"
+NUMERIC_COLS = {"Amount", "Balance"}
+
+# Hidden sheet-scoped name holding the range the last refresh wrote, so the next one
+# only clears rows the new data does not reach.
+DATA_EXTENT_NAME = "_DataExtent"
+
+
+def previous_data_row(ws):
+    """Last row written by the previous refresh of this sheet, or None when not recorded."""
+    defined = ws.defined_names.get(DATA_EXTENT_NAME)
+    if defined is None:
+        return None
+    try:
+        for _, ref in defined.destinations:
+            return range_boundaries(ref.replace("$", ""))[3]
+    except Exception:
+        return None
+    return None
+
+
+def record_data_extent(ws, max_col, max_row):
+    ref = f"{quote_sheetname(ws.title)}!$A$1:${get_column_letter(max_col)}${max_row}"
+    ws.defined_names[DATA_EXTENT_NAME] = DefinedName(DATA_EXTENT_NAME, attr_text=ref, hidden=True)
+
+
+def load_refresh_workbook(output_file, template_file):
+    """
+    Workbook to write into: the previous output when it was refreshed from the
+    current template (keeps its pivots and recorded extents), else the template.
+    None when there is no template.
+    """
+    if not os.path.exists(template_file):
+        return None
+    if os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(template_file):
+        try:
+            wb = load_workbook(output_file)
+            if any(previous_data_row(ws) is not None for ws in wb.worksheets):
+                return wb
+        except Exception:
+            pass
+    return load_workbook(template_file)
+
+
+def clear_range(ws, max_col, from_row=1, to_row=None, from_col=1):
+    to_row = ws.max_row if to_row is None else to_row
+    if to_row < from_row or max_col < from_col:
+        return
+    for row in ws.iter_rows(min_row=from_row, max_row=to_row, min_col=from_col, max_col=max_col):
+        for cell in row:
+            cell.value = None
+
+
+def write_df_to_sheet(ws, df, max_col, autofit=False):
+    """
+    Overwrite the data region (header + rows) of a template sheet with `df`.
+
+    Cells outside the region keep their content, so template pivots and side
+    tables stay intact. Stale rows from the previous refresh are cleared up to
+    its recorded extent; a sheet without one is cleared down to ws.max_row.
+
+    autofit sizes the columns from the data, but only on the first write from the
+    template or when the header changed: a refresh of the same columns keeps the
+    widths the previous output already has.
+    """
+    nrows, ncols = len(df), len(df.columns)
+    last_row = nrows + 1
+    prev_row = previous_data_row(ws)
+    if autofit and prev_row is not None:
+        autofit = [ws.cell(row=1, column=c).value for c in range(1, ncols + 1)] != list(df.columns)
+    clear_range(ws, max_col, from_row=last_row + 1, to_row=ws.max_row if prev_row is None else prev_row)
+    # Within the rewritten rows, only columns right of the new data need clearing.
+    clear_range(ws, max_col, from_row=1, to_row=last_row, from_col=ncols + 1)
+
+    for c, col in enumerate(df.columns, start=1):
+        cell = ws.cell(row=1, column=c, value=col)
+        cell.fill = HEADER_FILL
+        cell.font = HEADER_FONT
+        cell.border = BORDER
+
+    columns = [
+        (col in NUMERIC_COLS, df.iloc[:, c].to_numpy(dtype=object), df.iloc[:, c].isna().to_numpy())
+        for c, col in enumerate(df.columns)
+    ]
+    for r, row in enumerate(ws.iter_rows(min_row=2, max_row=last_row, max_col=ncols)):
+        for cell, (numeric, values, missing) in zip(row, columns):
+            val = values[r]
+            if missing[r]:
+                cell.value = None
+            elif numeric:
+                try:
+                    cell.value = float(val)
+                    cell.number_format = AMOUNT_FORMAT
+                except Exception:
+                    cell.value = val
+            else:
+                cell.value = val
+            cell.border = BORDER
+
+    ws.freeze_panes = "A2"
+    ws.auto_filter.ref = f"A1:{chr(64 + len(df.columns))}{max(1, len(df) + 1)}"
+
+    if autofit:
+        for c, col in enumerate(df.columns, start=1):
+            max_len = len(str(col))
+            if len(df):
+                max_len = max(max_len, int(df[col].astype(str).str.len().quantile(0.95)))
+            ws.column_dimensions[chr(64 + c)].width = min(max_len + 2, 60)
+
+    record_data_extent(ws, max(max_col, ncols, 1), last_row)
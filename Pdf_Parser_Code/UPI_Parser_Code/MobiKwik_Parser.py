@@ -1,11 +1,19 @@
+import argparse
 import os
 import re
+import sys
 from datetime import datetime
 from pathlib import Path
 from difflib import SequenceMatcher
 
 import pandas as pd
-import pdfplumber
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from extraction_cache import open_pdf
+from fuzzy_matcher import FuzzyRuleSet
+from ledger import ingested_frame
+from mapping_snapshot import compiled_table, read_sheet
+from upi_batch import run_statement_batch
 
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
@@ -15,6 +23,9 @@ OUTPUT_DIR = os.path.join(PROJECT_DIR, "Output")
 MAPPING_FILE = os.path.join(PROJECT_DIR, "Reference Documents", "Merchant category mapping.xlsx")
 LOG_FILE = os.path.join(PROJECT_DIR, "Logs", "File_Parser_log.txt")
 
+LEDGER_SOURCE = "MobiKwik"
+PARSER_VERSION = 1
+
 
 def clean_text(value):
     if value is None:
@@ -41,7 +52,11 @@ def append_log(file_name, output_file_name, error_text=""):
 
 
 def load_category_mapping():
-    df = pd.read_excel(MAPPING_FILE, sheet_name="UPIs")
+    return compiled_table(MAPPING_FILE, "UPIs", _build_category_mapping)
+
+
+def _build_category_mapping():
+    df = read_sheet(MAPPING_FILE, "UPIs")
     rules = []
     for _, row in df.iterrows():
         kw = clean_text(row.get("Description", ""))
@@ -55,11 +70,17 @@ def load_category_mapping():
                 clean_text(row.get("Store Name", "")) or "Unknown",
             )
         )
-    return rules
+    return FuzzyRuleSet(rules)
 
 
 def classify(description, rules):
     desc = clean_text(description).lower()
+    if isinstance(rules, FuzzyRuleSet):
+        index = rules.best_match(desc, 0.55)
+        if index is not None:
+            _, exp_type, merch_cat, store_name = rules[index]
+            return exp_type, merch_cat, store_name
+        return "Miscellaneous", "Miscellaneous", "Unknown"
     best = None
     best_score = 0.0
     for kw, exp_type, merch_cat, store_name in rules:
@@ -77,7 +98,7 @@ def classify(description, rules):
 
 def extract_transactions(pdf_path):
     lines = []
-    with pdfplumber.open(pdf_path) as pdf:
+    with open_pdf(pdf_path) as pdf:
         for page in pdf.pages:
             txt = page.extract_text() or ""
             lines.extend(txt.splitlines())
@@ -179,34 +200,79 @@ def format_output(writer, txns_df, summary_df, txns_sheet_name):
     style(ws_sum, summary_df)
 
 
-def run(input_pdf):
-    rules = load_category_mapping()
-    txns_df = extract_transactions(input_pdf)
-    if txns_df.empty:
-        raise ValueError("No transactions parsed from MobiKwik statement")
-
+def categorize(txns_df, rules):
+    """Add the category columns to txns_df and return its summary sheet."""
     txns_df[["Expense Type", "Merchant Category", "Store Name"]] = txns_df["Description"].apply(
         lambda x: pd.Series(classify(x, rules))
     )
-    summary_df = txns_df[
+    return txns_df[
         ["Period", "Account", "Expense Type", "Merchant Category", "Store Name", "Amount"]
     ].copy()
-    period_label = pd.to_datetime(txns_df["Date"], dayfirst=True).max().strftime("%b'%y")
-    output_name = f"MobiKwik_{period_label}.xlsx"
-    output_path = os.path.join(OUTPUT_DIR, output_name)
 
+
+def write_output(output_path, txns_df, summary_df):
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     with pd.ExcelWriter(output_path, engine="xlsxwriter") as writer:
         txns_df.to_excel(writer, sheet_name="MobiKwik Transactions", index=False)
         summary_df.to_excel(writer, sheet_name="Categorized Txn Summary", index=False)
         format_output(writer, txns_df, summary_df, "MobiKwik Transactions")
-    return output_name, output_path, len(txns_df)
 
 
-def main():
+def output_name(period_label):
+    return f"MobiKwik_{period_label}.xlsx"
+
+
+def load_statement(input_pdf):
+    # Parsed rows are kept in the ledger; an already ingested statement is not parsed again.
+    return ingested_frame(LEDGER_SOURCE, PARSER_VERSION, input_pdf, extract_transactions)
+
+
+def run(input_pdf):
+    rules = load_category_mapping()
+    txns_df = load_statement(input_pdf)
+    if txns_df.empty:
+        raise ValueError("No transactions parsed from MobiKwik statement")
+
+    summary_df = categorize(txns_df, rules)
+    period_label = pd.to_datetime(txns_df["Date"], dayfirst=True).max().strftime("%b'%y")
+    out_name = output_name(period_label)
+    output_path = os.path.join(OUTPUT_DIR, out_name)
+    write_output(output_path, txns_df, summary_df)
+    return out_name, output_path, len(txns_df)
+
+
+def run_batch(input_pdfs, workers=1, combined=False):
+    """
+    Parse every statement in input_pdfs (in parallel when workers > 1), merge them
+    and drop transactions repeated across overlapping exports (MobiKwik rows carry no
+    id, so by Date, Description and Amount). Writes MobiKwik_<Mon'YY>.xlsx per Period, or one
+    MobiKwik_<first>-<last>.xlsx when combined. Each input is logged to LOG_FILE.
+    Returns [(output name, output path, rows)].
+    """
+    rules = load_category_mapping()
+    return run_statement_batch(
+        input_pdfs,
+        load_statement,
+        lambda period_df: categorize(period_df, rules),
+        write_output,
+        output_name,
+        OUTPUT_DIR,
+        append_log,
+        "MobiKwik",
+        workers,
+        combined,
+    )
+
+
+def main(batch=False, combined=False, workers=1):
     files = sorted(Path(INPUT_DIR).glob("MobiKwik*.pdf"))
     if not files:
         raise FileNotFoundError(f"No MobiKwik PDF found in {INPUT_DIR}")
+    if batch:
+        print(f"Inputs: {len(files)} file(s) in {INPUT_DIR}")
+        for out_name, out_path, rows in run_batch([str(f) for f in files], workers, combined):
+            print(f"Output: {out_path} ({rows} rows)")
+        return
     input_pdf = str(files[0])
     in_name = Path(input_pdf).name
     try:
@@ -221,4 +287,22 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Parse MobiKwik statement PDFs into MobiKwik_<Mon'YY>.xlsx.")
+    arg_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Parse every MobiKwik*.pdf, merge them and write one workbook per period.",
+    )
+    arg_parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="With --batch, write a single multi-period workbook instead.",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Parse --batch statements in N worker processes (default: 1).",
+    )
+    args = arg_parser.parse_args()
+    main(batch=args.batch, combined=args.combined, workers=args.workers)
@@ -1,3 +1,4 @@
+import argparse
 import os
 import re
 import sys
@@ -7,6 +8,12 @@ from datetime import datetime
 
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from keyword_matcher import KeywordAutomaton
+from ledger import ingested_frame
+from mapping_snapshot import compiled_table, read_sheet, sheet_names
+from upi_batch import input_labels, load_statements, merge_transactions, split_periods
+
 PROJECT_DIR = os.path.expanduser(
     "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
 )
@@ -18,6 +25,17 @@ ARCHIVE_DIR = os.path.join(PROJECT_DIR, "Archive", "UPI", "PayTm")
 LOG_FILE = os.path.join(PROJECT_DIR, "Logs", "File_Parser_log.txt")
 ARCHIVE_ENABLED = False
 
+LEDGER_SOURCE = "Paytm"
+PARSER_VERSION = 1
+# Ledger columns filled from the passbook's own headers.
+LEDGER_FIELDS = {"account": "Your Account", "description": "Transaction Details"}
+
+# Exports read by --batch; overlapping ones share rows, matched on the ids (else the row).
+BATCH_PATTERN = "Paytm_Statement_*.xlsx"
+ID_COLUMNS = ("UPI Ref No.", "Order ID")
+ROW_KEY_COLUMNS = ("Date", "Transaction Details", "Amount")
+OTHER_DETAILS_COLUMN = "Other Transaction Details (UPI ID or A/c No)"
+
 
 def clean_text(value):
     if value is None:
@@ -57,6 +75,25 @@ def parse_int_like(value):
         return None
 
 
+def parse_amount_column(series):
+    """parse_amount() over a whole column, NaN where it gives None."""
+    s = series.astype("string").str.strip()
+    s = s.str.replace(",", "", regex=False).str.replace("\u2212", "-", regex=False)
+    s = s.str.replace(r"[^\d\.\-]", "", regex=True)
+    return pd.to_numeric(s, errors="coerce").astype("float64")
+
+
+def parse_int_like_column(series):
+    # Per value: ids stripped to their digits can exceed the int64 range, which a
+    # column-wise Int64 cast rejects; parse_int_like() gives a Python int for them.
+    return series.map(parse_int_like)
+
+
+def parse_dates(series):
+    # format="mixed" parses each value on its own, as per-row pd.to_datetime did.
+    return pd.to_datetime(series, dayfirst=True, errors="coerce", format="mixed")
+
+
 def derive_period_label_from_dates(df):
     date_series = pd.to_datetime(df.get("Date"), dayfirst=True, errors="coerce").dropna()
     if date_series.empty:
@@ -110,50 +147,11 @@ def load_paytm_mapping(mapping_path):
     # - PayTm_1 (A:F): Tags, Description, Other Transaction Details, Your Account,
     #   Expense Type, Merchant Category
     # - PayTm_1 (G:H): account map table (Your Account -> Value)
-    rules = []
-    account_map = []
-
     if mapping_path.lower().endswith((".xlsx", ".xlsm", ".xls")):
-        xl = pd.ExcelFile(mapping_path)
-
-        class_sheet = "PayTm_1" if "PayTm_1" in xl.sheet_names else "PayTm"
-        cdf = pd.read_excel(mapping_path, sheet_name=class_sheet)
-
-        def pick_col(df, preferred):
-            lowered = {str(c).strip().lower(): c for c in df.columns}
-            for name in preferred:
-                if name.lower() in lowered:
-                    return lowered[name.lower()]
-            return None
-
-        tag_col = pick_col(cdf, ["Tags"])
-        desc_col = pick_col(cdf, ["Description"])
-        other_col = pick_col(cdf, ["Other Transaction Details"])
-        class_acct_col = pick_col(cdf, ["Your Account"])
-        exp_col = pick_col(cdf, ["Expense Type"])
-        merch_col = pick_col(cdf, ["Merchant Category"])
-        # Account map table in G/H: typically "Your Account.1" -> "Value"
-        map_acct_col = pick_col(cdf, ["Your Account.1", "Your Account"])
-        map_value_col = pick_col(cdf, ["Value"])
-
-        for _, row in cdf.iterrows():
-            tag = str(row.get(tag_col, "")).strip() if tag_col and pd.notna(row.get(tag_col, "")) else ""
-            desc = str(row.get(desc_col, "")).strip() if desc_col and pd.notna(row.get(desc_col, "")) else ""
-            other = str(row.get(other_col, "")).strip() if other_col and pd.notna(row.get(other_col, "")) else ""
-            acct = str(row.get(class_acct_col, "")).strip() if class_acct_col and pd.notna(row.get(class_acct_col, "")) else ""
-            exp = str(row.get(exp_col, "")).strip() if exp_col and pd.notna(row.get(exp_col, "")) else ""
-            merch = str(row.get(merch_col, "")).strip() if merch_col and pd.notna(row.get(merch_col, "")) else ""
-            if tag or desc or other or acct:
-                rules.append((tag, desc, other, acct, exp, merch))
-
-        for _, row in cdf.iterrows():
-            acc_in = str(row.get(map_acct_col, "")).strip() if map_acct_col and pd.notna(row.get(map_acct_col, "")) else ""
-            acc_out = str(row.get(map_value_col, "")).strip() if map_value_col and pd.notna(row.get(map_value_col, "")) else ""
-            if acc_in and acc_out:
-                account_map.append((acc_in, acc_out))
-        return rules, account_map
+        return compiled_table(mapping_path, "PayTm_1", lambda: _build_paytm_mapping(mapping_path))
 
     # Fallback format: CSV with columns Keyword Pattern / Expense Type / Merchant Category
+    rules = []
     cdf = pd.read_csv(mapping_path, encoding="utf-8-sig")
     key_col = "Keyword Pattern" if "Keyword Pattern" in cdf.columns else cdf.columns[0]
     exp_col = "Expense Type" if "Expense Type" in cdf.columns else (cdf.columns[1] if len(cdf.columns) > 1 else None)
@@ -166,7 +164,48 @@ def load_paytm_mapping(mapping_path):
         exp = str(row.get(exp_col, "")).strip() if exp_col else ""
         merch = str(row.get(mer_col, "")).strip() if mer_col else ""
         rules.append(("", key, "", "", exp, merch))
-    return rules, account_map
+    return PaytmRuleTable(rules), PaytmAccountMap()
+
+
+def _build_paytm_mapping(mapping_path):
+    rules = []
+    account_map = []
+    class_sheet = "PayTm_1" if "PayTm_1" in sheet_names(mapping_path) else "PayTm"
+    cdf = read_sheet(mapping_path, class_sheet)
+
+    def pick_col(df, preferred):
+        lowered = {str(c).strip().lower(): c for c in df.columns}
+        for name in preferred:
+            if name.lower() in lowered:
+                return lowered[name.lower()]
+        return None
+
+    tag_col = pick_col(cdf, ["Tags"])
+    desc_col = pick_col(cdf, ["Description"])
+    other_col = pick_col(cdf, ["Other Transaction Details"])
+    class_acct_col = pick_col(cdf, ["Your Account"])
+    exp_col = pick_col(cdf, ["Expense Type"])
+    merch_col = pick_col(cdf, ["Merchant Category"])
+    # Account map table in G/H: typically "Your Account.1" -> "Value"
+    map_acct_col = pick_col(cdf, ["Your Account.1", "Your Account"])
+    map_value_col = pick_col(cdf, ["Value"])
+
+    for _, row in cdf.iterrows():
+        tag = str(row.get(tag_col, "")).strip() if tag_col and pd.notna(row.get(tag_col, "")) else ""
+        desc = str(row.get(desc_col, "")).strip() if desc_col and pd.notna(row.get(desc_col, "")) else ""
+        other = str(row.get(other_col, "")).strip() if other_col and pd.notna(row.get(other_col, "")) else ""
+        acct = str(row.get(class_acct_col, "")).strip() if class_acct_col and pd.notna(row.get(class_acct_col, "")) else ""
+        exp = str(row.get(exp_col, "")).strip() if exp_col and pd.notna(row.get(exp_col, "")) else ""
+        merch = str(row.get(merch_col, "")).strip() if merch_col and pd.notna(row.get(merch_col, "")) else ""
+        if tag or desc or other or acct:
+            rules.append((tag, desc, other, acct, exp, merch))
+
+    for _, row in cdf.iterrows():
+        acc_in = str(row.get(map_acct_col, "")).strip() if map_acct_col and pd.notna(row.get(map_acct_col, "")) else ""
+        acc_out = str(row.get(map_value_col, "")).strip() if map_value_col and pd.notna(row.get(map_value_col, "")) else ""
+        if acc_in and acc_out:
+            account_map.append((acc_in, acc_out))
+    return PaytmRuleTable(rules), PaytmAccountMap(account_map)
 
 
 def is_partial_match(source_value, rule_value):
@@ -177,7 +216,109 @@ def is_partial_match(source_value, rule_value):
     return r in s or s in r
 
 
+class PaytmRuleTable(list):
+    """
+    PayTm_1 rule rows (tag, desc, other, acct, exp, merch) compiled once for match_paytm1_rule().
+
+    Per rule: the four lookup fields pre-normalised and a bitmask of the
+    populated ones. Per field: an index from the distinct normalised rule values
+    to their rows, so a source value is compared against each distinct value once
+    (an automaton finds rule-in-source, a length-filtered scan source-in-rule).
+    A row can only match if its first populated field matches, so candidates
+    come from that field and are checked top-to-bottom.
+    """
+
+    FIELD_COUNT = 4
+
+    def __init__(self, rules=()):
+        super().__init__(rules)
+        self.normed = [tuple(norm(v) for v in rule[: self.FIELD_COUNT]) for rule in self]
+        self.masks = [
+            sum(1 << f for f in range(self.FIELD_COUNT) if fields[f]) for fields in self.normed
+        ]
+        self.field_values = []
+        self.field_automata = []
+        self.field_rows = []
+        self.field_cache = [{} for _ in range(self.FIELD_COUNT)]
+        for f in range(self.FIELD_COUNT):
+            rows_by_value = {}
+            for i, fields in enumerate(self.normed):
+                if fields[f]:
+                    rows_by_value.setdefault(fields[f], []).append(i)
+            values = list(rows_by_value)
+            self.field_values.append(values)
+            self.field_automata.append(KeywordAutomaton(values))
+            self.field_rows.append([rows_by_value[v] for v in values])
+        # Rows keyed by their first populated field.
+        self.rows_by_primary = [[] for _ in range(self.FIELD_COUNT)]
+        for i, mask in enumerate(self.masks):
+            if mask:
+                primary = (mask & -mask).bit_length() - 1
+                self.rows_by_primary[primary].append(i)
+
+    def field_matches(self, f, source_value):
+        """Rows whose field `f` partially matches `source_value` (see is_partial_match)."""
+        s = norm(source_value)
+        cache = self.field_cache[f]
+        if s not in cache:
+            rows = set()
+            if s:
+                values = self.field_values[f]
+                hits = self.field_automata[f].all_matches(s)
+                hits.update(j for j, v in enumerate(values) if len(v) >= len(s) and s in v)
+                for j in hits:
+                    rows.update(self.field_rows[f][j])
+            cache[s] = rows
+        return cache[s]
+
+    def first_match(self, sources):
+        """Index of the first row whose populated fields all partially match `sources`, or None."""
+        matched = [None] * self.FIELD_COUNT
+
+        def rows_for(f):
+            if matched[f] is None:
+                matched[f] = self.field_matches(f, sources[f])
+            return matched[f]
+
+        candidates = []
+        for f in range(self.FIELD_COUNT):
+            if self.rows_by_primary[f]:
+                candidates.extend(rows_for(f).intersection(self.rows_by_primary[f]))
+        for i in sorted(candidates):
+            mask = self.masks[i]
+            if all(i in rows_for(f) for f in range(self.FIELD_COUNT) if mask & (1 << f)):
+                return i
+        return None
+
+
+class PaytmAccountMap(list):
+    """Account map rows (Your Account -> Value) with sources pre-normalised and lookups memoised."""
+
+    def __init__(self, account_map=()):
+        super().__init__(account_map)
+        self.normed = [(norm(src), dst) for src, dst in self]
+        self.cache = {}
+
+    def lookup(self, source_value):
+        s = norm(source_value)
+        if s not in self.cache:
+            best = None
+            best_len = -1
+            for nsrc, dst in self.normed:
+                if not nsrc:
+                    continue
+                if nsrc in s or s in nsrc:
+                    if len(nsrc) > best_len:
+                        best = dst
+                        best_len = len(nsrc)
+            self.cache[s] = best
+        return self.cache[s]
+
+
 def match_paytm1_rule(source_tags, source_desc, source_other, source_account, rules):
+    if isinstance(rules, PaytmRuleTable):
+        index = rules.first_match((source_tags, source_desc, source_other, source_account))
+        return rules[index] if index is not None else None
     # Strict top-to-bottom scan of PayTm_1 rows.
     # For each rule row, only populated keys are compared (A/B/C/D).
     # First matching row wins.
@@ -201,6 +342,9 @@ def match_paytm1_rule(source_tags, source_desc, source_other, source_account, ru
 
 
 def derive_account_by_source(source_value, account_map, fallback):
+    if isinstance(account_map, PaytmAccountMap):
+        best = account_map.lookup(source_value)
+        return best if best else fallback
     s = norm(source_value)
     best = None
     best_len = -1
@@ -215,68 +359,158 @@ def derive_account_by_source(source_value, account_map, fallback):
     return best if best else fallback
 
 
+def _categorize_key(tags_value, txn, source_other, source_account, fallback, rules, account_map):
+    tags = clean_text(tags_value)
+    account_value = derive_account_by_source(source_account, account_map, fallback)
+    m = match_paytm1_rule(tags, txn, source_other, source_account, rules)
+    if m:
+        _, _, _, _, exp_type, merch_cat = m
+    else:
+        exp_type = "Miscellaneous"
+        merch_cat = tags
+    return account_value, exp_type, merch_cat, clean_text(txn)
+
+
+def categorize_passbook(sdf, rules, account_map, fallback_account):
+    """
+    Categorized summary of the passbook rows that have a valid Date, indexed like sdf.
+
+    Dates and amounts are parsed column-wise, and the rules are matched once per
+    distinct (Tags, Transaction Details, Other, Your Account) tuple. fallback_account
+    (used when Your Account is not in the account map) is a name, or a Series with
+    each row's own export name in multi-file runs.
+    """
+    dates = parse_dates(sdf["Date"])
+    valid = dates.notna()
+    sdf = sdf[valid]
+
+    def text_column(col):
+        if col not in sdf.columns:
+            return pd.Series("", index=sdf.index)
+        return sdf[col].map(str).str.strip()
+
+    if isinstance(fallback_account, pd.Series):
+        fallbacks = fallback_account[valid]
+    else:
+        fallbacks = pd.Series(fallback_account, index=sdf.index)
+    keys = list(
+        zip(
+            text_column("Tags"),
+            text_column("Transaction Details"),
+            text_column(OTHER_DETAILS_COLUMN),
+            text_column("Your Account"),
+            fallbacks,
+        )
+    )
+    categories = {key: _categorize_key(*key, rules, account_map) for key in dict.fromkeys(keys)}
+    rows = [categories[key] for key in keys]
+
+    amounts = (
+        parse_amount_column(sdf["Amount"])
+        if "Amount" in sdf.columns
+        else pd.Series(float("nan"), index=sdf.index)
+    )
+    return pd.DataFrame(
+        {
+            "Period": dates[valid].dt.strftime("%b-%Y"),
+            "Account": [r[0] for r in rows],
+            "Expense Type": [r[1] for r in rows],
+            "Merchant Category": [r[2] for r in rows],
+            "Amount": amounts,
+            "_source_description": [r[3] for r in rows],
+        },
+        index=sdf.index,
+    )
+
+
+def passbook_sheet(sdf):
+    """Source rows as written to the Paytm Transactions sheet: Amount numeric, ids as integers."""
+    raw_df = sdf.copy()
+    if "Amount" in raw_df.columns:
+        raw_df["Amount"] = parse_amount_column(raw_df["Amount"])
+    for id_col in ID_COLUMNS:
+        if id_col in raw_df.columns:
+            raw_df[id_col] = parse_int_like_column(raw_df[id_col])
+    return raw_df
+
+
+def load_passbook(source_path):
+    # Passbook rows are kept in the ledger; an already ingested export is not read again.
+    return ingested_frame(LEDGER_SOURCE, PARSER_VERSION, source_path, load_source, fields=LEDGER_FIELDS)
+
+
 def parse_paytm(source_path, mapping_path=DEFAULT_MAPPING_FILE):
-    sdf = load_source(source_path)
+    sdf = load_passbook(source_path)
     rules, account_map = load_paytm_mapping(mapping_path)
-    file_fallback_account = Path(source_path).stem
     period_label = derive_period_label_from_dates(sdf)
     output_file_name = build_output_filename(period_label)
     output_file_path = os.path.join(OUTPUT_DIR, output_file_name)
 
-    out_rows = []
-    for _, row in sdf.iterrows():
-        date_val = pd.to_datetime(row["Date"], dayfirst=True, errors="coerce")
-        if pd.isna(date_val):
-            continue
-        period = date_val.strftime("%b-%Y")
-
-        txn = str(row.get("Transaction Details", "")).strip()
-        amount = parse_amount(row.get("Amount", None))
-        tags = clean_text(row.get("Tags", ""))
-
-        source_other = str(row.get("Other Transaction Details (UPI ID or A/c No)", "")).strip()
-        source_account = str(row.get("Your Account", "")).strip()
-        account_value = derive_account_by_source(source_account, account_map, file_fallback_account)
-
-        m = match_paytm1_rule(tags, txn, source_other, source_account, rules)
-        if m:
-            _, _, _, _, exp_type, merch_cat = m
-        else:
-            txn_low = txn.lower()
-            if txn_low.startswith("paid to") or txn_low.startswith("money sent to"):
-                exp_type = "Miscellaneous"
-                merch_cat = tags
-            else:
-                exp_type = "Miscellaneous"
-                merch_cat = tags
-
-        out_rows.append(
-            {
-                "Period": period,
-                "Account": account_value,
-                "Expense Type": exp_type,
-                "Merchant Category": merch_cat,
-                "Amount": amount,
-                "_source_description": clean_text(txn),
-            }
-        )
+    summary_df = categorize_passbook(sdf, rules, account_map, Path(source_path).stem)
+    export_df = summary_df.drop(columns=["_source_description"])
+    write_output(output_file_path, passbook_sheet(sdf), export_df)
+    return export_df, output_file_name, output_file_path
 
-    summary_df = pd.DataFrame(out_rows)
-    summary_df = summary_df[
-        ["Period", "Account", "Expense Type", "Merchant Category", "Amount", "_source_description"]
-    ]
 
+def run_batch(source_paths, workers=1, combined=False, mapping_path=DEFAULT_MAPPING_FILE):
+    """
+    Read every passbook export in source_paths (in parallel when workers > 1),
+    merge them and drop rows an older export already had (same UPI Ref No. or
+    Order ID, else same Date, Transaction Details and Amount), so overlapping
+    3-month exports are counted once. Writes Paytm_<Mon'YY>.xlsx per Period, or one
+    Paytm_<first>-<last>.xlsx when combined. Each input is logged to LOG_FILE.
+    Returns [(output name, output path, rows)].
+    """
+    loaded = load_statements(source_paths, load_passbook, workers)
+    inputs = []
+    for source_path, sdf, error, log in loaded:
+        print(log, end="")
+        if error:
+            print(f"   ❌ {Path(source_path).name}: {error}")
+            append_parser_log("UPI", Path(source_path).name, "", error)
+            continue
+        dates = parse_dates(sdf["Date"])
+        inputs.append((dates.max(), source_path, dates.dt.strftime("%b-%Y"), sdf))
+    if not inputs:
+        raise ValueError("No Paytm passbook export could be read")
+    # Oldest export first: a row shared by overlapping exports is kept from (and falls
+    # back to the account name of) the earliest one, whatever the file names.
+    inputs.sort(key=lambda item: (pd.isna(item[0]), item[0] if pd.notna(item[0]) else pd.Timestamp.min))
+
+    frames = [
+        passbook_sheet(sdf).assign(_fallback_account=Path(source_path).stem)
+        for _, source_path, _, sdf in inputs
+    ]
+    raw_df = merge_transactions(frames, ID_COLUMNS, ROW_KEY_COLUMNS)
+    fallback_account = raw_df.pop("_fallback_account")
+    rules, account_map = load_paytm_mapping(mapping_path)
+    export_df = categorize_passbook(raw_df, rules, account_map, fallback_account).drop(
+        columns=["_source_description"]
+    )
+    if export_df.empty:
+        raise ValueError("No dated transactions in the Paytm passbook exports")
+
+    outputs = []
+    for period_label, period_df in split_periods(export_df, combined):
+        output_file_name = build_output_filename(period_label)
+        output_file_path = os.path.join(OUTPUT_DIR, output_file_name)
+        write_output(output_file_path, raw_df.loc[period_df.index], period_df)
+        outputs.append((output_file_name, output_file_path, len(period_df)))
+
+    for _, source_path, periods, _ in inputs:
+        output_names = [build_output_filename(label) for label in input_labels(periods, export_df, combined)]
+        if ARCHIVE_ENABLED and output_names:
+            archive_processed_input(source_path, output_names[-1])
+        append_parser_log("UPI", Path(source_path).name, ", ".join(output_names), "")
+    return outputs
+
+
+def write_output(output_file_path, raw_df, export_df):
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
     with pd.ExcelWriter(output_file_path, engine="xlsxwriter") as writer:
-        # Sheet 1: raw source; keep structure but force Amount numeric
-        raw_df = sdf.copy()
-        if "Amount" in raw_df.columns:
-            raw_df["Amount"] = raw_df["Amount"].apply(parse_amount)
-        for id_col in ["UPI Ref No.", "Order ID"]:
-            if id_col in raw_df.columns:
-                raw_df[id_col] = raw_df[id_col].apply(parse_int_like)
+        # Sheet 1: raw source (see passbook_sheet)
         raw_df.to_excel(writer, sheet_name="Paytm Transactions", index=False)
         # Sheet 2: categorized summary
-        export_df = summary_df.drop(columns=["_source_description"])
         summary_sheet_name = "Categorized Txn Summary"
         export_df.to_excel(writer, sheet_name=summary_sheet_name, index=False)
 
@@ -409,19 +643,24 @@ def parse_paytm(source_path, mapping_path=DEFAULT_MAPPING_FILE):
         ws_summary.set_column(pivot2_start_col + 1, pivot2_start_col + 1, 22)
         ws_summary.set_column(pivot2_start_col + 2, pivot2_start_col + 2, 14, num_fmt)
 
-    return export_df, output_file_name, output_file_path
 
-
-def main():
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    else:
+def main(input_file=None, mapping_file=DEFAULT_MAPPING_FILE, batch=False, combined=False, workers=1):
+    if batch:
+        candidates = sorted(Path(DEFAULT_INPUT_DIR).glob(BATCH_PATTERN))
+        if not candidates:
+            raise FileNotFoundError(f"No {BATCH_PATTERN} files found in {DEFAULT_INPUT_DIR}")
+        print(f"Inputs: {len(candidates)} file(s) in {DEFAULT_INPUT_DIR}")
+        print(f"Mapping: {mapping_file}")
+        outputs = run_batch([str(c) for c in candidates], workers, combined, mapping_file)
+        for output_file_name, output_path, rows in outputs:
+            print(f"Output: {output_path} ({rows} rows)")
+        return
+    if input_file is None:
         candidates = sorted(Path(DEFAULT_INPUT_DIR).glob("*.xlsx"))
         if not candidates:
             raise FileNotFoundError(f"No .xlsx files found in {DEFAULT_INPUT_DIR}")
         input_file = str(candidates[0])
 
-    mapping_file = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MAPPING_FILE
     input_name = Path(input_file).name
     try:
         result, output_file_name, output_path = parse_paytm(input_file, mapping_file)
@@ -440,4 +679,24 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    arg_parser = argparse.ArgumentParser(description="Categorize Paytm passbook exports into Paytm_<Mon'YY>.xlsx.")
+    arg_parser.add_argument("input_file", nargs="?", help="Passbook export (default: first .xlsx in UPI Statements).")
+    arg_parser.add_argument("mapping_file", nargs="?", default=DEFAULT_MAPPING_FILE, help="Category mapping workbook.")
+    arg_parser.add_argument(
+        "--batch",
+        action="store_true",
+        help=f"Merge every {BATCH_PATTERN} in UPI Statements and write one workbook per period.",
+    )
+    arg_parser.add_argument(
+        "--combined",
+        action="store_true",
+        help="With --batch, write a single multi-period workbook instead.",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Read --batch exports in N worker processes (default: 1).",
+    )
+    args = arg_parser.parse_args()
+    main(args.input_file, args.mapping_file, batch=args.batch, combined=args.combined, workers=args.workers)
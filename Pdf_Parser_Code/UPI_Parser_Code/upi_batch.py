@@ -0,0 +1,168 @@
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+# Identity of rows without a transaction id.
+ROW_KEY_COLUMNS = ("Date", "Description", "Amount")
+
+
+def _load_job(load, path):
+    """load(path) with its prints captured and errors returned, so one bad statement never stops a batch."""
+    out = io.StringIO()
+    df, error = None, ""
+    with redirect_stdout(out):
+        try:
+            df = load(path)
+        except Exception as e:
+            error = str(e)
+    return path, df, error, out.getvalue()
+
+
+def load_statements(paths, load, workers=1):
+    """[(path, DataFrame or None, error, log)] in `paths` order, parsed in a process pool when workers > 1."""
+    if workers <= 1 or len(paths) <= 1:
+        return [_load_job(load, path) for path in paths]
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_load_job, load, path) for path in paths]
+        for path, future in zip(paths, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # As BoundedStage's on_error (stage_pipeline.py).
+                results.append((path, None, str(e), ""))
+    return results
+
+
+def _row_keys(df, row_columns):
+    """
+    row_columns plus the row's occurrence number among identical rows of the same
+    statement, so repeated identical transactions inside one statement are all kept.
+    """
+    row_cols = [c for c in row_columns if c in df.columns]
+    row_values = df[row_cols].astype(str)
+    occurrence = row_values.groupby(row_cols, sort=False).cumcount().astype(str)
+    return row_values.agg("|".join, axis=1) + "|" + occurrence
+
+
+def merge_transactions(frames, id_columns=(), row_columns=ROW_KEY_COLUMNS):
+    """
+    Concatenate per-statement frames in order and drop transactions an earlier
+    statement already had (overlapping exports). A row is a repeat when any of its
+    non-empty id_columns was seen before; rows without ids are matched on row_columns.
+    """
+    seen_ids = {col: set() for col in id_columns}
+    seen_rows = set()
+    parts = []
+    for df in frames:
+        has_id = pd.Series(False, index=df.index)
+        repeat = pd.Series(False, index=df.index)
+        ids = {}
+        for col in id_columns:
+            if col not in df.columns:
+                continue
+            values = df[col].astype("string").fillna("").str.strip()
+            # The same numeric id reads "123.0" in a column that also has blanks (float64).
+            values = values.str.replace(r"\.0$", "", regex=True)
+            present = values != ""
+            has_id |= present
+            repeat |= present & values.isin(seen_ids[col])
+            ids[col] = values[present]
+        row_keys = _row_keys(df, row_columns)
+        repeat |= ~has_id & row_keys.isin(seen_rows)
+
+        for col, values in ids.items():
+            seen_ids[col].update(values)
+        seen_rows.update(row_keys)
+        parts.append(df[~repeat])
+    return pd.concat(parts, ignore_index=True)
+
+
+def period_label(period):
+    """"Jan-2026" (Period column) -> "Jan'26" (output file names)."""
+    return datetime.strptime(str(period), "%b-%Y").strftime("%b'%y")
+
+
+def _periods(periods):
+    return sorted(periods.dropna().unique(), key=lambda p: datetime.strptime(p, "%b-%Y"))
+
+
+def combined_label(txns_df):
+    """"<first>-<last>" period label of a multi-period workbook ("<period>" if only one)."""
+    labels = [period_label(p) for p in _periods(txns_df["Period"])]
+    return labels[0] if len(labels) == 1 else f"{labels[0]}-{labels[-1]}"
+
+
+def split_periods(txns_df, combined=False):
+    """
+    [(label, rows)] in calendar order: one per Period, or a single group of every
+    row when combined. Rows keep their txns_df index.
+    """
+    if combined:
+        return [(combined_label(txns_df), txns_df)]
+    return [(period_label(p), txns_df[txns_df["Period"] == p]) for p in _periods(txns_df["Period"])]
+
+
+def input_labels(periods, txns_df, combined=False):
+    """Labels of the workbooks covering one input statement (its Period column), for its log line."""
+    if combined:
+        return [combined_label(txns_df)]
+    return [period_label(p) for p in _periods(periods)]
+
+
+def run_statement_batch(
+    input_paths,
+    load,
+    categorize,
+    write_output,
+    output_name,
+    output_dir,
+    append_log,
+    source,
+    workers=1,
+    combined=False,
+    id_columns=(),
+):
+    """
+    Shared run_batch() of the statement parsers: load(path) every input (in a process
+    pool when workers > 1), merge them with merge_transactions(id_columns), then per
+    period (or once when combined) categorize(rows) -> summary and
+    write_output(path, rows, summary) into output_dir/output_name(label). Each input
+    is logged with append_log(). Returns [(output name, output path, rows)].
+    """
+    loaded = load_statements(input_paths, load, workers)
+    inputs, frames = [], []
+    for input_path, df, error, log in loaded:
+        print(log, end="")
+        in_name = Path(input_path).name
+        if not error and df.empty:
+            error = f"No transactions parsed from {source} statement"
+        if error:
+            print(f"   ❌ {in_name}: {error}")
+            append_log(in_name, "", error)
+            continue
+        inputs.append(in_name)
+        frames.append(df)
+    if not frames:
+        raise ValueError(f"No transactions parsed from {source} statements")
+
+    txns_df = merge_transactions(frames, id_columns)
+    outputs = []
+    for label, period_df in split_periods(txns_df, combined):
+        # categorize() adds columns; work on a copy, not a view of txns_df.
+        period_df = period_df.copy()
+        summary_df = categorize(period_df)
+        out_name = output_name(label)
+        output_path = os.path.join(output_dir, out_name)
+        write_output(output_path, period_df, summary_df)
+        outputs.append((out_name, output_path, len(period_df)))
+
+    for in_name, df in zip(inputs, frames):
+        labels = input_labels(df["Period"], txns_df, combined)
+        append_log(in_name, ", ".join(output_name(label) for label in labels), "")
+    return outputs
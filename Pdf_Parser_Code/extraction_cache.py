@@ -0,0 +1,158 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+
+import pdfplumber
+
+# Suppress noisy pdfminer warnings
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+PROJECT_DIR = os.path.expanduser(
+    "~/Library/CloudStorage/OneDrive-Personal/Personal/Finance/projects/Monthly_Fin_Tracker"
+)
+CACHE_DIR = os.path.join(PROJECT_DIR, "Output", ".cache")
+
+# Every parser calls extract_text()/extract_tables()/extract_words() with pdfplumber defaults.
+# Bump this if any call site starts passing settings, so old cache entries are not reused.
+EXTRACTION_SETTINGS = {"text": "default", "tables": "default", "words": "default"}
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def cache_key(pdf_sha256):
+    """PDF content hash + pdfplumber version + extraction settings."""
+    settings = json.dumps(EXTRACTION_SETTINGS, sort_keys=True)
+    raw = f"{pdf_sha256}|pdfplumber={pdfplumber.__version__}|{settings}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CachedPage:
+    """Page-like object: extractions come from the on-disk cache, else from pdfplumber once."""
+
+    def __init__(self, doc, index):
+        self._doc = doc
+        self.page_number = index + 1
+        self._index = index
+
+    def _get(self, kind):
+        entry = self._doc._entries.setdefault(str(self._index), {})
+        if kind in entry:
+            return entry[kind]
+        page = self._doc._pdf_pages()[self._index]
+        if kind == "text":
+            value = page.extract_text()
+        elif kind == "tables":
+            value = page.extract_tables()
+        elif kind == "profile":
+            # Object counts straight from the content stream; no text layout analysis.
+            value = {"chars": len(page.chars), "images": len(page.images)}
+        else:
+            value = page.extract_words()
+        entry[kind] = value
+        self._doc._dirty = True
+        return value
+
+    def extract_text(self):
+        return self._get("text")
+
+    def extract_tables(self):
+        return self._get("tables")
+
+    def extract_words(self):
+        return self._get("words")
+
+    def page_profile(self):
+        """{"chars": n, "images": n} for routing a page to text/table vs OCR extraction."""
+        return self._get("profile")
+
+
+class CachedPdf:
+    """
+    Drop-in for `pdfplumber.open(path)` used by the parsers.
+
+    Results are stored under Output/.cache as gzipped JSON keyed by the PDF's SHA-256,
+    so a re-run after a mapping change never redoes pdfplumber layout analysis.
+    The PDF itself is only opened when a page/extraction is missing from the cache.
+    """
+
+    def __init__(self, pdf_path, cache_dir=CACHE_DIR):
+        self.path = str(pdf_path)
+        self.sha256 = file_sha256(self.path)
+        self._cache_file = os.path.join(cache_dir, f"{cache_key(self.sha256)}.json.gz") if cache_dir else None
+        self._pdf = None
+        self._dirty = False
+        self._page_count = None
+        self._entries = {}
+        self._pages = None
+        self._load()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _load(self):
+        if not self._cache_file or not os.path.exists(self._cache_file):
+            return
+        try:
+            with gzip.open(self._cache_file, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            self._page_count = int(data["page_count"])
+            self._entries = data.get("pages") or {}
+        except Exception:
+            # Corrupt/partial cache file: ignore it and extract again.
+            self._page_count = None
+            self._entries = {}
+
+    def _pdf_pages(self):
+        if self._pdf is None:
+            self._pdf = pdfplumber.open(self.path)
+        return self._pdf.pages
+
+    @property
+    def pages(self):
+        if self._pages is None:
+            if self._page_count is None:
+                self._page_count = len(self._pdf_pages())
+                self._dirty = True
+            self._pages = [CachedPage(self, i) for i in range(self._page_count)]
+        return self._pages
+
+    def save(self):
+        if not self._dirty or not self._cache_file:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._cache_file), exist_ok=True)
+            tmp = f"{self._cache_file}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                json.dump(
+                    {"page_count": self._page_count, "pages": self._entries},
+                    f,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp, self._cache_file)
+            self._dirty = False
+        except Exception as e:
+            print(f"   ⚠️ Could not write extraction cache for {os.path.basename(self.path)}: {e}")
+
+    def close(self):
+        self.save()
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+
+def open_pdf(pdf_path, cache_dir=CACHE_DIR):
+    """Open a statement PDF through the extraction cache (pass cache_dir=None to bypass it)."""
+    return CachedPdf(pdf_path, cache_dir=cache_dir)
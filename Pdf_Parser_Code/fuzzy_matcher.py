@@ -0,0 +1,71 @@
+from bisect import bisect_left, bisect_right
+from difflib import SequenceMatcher
+
+from keyword_matcher import KeywordAutomaton
+
+
+class FuzzyRuleSet(list):
+    """
+    Rules whose first field is a lowercased keyword, indexed for best_match().
+
+    best_match() gives the same answer as scoring every rule with
+        1.0 if kw in desc or desc in kw else SequenceMatcher(None, kw, desc).ratio()
+    and keeping the first rule with the highest score, but skips most rules:
+    - containment (score 1.0) is found via an automaton / length filter, and the
+      earliest containing rule can never be beaten;
+    - otherwise only keywords whose length allows a ratio >= threshold are
+      scored (real_quick_ratio bound), quick_ratio (shared character counts)
+      prunes the rest before the full ratio() is computed.
+    """
+
+    def __init__(self, rules=()):
+        super().__init__(rules)
+        keywords = [rule[0] for rule in self]
+        self.automaton = KeywordAutomaton(keywords)
+        # (len(kw), index) sorted, for length-window candidate lookup.
+        self.by_length = sorted((len(kw), i) for i, kw in enumerate(keywords))
+        self.lengths = [length for length, _ in self.by_length]
+
+    def _indexes_with_length(self, low, high):
+        lo = bisect_left(self.lengths, low)
+        hi = bisect_right(self.lengths, high)
+        return sorted(i for _, i in self.by_length[lo:hi])
+
+    def best_match(self, desc, threshold):
+        """Index of the first best-scoring rule if its score >= threshold, else None."""
+        contained = self.automaton.first_match(desc)
+        # desc in kw is only possible for keywords at least as long as desc.
+        for i in self._indexes_with_length(len(desc), float("inf")):
+            if contained is not None and i >= contained:
+                break
+            if desc in self[i][0]:
+                contained = i
+                break
+        if contained is not None:
+            return contained
+
+        # ratio = 2*M/(la+lb) <= 2*min(la, lb)/(la+lb), so la must lie in this window.
+        lb = len(desc)
+        if threshold <= 0:
+            candidates = range(len(self))
+        else:
+            # Small margin so float rounding never drops a keyword right on the boundary.
+            low = threshold * lb / (2 - threshold) - 1e-9
+            high = lb * (2 - threshold) / threshold + 1e-9
+            candidates = self._indexes_with_length(low, high)
+
+        matcher = SequenceMatcher(None)
+        matcher.set_seq2(desc)
+        best, best_score = None, 0.0
+        for i in candidates:
+            matcher.set_seq1(self[i][0])
+            # A later rule only wins with a strictly higher score.
+            if best is None:
+                if matcher.real_quick_ratio() < threshold or matcher.quick_ratio() < threshold:
+                    continue
+            elif matcher.real_quick_ratio() <= best_score or matcher.quick_ratio() <= best_score:
+                continue
+            score = matcher.ratio()
+            if score >= threshold and score > best_score:
+                best, best_score = i, score
+        return best
@@ -0,0 +1,94 @@
+from collections import deque
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a list of keywords.
+
+    first_match(text) returns the lowest keyword index that occurs anywhere in
+    `text` (the same answer as scanning the list with `keyword in text` and
+    stopping at the first hit), in one pass over the text regardless of how many
+    keywords there are. all_matches(text) returns every keyword index found.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = list(keywords)
+        # Node 0 is the root. _goto[n] maps a char to the next node.
+        self._goto = [{}]
+        self._fail = [0]
+        # Lowest keyword index ending at this node or any node on its fail chain.
+        self._best = [None]
+        # All keyword indexes ending at this node or any node on its fail chain.
+        self._out = [()]
+        # "" is in every text (as with `"" in text`), so it is matched outside the trie.
+        self._empty = tuple(index for index, keyword in enumerate(self.keywords) if not keyword)
+        for index, keyword in enumerate(self.keywords):
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._best.append(None)
+                    self._out.append(())
+                node = nxt
+            if self._best[node] is None:
+                self._best[node] = index
+            self._out[node] = self._out[node] + (index,)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                # BFS order: the fail target is shallower, so its outputs are final already.
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def first_match(self, text):
+        """Lowest index of a keyword contained in `text`, or None."""
+        goto = self._goto
+        fail = self._fail
+        best_at = self._best
+        best = self._empty[0] if self._empty else None
+        if best == 0:
+            return best
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            found = best_at[node]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+    def all_matches(self, text):
+        """Set of indexes of every keyword contained in `text`."""
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set(self._empty)
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found.update(out[node])
+        return found
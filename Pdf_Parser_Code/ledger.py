@@ -0,0 +1,373 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from extraction_cache import PROJECT_DIR, file_sha256
+
+LEDGER_FILE = os.path.join(PROJECT_DIR, "Output", "Finance_Ledger.sqlite")
+MANIFEST_FILE = os.path.join(PROJECT_DIR, "Logs", "Processed_Files_Manifest.json")
+# run_all closes CC and SB ledgers from separate threads; saves merge one at a time.
+_MANIFEST_SAVE_LOCK = threading.Lock()
+
+# Bumped when SCHEMA changes in a way _migrate() has to apply to existing ledgers.
+SCHEMA_VERSION = 1
+
+STATEMENTS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    config TEXT NOT NULL DEFAULT '',
+    file_name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    ingested_at TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    UNIQUE (source, sha256, parser_version, config)
+);
+"""
+
+SCHEMA = STATEMENTS_TABLE.format(name="statements") + """
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    statement_id INTEGER NOT NULL REFERENCES statements(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    account TEXT,
+    period TEXT,
+    date TEXT,
+    description TEXT,
+    amount REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_transactions_account_period ON transactions (account, period);
+CREATE INDEX IF NOT EXISTS ix_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS ix_transactions_statement ON transactions (statement_id, seq);
+"""
+
+
+# transactions column -> record key it is filled from.
+TRANSACTION_FIELDS = {
+    "account": "Account",
+    "period": "Period",
+    "date": "Date",
+    "description": "Description",
+    "amount": "Amount",
+}
+
+
+def _json_default(value):
+    # Tagged so decode() gives back the same type; datetime is checked before its base class date.
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return {"$timestamp": value.isoformat()}
+    if isinstance(value, datetime):
+        return {"$datetime": value.isoformat()}
+    if isinstance(value, date):
+        return {"$date": value.isoformat()}
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    raise TypeError(f"Cannot store {type(value).__name__} in the ledger")
+
+
+def _json_object_hook(obj):
+    if len(obj) == 1:
+        if "$timestamp" in obj:
+            return pd.Timestamp(obj["$timestamp"])
+        if "$datetime" in obj:
+            return datetime.fromisoformat(obj["$datetime"])
+        if "$date" in obj:
+            return date.fromisoformat(obj["$date"])
+    return obj
+
+
+def encode(value):
+    """JSON text for a record/payload; NaN, dates and numpy scalars survive decode()."""
+    return json.dumps(value, default=_json_default, ensure_ascii=False, separators=(",", ":"))
+
+
+def decode(text):
+    return json.loads(text, object_hook=_json_object_hook)
+
+
+def _text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _amount(value):
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if amount != amount else amount
+
+
+class FileManifest(dict):
+    """
+    abs path -> what was last seen of a statement file: size, mtime, content hash,
+    parser (ledger source + version) and the ledger statement holding its records.
+
+    Kept as JSON under Logs/ so it can be read by hand. A file whose size and mtime
+    are unchanged is not read again to hash it.
+    """
+
+    def __init__(self, path=MANIFEST_FILE):
+        super().__init__()
+        self.path = path
+        self._changed = set()
+        self.update(self._read())
+
+    def _read(self):
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("files") or {}
+        except Exception:
+            # Corrupt/partial manifest: every file is simply hashed again.
+            return {}
+
+    def content_hash(self, file_path):
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        entry = self.get(key)
+        if entry and entry.get("size") == st.st_size and entry.get("mtime_ns") == st.st_mtime_ns:
+            return entry["sha256"]
+        return file_sha256(key)
+
+    def record(self, file_path, sha256, source, parser_version, statement_id, transactions):
+        key = os.path.abspath(file_path)
+        st = os.stat(key)
+        entry = {
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": sha256,
+            "parser": source,
+            "parser_version": str(parser_version),
+            "statement_id": statement_id,
+            "transactions": transactions,
+        }
+        if self.get(key) != entry:
+            self[key] = entry
+            self._changed.add(key)
+
+    def save(self):
+        """Write the entries changed here on top of the file's current content."""
+        if not self._changed or not self.path:
+            return
+        try:
+            with _MANIFEST_SAVE_LOCK:
+                files = self._read()
+                files.update({key: self[key] for key in self._changed})
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"files": files}, f, ensure_ascii=False, indent=1, sort_keys=True)
+                os.replace(tmp, self.path)
+            self._changed.clear()
+        except Exception as e:
+            print(f"   ⚠️ Could not write processed-file manifest {os.path.basename(self.path)}: {e}")
+
+
+class Ledger:
+    """
+    SQLite store of every statement ingested by the parsers.
+
+    statements holds one row per (source, file SHA-256, parser version, config) with the
+    statement-level payload (log, balances, due amounts, ...); transactions holds
+    its records in parse order, with Account/Period/Date/Description/Amount as
+    queryable columns and the full record as JSON. A statement found here with the
+    same config (fingerprint of the mapping sheets extraction reads) is not parsed
+    again. Files looked up or ingested are noted in the FileManifest.
+
+    Ledger(None) keeps everything in memory, for runs that should not touch the files.
+    """
+
+    def __init__(self, path=LEDGER_FILE, manifest_file=MANIFEST_FILE):
+        self.path = path
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # run_all ingests CC, SB and UPI statements concurrently; wait out the others' writes.
+        self.conn = sqlite3.connect(path or ":memory:", timeout=60)
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.manifest = FileManifest(manifest_file if path else None)
+
+    def _migrate(self):
+        (version,) = self.conn.execute("PRAGMA user_version").fetchone()
+        if version >= SCHEMA_VERSION:
+            return
+        (table_sql,) = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'statements'"
+        ).fetchone()
+        if "parser_version, config)" not in table_sql:
+            # Version 0 keyed statements without config, so a mapping change replaced the
+            # stored statement. Rebuild the table with the new key; foreign keys are off
+            # until the transactions' parent table is back under its own name.
+            self.conn.executescript(
+                "BEGIN;"
+                + STATEMENTS_TABLE.format(name="statements_new")
+                + "INSERT INTO statements_new SELECT * FROM statements;"
+                "DROP TABLE statements;"
+                "ALTER TABLE statements_new RENAME TO statements;"
+                "COMMIT;"
+            )
+        self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def close(self):
+        self.manifest.save()
+        self.conn.close()
+
+    def lookup(self, source, file_path, parser_version, config=""):
+        """
+        (content hash, find_statement() result) for a statement file; the hash is
+        None when the file cannot be read.
+        """
+        try:
+            sha256 = self.manifest.content_hash(file_path)
+        except OSError:
+            return None, None
+        statement = self.find_statement(source, sha256, parser_version, config)
+        if statement is not None:
+            self._note_file(file_path, sha256, source, parser_version, statement[0])
+        return sha256, statement
+
+    def _note_file(self, file_path, sha256, source, parser_version, statement_id):
+        (transactions,) = self.conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE statement_id = ?", (statement_id,)
+        ).fetchone()
+        try:
+            self.manifest.record(file_path, sha256, source, parser_version, statement_id, transactions)
+        except OSError:
+            pass
+
+    def find_statement(self, source, sha256, parser_version, config=""):
+        """(statement id, payload) if this file was ingested with the same parser and config, else None."""
+        row = self.conn.execute(
+            "SELECT id, payload FROM statements"
+            " WHERE source = ? AND sha256 = ? AND parser_version = ? AND config = ?",
+            (source, sha256, str(parser_version), config),
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], decode(row[1])
+
+    def records(self, statement_id):
+        """Records of one statement, in the order they were ingested."""
+        rows = self.conn.execute(
+            "SELECT record FROM transactions WHERE statement_id = ? ORDER BY seq",
+            (statement_id,),
+        )
+        return [decode(record) for (record,) in rows]
+
+    def ingest(self, source, file_path, sha256, parser_version, records, payload, config="", fields=None):
+        """
+        Store one parsed statement (replacing an older ingest of the same file with the
+        same parser and config; other configs keep theirs) and return its id.
+        fields overrides TRANSACTION_FIELDS for records whose keys differ (e.g. raw exports).
+        """
+        fields = {**TRANSACTION_FIELDS, **(fields or {})}
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM statements"
+                " WHERE source = ? AND sha256 = ? AND parser_version = ? AND config = ?",
+                (source, sha256, str(parser_version), config),
+            )
+            cur = self.conn.execute(
+                "INSERT INTO statements"
+                " (source, sha256, parser_version, config, file_name, file_path, ingested_at, payload)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    source,
+                    sha256,
+                    str(parser_version),
+                    config,
+                    os.path.basename(file_path),
+                    str(file_path),
+                    datetime.now().isoformat(timespec="seconds"),
+                    encode(payload),
+                ),
+            )
+            statement_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO transactions"
+                " (statement_id, seq, account, period, date, description, amount, record)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        statement_id,
+                        seq,
+                        _text(r.get(fields["account"])),
+                        _text(r.get(fields["period"])),
+                        _text(r.get(fields["date"])),
+                        _text(r.get(fields["description"])),
+                        _amount(r.get(fields["amount"])),
+                        encode(r),
+                    )
+                    for seq, r in enumerate(records)
+                ),
+            )
+        self._note_file(file_path, sha256, source, parser_version, statement_id)
+        return statement_id
+
+
+def frame_payload(df):
+    """Column order and dtypes of `df`, so frame_from_records() can rebuild it from its records."""
+    return {"columns": [str(c) for c in df.columns], "dtypes": [str(t) for t in df.dtypes]}
+
+
+def frame_from_records(records, payload):
+    df = pd.DataFrame(records, columns=payload["columns"])
+    for col, dtype in zip(payload["columns"], payload["dtypes"]):
+        try:
+            df[col] = df[col].astype(dtype)
+        except (TypeError, ValueError):
+            pass
+    return df
+
+
+def ingested_frame(source, parser_version, path, extract, ledger_file=LEDGER_FILE, config="", fields=None):
+    """
+    extract(path) -> DataFrame, through the ledger: a file already ingested is
+    rebuilt from its stored rows instead of being parsed again. A file that cannot be
+    hashed is left to extract(), which reports it in its own words.
+
+    Stored statements are keyed on (source, content sha256, parser_version, config),
+    as the CC and SB masters key their Ledger too. parser_version is the calling
+    module's PARSER_VERSION: bump it whenever what its extraction returns for a file
+    changes, and every statement ingested under the old version is parsed again.
+    config does the same for mapping sheets that feed the extraction.
+    """
+    with Ledger(ledger_file) as ledger:
+        sha, statement = ledger.lookup(source, path, parser_version, config)
+        if sha is None:
+            return extract(path)
+        if statement is None:
+            df = extract(path)
+            ledger.ingest(
+                source, path, sha, parser_version, df.to_dict("records"), frame_payload(df), config, fields
+            )
+            statement = ledger.find_statement(source, sha, parser_version, config)
+        statement_id, payload = statement
+        return frame_from_records(ledger.records(statement_id), payload)
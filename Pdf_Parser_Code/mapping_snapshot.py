@@ -0,0 +1,125 @@
+import hashlib
+import os
+import pickle
+
+import pandas as pd
+
+from extraction_cache import CACHE_DIR, file_sha256
+
+SNAPSHOT_DIR = os.path.join(CACHE_DIR, "mapping")
+# Bump to drop every stored snapshot (e.g. if read_excel options change).
+SNAPSHOT_VERSION = 1
+
+# abs path -> snapshot dict, re-validated against the file's stat on each call.
+_SNAPSHOTS = {}
+# (workbook sha256, table name) -> compiled rule table built from the snapshot.
+_TABLES = {}
+
+
+def _stat_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _snapshot_file(path, cache_dir):
+    name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, f"{name}.pkl")
+
+
+def _read_snapshot(snapshot_file):
+    try:
+        with open(snapshot_file, "rb") as f:
+            data = pickle.load(f)
+        if data.get("version") != SNAPSHOT_VERSION or data.get("pandas") != pd.__version__:
+            return None
+        return data
+    except Exception:
+        return None
+
+
+def _write_snapshot(snapshot_file, data):
+    try:
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+        tmp = f"{snapshot_file}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, snapshot_file)
+    except Exception as e:
+        print(f"   ⚠️ Could not write mapping snapshot for {os.path.basename(snapshot_file)}: {e}")
+
+
+def load_snapshot(path, cache_dir=SNAPSHOT_DIR):
+    """
+    {"sha256": ..., "sheets": {sheet name: DataFrame}} for the workbook at `path`.
+
+    Every sheet is parsed once with pd.read_excel and pickled under
+    Output/.cache/mapping. A stored snapshot is reused while the file's
+    mtime/size are unchanged; if only the mtime moved (copy, OneDrive sync)
+    the content hash decides. Pass cache_dir=None to skip the on-disk copy.
+    """
+    path = os.path.abspath(path)
+    stat = _stat_key(path)
+    snap = _SNAPSHOTS.get(path)
+    if snap is not None and snap["stat"] == stat:
+        return snap
+
+    snapshot_file = _snapshot_file(path, cache_dir) if cache_dir else None
+    if snap is None and snapshot_file:
+        snap = _read_snapshot(snapshot_file)
+
+    if snap is None or snap["stat"] != stat:
+        sha = file_sha256(path)
+        if snap is None or snap["sha256"] != sha:
+            snap = {
+                "version": SNAPSHOT_VERSION,
+                "pandas": pd.__version__,
+                "sha256": sha,
+                "sheets": pd.read_excel(path, sheet_name=None),
+            }
+        snap["stat"] = stat
+        if snapshot_file:
+            _write_snapshot(snapshot_file, snap)
+
+    _SNAPSHOTS[path] = snap
+    return snap
+
+
+def sheet_names(path):
+    """Sheet names in workbook order, like pd.ExcelFile(path).sheet_names."""
+    return list(load_snapshot(path)["sheets"])
+
+
+def read_sheet(path, sheet_name):
+    """Copy of one sheet, as pd.read_excel(path, sheet_name=sheet_name) would return it."""
+    sheets = load_snapshot(path)["sheets"]
+    if sheet_name not in sheets:
+        raise ValueError(f"Worksheet named '{sheet_name}' not found")
+    return sheets[sheet_name].copy()
+
+
+def sheets_fingerprint(path, names):
+    """
+    Content hash of the named sheets only, so edits to other sheets of the same
+    workbook leave it unchanged. Missing sheets (or workbook) hash as missing.
+    """
+    h = hashlib.sha256()
+    sheets = load_snapshot(path)["sheets"] if os.path.exists(path) else {}
+    for name in names:
+        h.update(f"\0{name}\0".encode("utf-8"))
+        df = sheets.get(name)
+        h.update(b"<missing>" if df is None else df.to_csv(index=False).encode("utf-8"))
+    return h.hexdigest()
+
+
+def compiled_table(path, name, build):
+    """
+    Rule table `name` built by build() from this workbook, memoised per run
+    until the workbook content changes. build() should read via read_sheet().
+
+    Compiled tables are kept in memory only: their classes live in the parser
+    scripts (often run as __main__), so they are not pickled with the snapshot.
+    """
+    key = (load_snapshot(path)["sha256"], name)
+    if key not in _TABLES:
+        _TABLES[key] = build()
+    return _TABLES[key]
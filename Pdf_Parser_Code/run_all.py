@@ -0,0 +1,341 @@
+import argparse
+import io
+import os
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from fnmatch import fnmatch
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, CODE_DIR)
+for _sub_dir in ("CC_Parser", "SB_Parser_Code", "UPI_Parser_Code"):
+    sys.path.insert(0, os.path.join(CODE_DIR, _sub_dir))
+
+import Credit_Card_Master_Parser as cc_master
+import MobiKwik_Parser
+import Paytm_Parser
+import PhonePe_Parser
+import SB_Master_Parser as sb_master
+from mapping_snapshot import load_snapshot
+from sandbox import STATEMENT_MAX_RSS_MB, STATEMENT_TIMEOUT_SECONDS
+from statement_files import walk_statement_folders
+
+STATEMENTS_DIR = os.path.join(cc_master.PROJECT_DIR, "Bank_Statements")
+
+# Pipelines in the order they are refreshed. CC and SB regenerate one master workbook from
+# all their statements; the UPI parsers merge all theirs into one workbook per period (run_batch).
+PIPELINES = ("CC", "SB", "PhonePe", "MobiKwik", "Paytm")
+UPI_PIPELINES = {"PhonePe": PhonePe_Parser, "MobiKwik": MobiKwik_Parser, "Paytm": Paytm_Parser}
+# UPI inputs sit directly in UPI Statements/ and are told apart by name, like each parser's --batch glob.
+UPI_PATTERNS = {"PhonePe": "PhonePe*.pdf", "MobiKwik": "MobiKwik*.pdf", "Paytm": Paytm_Parser.BATCH_PATTERN}
+
+
+def _within(path, base):
+    return path == base or path.startswith(base + os.sep)
+
+
+def discover_statements(root=STATEMENTS_DIR):
+    """
+    {pipeline: [input paths]} from one walk of Bank_Statements/, skipping archive folders.
+    CC/SB paths come out in the same order as list_statement_pdfs(); UPI inputs sorted.
+    """
+    found = {pipeline: [] for pipeline in PIPELINES}
+    cc_dir = os.path.abspath(cc_master.BASE_DIR)
+    sb_dir = os.path.abspath(sb_master.BASE_DIR)
+    upi_dir = os.path.abspath(PhonePe_Parser.INPUT_DIR)
+    for dirpath, files in walk_statement_folders(root):
+        here = os.path.abspath(dirpath)
+        for name in files:
+            path = os.path.join(dirpath, name)
+            if _within(here, cc_dir) and name.lower().endswith(".pdf"):
+                found["CC"].append(path)
+            elif _within(here, sb_dir) and name.lower().endswith(".pdf"):
+                found["SB"].append(path)
+            elif here == upi_dir and not name.startswith("~$"):
+                # "~$..." are Office lock files left next to open workbooks.
+                for pipeline, pattern in UPI_PATTERNS.items():
+                    if fnmatch(name, pattern):
+                        found[pipeline].append(path)
+                        break
+    for pipeline in UPI_PATTERNS:
+        found[pipeline].sort()
+    return found
+
+
+def stat_statements(statements):
+    """{pipeline: {path: (size, mtime_ns)}}; files that vanish mid-scan are left out."""
+    stats = {}
+    for pipeline, paths in statements.items():
+        stats[pipeline] = {}
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[pipeline][path] = (st.st_size, st.st_mtime_ns)
+    return stats
+
+
+def load_mappings():
+    """
+    Parse the mapping workbooks and compile their rule tables once, before any work
+    starts. Pipelines then hit the in-memory snapshot, and forked pool workers
+    inherit it. A missing or broken workbook is left for its pipeline to report.
+    """
+    loaders = (
+        lambda: load_snapshot(cc_master.MAPPING_FILE),
+        lambda: load_snapshot(sb_master.MAPPING_FILE),
+        cc_master.load_mapping,
+        sb_master.load_sb_mapping_rules,
+        lambda: sb_master.load_bank_name_map(sb_master.MAPPING_FILE),
+        PhonePe_Parser.load_category_mapping,
+        lambda: Paytm_Parser.load_paytm_mapping(Paytm_Parser.DEFAULT_MAPPING_FILE),
+    )
+    for loader in loaders:
+        try:
+            loader()
+        except Exception:
+            pass
+
+
+def run_upi(pipeline, paths):
+    """A UPI pipeline's inputs -> its per-period workbooks; run_batch() logs each input file."""
+    # Inside a pool worker already, so the batch parses its statements serially.
+    for output_name, output_path, rows in UPI_PIPELINES[pipeline].run_batch(paths):
+        print(f"   ✅ {output_name} -> {output_path} ({rows} rows)")
+
+
+def run_upi_job(pipeline, paths):
+    """run_upi() in a pool worker: (printed output, error text or '')."""
+    out = io.StringIO()
+    error = ""
+    with redirect_stdout(out):
+        try:
+            run_upi(pipeline, paths)
+        except Exception as e:
+            error = str(e)
+            print(traceback.format_exc(), end="")
+    return out.getvalue(), error
+
+
+class PipelineOutput:
+    """
+    sys.stdout while CC and SB run on their own threads: what a thread prints after
+    capture() is kept for it, so each pipeline's log is printed in one piece.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+
+    def capture(self):
+        self._local.buffer = io.StringIO()
+        return self._local.buffer
+
+    def write(self, text):
+        return (getattr(self._local, "buffer", None) or self.stream).write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+def _run_captured(output, run):
+    buffer = output.capture()
+    error = ""
+    try:
+        run()
+    except Exception as e:
+        error = str(e)
+        print(traceback.format_exc(), end="")
+    return buffer.getvalue(), error
+
+
+def _upi_jobs(changed, statements):
+    """
+    [(pipeline, paths, label)] of UPI work for a refresh: every input of each changed
+    pipeline, as its periods are rebuilt from all of them (the ledger keeps unchanged
+    ones from being parsed again).
+    """
+    jobs = []
+    for pipeline in UPI_PATTERNS:
+        if pipeline not in changed:
+            continue
+        paths = [path for path in statements[pipeline] if os.path.exists(path)]
+        if paths:
+            jobs.append((pipeline, paths, f"{pipeline}: {len(paths)} file(s)"))
+    return jobs
+
+
+def refresh(
+    changed,
+    statements,
+    pool=None,
+    workers=1,
+    timeout=None,
+    max_rss_mb=None,
+):
+    """
+    Regenerate the outputs for {pipeline: changed paths}; `statements` is the
+    discover_statements() result the CC/SB masters rebuild from (the ledger keeps
+    unchanged statements from being parsed again).
+
+    With a shared process `pool` of `workers` processes, every UPI job is queued on it
+    at once and CC and SB each keep a few statements per worker queued ahead of their
+    merge, which runs on its own thread; each workbook is written as soon as its own
+    inputs are done. Without one, pipelines run one after another.
+    A failing pipeline is reported and the others carry on. New CC/SB statements are
+    parsed under the optional `timeout`/`max_rss_mb` limits (see sandbox.py), on the
+    shared pool's workers like the rest.
+    """
+    load_mappings()
+    limits = {"timeout": timeout, "max_rss_mb": max_rss_mb}
+    run_cc = lambda: cc_master.aggregate(pdf_paths=statements["CC"], workers=workers, pool=pool, **limits)
+    run_sb = lambda: sb_master.main(pdf_paths=statements["SB"], workers=workers, pool=pool, **limits)
+
+    if pool is None:
+        for pipeline, run in (("CC", run_cc), ("SB", run_sb)):
+            if pipeline in changed:
+                try:
+                    run()
+                except Exception as e:
+                    print(f"   ❌ {pipeline} refresh failed: {e}")
+                    traceback.print_exc()
+        for pipeline, paths, label in _upi_jobs(changed, statements):
+            print(f"\n📄 {label}")
+            try:
+                run_upi(pipeline, paths)
+            except Exception as e:
+                print(f"   ❌ {label} refresh failed: {e}")
+                traceback.print_exc()
+        return
+
+    output = PipelineOutput(sys.stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            labels = {}
+            for pipeline, paths, label in _upi_jobs(changed, statements):
+                labels[pool.submit(run_upi_job, pipeline, paths)] = label
+            for pipeline, run in (("CC", run_cc), ("SB", run_sb)):
+                if pipeline in changed:
+                    labels[threads.submit(_run_captured, output, run)] = pipeline
+            for future in as_completed(labels):
+                try:
+                    log, error = future.result()
+                except Exception as e:
+                    log, error = "", str(e)
+                print(f"\n📄 {labels[future]}")
+                print(log, end="")
+                if error:
+                    print(f"   ❌ {labels[future]} refresh failed: {error}")
+    finally:
+        sys.stdout = output.stream
+
+
+def run_once(workers=1, timeout=None, max_rss_mb=None):
+    statements = discover_statements()
+    changed = {pipeline: set(paths) for pipeline, paths in statements.items()}
+    if workers <= 1:
+        refresh(changed, statements, timeout=timeout, max_rss_mb=max_rss_mb)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        refresh(changed, statements, pool, workers, timeout, max_rss_mb)
+
+
+def watch(
+    interval=5.0,
+    debounce=10.0,
+    workers=1,
+    timeout=None,
+    max_rss_mb=None,
+):
+    """
+    Poll the statement folders every `interval` seconds. New, changed or removed
+    files mark their pipeline; outputs are regenerated once nothing has changed for
+    `debounce` seconds, so a batch of dropped PDFs (or a slow copy) triggers one
+    refresh. The first poll sees every file as new, so outputs start up to date.
+    """
+    print(f"👀 Watching statement folders every {interval:g}s (debounce {debounce:g}s); Ctrl+C to stop.")
+    previous = {}
+    pending = {}
+    last_change = None
+    try:
+        while True:
+            statements = discover_statements()
+            current = stat_statements(statements)
+            for pipeline, files in current.items():
+                before = previous.get(pipeline, {})
+                changed = {path for path, st in files.items() if before.get(path) != st}
+                removed = set(before) - set(files)
+                if changed or removed:
+                    pending.setdefault(pipeline, set()).update(changed)
+                    last_change = time.monotonic()
+            previous = current
+
+            if pending and time.monotonic() - last_change >= debounce:
+                summary = ", ".join(f"{p}: {len(pending[p])}" for p in PIPELINES if p in pending)
+                print(f"\n🔄 Changes detected ({summary}); refreshing outputs")
+                if workers <= 1:
+                    refresh(pending, statements, timeout=timeout, max_rss_mb=max_rss_mb)
+                else:
+                    # A fresh pool per refresh, so a worker lost in one refresh cannot break the next.
+                    with ProcessPoolExecutor(max_workers=workers) as pool:
+                        refresh(pending, statements, pool, workers, timeout, max_rss_mb)
+                pending = {}
+                print("\n👀 Waiting for new statements...")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description="Refresh the CC, SB and UPI outputs from Bank_Statements/.")
+    arg_parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep polling the statement folders and refresh outputs when files are added or changed.",
+    )
+    arg_parser.add_argument(
+        "--interval",
+        type=float,
+        default=5.0,
+        help="Seconds between folder polls in --watch mode (default: 5).",
+    )
+    arg_parser.add_argument(
+        "--debounce",
+        type=float,
+        default=10.0,
+        help="Seconds without further changes before outputs are regenerated (default: 10).",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Share N worker processes between all pipelines (default: 1, serial in this process).",
+    )
+    arg_parser.add_argument(
+        "--timeout",
+        type=float,
+        nargs="?",
+        const=STATEMENT_TIMEOUT_SECONDS,
+        help=f"Abandon a CC/SB statement still parsing after this many seconds (off by default; {STATEMENT_TIMEOUT_SECONDS} if given without a value).",
+    )
+    arg_parser.add_argument(
+        "--max-rss-mb",
+        type=float,
+        nargs="?",
+        const=STATEMENT_MAX_RSS_MB,
+        help=f"Abandon a CC/SB statement whose parser grows by more than this many MB (off by default; {STATEMENT_MAX_RSS_MB} if given without a value).",
+    )
+    args = arg_parser.parse_args()
+    limits = {"timeout": args.timeout, "max_rss_mb": args.max_rss_mb}
+    if args.watch:
+        watch(interval=args.interval, debounce=args.debounce, workers=args.workers, **limits)
+    else:
+        run_once(workers=args.workers, **limits)
@@ -0,0 +1,144 @@
+import multiprocessing
+import multiprocessing.connection
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from extraction_cache import PROJECT_DIR
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+ERROR_DIR = os.path.join(PROJECT_DIR, "Error")
+ERROR_LOG_FILE = os.path.join(ERROR_DIR, "Failed_Statements_log.txt")
+
+# Limits are opt-in (--timeout / --max-rss-mb); these are what the flags use when
+# given without a value. A statement still parsing after this many seconds is
+# abandoned, so a month-end run finishes in bounded time whatever the bank sent.
+STATEMENT_TIMEOUT_SECONDS = 300
+# Same for a parse whose process grows by more than this resident memory (MB).
+STATEMENT_MAX_RSS_MB = 2048
+# Abandoned statements are always logged to ERROR_LOG_FILE; True also moves the PDF
+# to Error/<source>/, so later runs stop retrying it.
+MOVE_FAILED_STATEMENTS = False
+
+_POLL_SECONDS = 0.2
+# Exit code of a sandboxed process that stopped itself at the RSS ceiling.
+_RSS_EXIT_CODE = 86
+
+
+class StatementLimitError(RuntimeError):
+    """A statement's process ran past the timeout or RSS ceiling and was stopped."""
+
+
+def _rss_mb():
+    """Current RSS where /proc has it (Linux), else the peak RSS so far."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, kilobytes elsewhere.
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def _watch_rss(baseline_mb, max_rss_mb):
+    while True:
+        if _rss_mb() - baseline_mb > max_rss_mb:
+            os._exit(_RSS_EXIT_CODE)
+        time.sleep(_POLL_SECONDS)
+
+
+def _sandbox_main(conn, fn, args, max_rss_mb):
+    if max_rss_mb and resource is not None:
+        # Only this statement's growth counts, not what a forked child shares with its parent.
+        baseline_mb = _rss_mb()
+        threading.Thread(target=_watch_rss, args=(baseline_mb, max_rss_mb), daemon=True).start()
+    try:
+        outcome = (True, fn(*args))
+    except BaseException as e:
+        outcome = (False, f"{type(e).__name__}: {e}")
+    conn.send(outcome)
+    conn.close()
+
+
+def run_sandboxed(fn, args=(), timeout=None, max_rss_mb=None):
+    """
+    fn(*args) in a child process of its own. The child is killed once it has run
+    `timeout` seconds, and stops itself once it has grown by `max_rss_mb`; either
+    raises StatementLimitError here. Any process can supervise one, so this runs
+    inline or as the task of a (shared) pool worker, which then stays usable.
+    """
+    context = multiprocessing.get_context()
+    reader, writer = context.Pipe(duplex=False)
+    process = context.Process(target=_sandbox_main, args=(writer, fn, args, max_rss_mb), daemon=True)
+    process.start()
+    writer.close()
+    deadline = time.monotonic() + timeout if timeout else None
+    try:
+        while True:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            ready = multiprocessing.connection.wait([reader, process.sentinel], remaining)
+            if reader in ready:
+                try:
+                    ok, value = reader.recv()
+                except EOFError:
+                    pass
+                else:
+                    process.join()
+                    if ok:
+                        return value
+                    raise RuntimeError(value)
+            if ready:
+                process.join()
+                if process.exitcode == _RSS_EXIT_CODE:
+                    raise StatementLimitError(f"exceeded the {max_rss_mb:g} MB memory ceiling")
+                raise RuntimeError(f"worker process exited with code {process.exitcode}")
+            if deadline is not None and time.monotonic() >= deadline:
+                process.kill()
+                process.join()
+                raise StatementLimitError(f"timed out after {timeout:g}s")
+    finally:
+        reader.close()
+
+
+def quarantine_statement(source, path, reason):
+    """
+    Log a statement abandoned by the sandbox to ERROR_LOG_FILE and, when
+    MOVE_FAILED_STATEMENTS is on, move it to Error/<source>/. Returns where it went.
+    """
+    now = datetime.now()
+    os.makedirs(ERROR_DIR, exist_ok=True)
+    destination = ""
+    if MOVE_FAILED_STATEMENTS and os.path.exists(path):
+        target_dir = os.path.join(ERROR_DIR, source)
+        os.makedirs(target_dir, exist_ok=True)
+        destination = os.path.join(target_dir, os.path.basename(path))
+        if os.path.exists(destination):
+            stem, suffix = Path(path).stem, Path(path).suffix
+            destination = os.path.join(target_dir, f"{stem}_{now.strftime('%Y%m%d_%H%M%S')}{suffix}")
+        shutil.move(path, destination)
+    line = (
+        f"Type: {source}, File Name: {os.path.basename(path)}, Date: {now.strftime('%Y-%m-%d %H:%M:%S')}, "
+        f"Moved to: {destination or 'Not moved'}, Errors: {reason}\n"
+    )
+    with open(ERROR_LOG_FILE, "a", encoding="utf-8") as f:
+        f.write(line)
+    return destination or ERROR_LOG_FILE
+
+
+def failure_text(source, path, error):
+    """Error text for a statement whose worker failed; sandbox-stopped ones are quarantined first."""
+    if isinstance(error, StatementLimitError):
+        try:
+            where = quarantine_statement(source, path, str(error))
+        except OSError as e:
+            return f"{error} (could not record it in {ERROR_DIR}: {e})"
+        return f"{error}; recorded in {where}"
+    return str(error)
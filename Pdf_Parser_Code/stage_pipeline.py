@@ -0,0 +1,163 @@
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sandbox import run_sandboxed
+
+# Statements submitted to the pool but not yet taken by the consumer, per worker.
+# Enough to keep every worker busy while the consumer merges one result.
+QUEUE_DEPTH_PER_WORKER = 2
+
+_END = object()
+
+
+class StageCounters:
+    """
+    Items and busy seconds per pipeline stage (extract, ledger, classify, write, ...),
+    plus the time the consumer sat waiting for extraction results.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.waited = 0.0
+
+    def add(self, stage, seconds, items=1):
+        counts = self.stages.setdefault(stage, [0, 0.0])
+        counts[0] += items
+        counts[1] += seconds
+
+    def time(self, stage, items=1):
+        return _StageTimer(self, stage, items)
+
+    def report(self):
+        """One line: "extract 12 in 3.41s (3.5/s), classify 12 in 0.08s (150.0/s), ...; waited 1.20s"."""
+        parts = []
+        for stage, (items, seconds) in self.stages.items():
+            rate = f" ({items / seconds:.1f}/s)" if seconds > 0 else ""
+            parts.append(f"{stage} {items} in {seconds:.2f}s{rate}")
+        return ", ".join(parts) + f"; waited {self.waited:.2f}s for extraction"
+
+
+class _StageTimer:
+    def __init__(self, counters, stage, items):
+        self.counters = counters
+        self.stage = stage
+        self.items = items
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.counters.add(self.stage, time.perf_counter() - self.start, self.items)
+        return False
+
+
+def _timed_call(fn, item, *args):
+    start = time.perf_counter()
+    result = fn(item, *args)
+    return time.perf_counter() - start, result
+
+
+def _limited_call(limits, fn, item, *args):
+    """_timed_call() with fn run by run_sandboxed() under limits (timeout, max_rss_mb)."""
+    start = time.perf_counter()
+    result = run_sandboxed(fn, (item, *args), *limits)
+    return time.perf_counter() - start, result
+
+
+class BoundedStage:
+    """
+    fn(item, *args) for each item, yielded in `items` order.
+
+    Runs inline when workers <= 1 and no pool is given; otherwise in `pool` (a shared
+    one, left running) or a pool of its own. With a `timeout` or `max_rss_mb`, each
+    item runs in a child process of whichever process would have run it, and is
+    stopped over those limits (see sandbox.run_sandboxed). Submission starts on
+    construction and keeps at most `depth` items submitted but not yet consumed: a
+    slow consumer holds back further submissions, so finished results waiting in
+    memory are bounded by the queue depth rather than by the number of statements.
+
+    on_error(item, exc) builds the result for an item whose worker failed instead of
+    raising: its process died (BrokenProcessPool) or went over the sandbox limits
+    (StatementLimitError, recorded in Error/ by sandbox.failure_text), so that file
+    is reported and the other statements carry on. Worker time is counted under
+    `stage`, the consumer's waits under counters.waited. Call close() (or exhaust
+    it) to stop an own pool.
+    """
+
+    def __init__(self, fn, items, args=(), workers=1, pool=None, on_error=None, counters=None,
+                 stage="extract", depth=None, timeout=None, max_rss_mb=None):
+        items = list(items)
+        self.fn = fn
+        self.args = tuple(args)
+        self.on_error = on_error
+        self.counters = counters if counters is not None else StageCounters()
+        self.stage = stage
+        self._items = iter(items)
+        self._pending = deque()
+        self._own_pool = None
+        self._limits = (timeout, max_rss_mb) if timeout or max_rss_mb else None
+        if pool is None and workers > 1 and len(items) > 1:
+            pool = self._own_pool = ProcessPoolExecutor(max_workers=workers)
+        self.pool = pool
+        self.depth = depth or QUEUE_DEPTH_PER_WORKER * max(workers, 1)
+        self._fill()
+
+    def _fill(self):
+        if self.pool is None:
+            return
+        while len(self._pending) < self.depth:
+            item = next(self._items, _END)
+            if item is _END:
+                return
+            try:
+                if self._limits is not None:
+                    task = self.pool.submit(_limited_call, self._limits, self.fn, item, *self.args)
+                else:
+                    task = self.pool.submit(_timed_call, self.fn, item, *self.args)
+            except Exception as e:
+                # Pool already broken/shut down: report this item like a failed worker.
+                task = e
+            self._pending.append((item, task))
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.pool is None:
+            item = next(self._items)
+            if self._limits is None:
+                with self.counters.time(self.stage):
+                    return self.fn(item, *self.args)
+            try:
+                seconds, result = _limited_call(self._limits, self.fn, item, *self.args)
+            except Exception as e:
+                if self.on_error is None:
+                    raise
+                return self.on_error(item, e)
+            self.counters.add(self.stage, seconds)
+            return result
+        if not self._pending:
+            self.close()
+            raise StopIteration
+        item, task = self._pending.popleft()
+        start = time.perf_counter()
+        try:
+            if isinstance(task, Exception):
+                raise task
+            seconds, result = task.result()
+            self.counters.add(self.stage, seconds)
+        except Exception as e:
+            if self.on_error is None:
+                raise
+            result = self.on_error(item, e)
+        self.counters.waited += time.perf_counter() - start
+        # Refill before handing the result over, so workers stay busy while it is merged.
+        self._fill()
+        return result
+
+    def close(self):
+        if self._own_pool is not None:
+            self._own_pool.shutdown(cancel_futures=True)
+            self._own_pool = None
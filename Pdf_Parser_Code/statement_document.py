@@ -0,0 +1,111 @@
+import logging
+from contextlib import contextmanager
+
+from extraction_cache import open_pdf
+
+# Suppress noisy pdfminer warnings
+logging.getLogger("pdfminer").setLevel(logging.ERROR)
+
+# Fewer characters than this on a page that carries an image => scanned page.
+MIN_TEXT_LAYER_CHARS = 20
+
+
+class StatementDocument:
+    """
+    A statement PDF opened once, with per-page text/tables extracted lazily.
+
+    The CC and SB master parsers, their helpers and every bank parser read pages
+    through this object so each page gets at most one extract_text() and one
+    extract_tables() pass per run, instead of one per helper.
+    """
+
+    def __init__(self, pdf_path):
+        self.path = str(pdf_path)
+        self._pdf = None
+        self._texts = {}
+        self._tables = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def _open(self):
+        if self._pdf is None:
+            self._pdf = open_pdf(self.path)
+        return self._pdf
+
+    def close(self):
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+
+    @property
+    def pages(self):
+        """The extraction-cached pages, for parsers that walk them directly (SB)."""
+        return self._open().pages
+
+    @property
+    def page_count(self) -> int:
+        return len(self._open().pages)
+
+    def page_text(self, index: int) -> str:
+        """extract_text() for one page (never None)."""
+        if index not in self._texts:
+            self._texts[index] = self._open().pages[index].extract_text() or ""
+        return self._texts[index]
+
+    def page_tables(self, index: int) -> list:
+        """extract_tables() for one page (never None)."""
+        if index not in self._tables:
+            self._tables[index] = self._open().pages[index].extract_tables() or []
+        return self._tables[index]
+
+    def page_kind(self, index: int) -> str:
+        """
+        "text" (has a text layer), "image" (scanned, needs OCR) or "empty".
+        Decided from char/image object counts, without running extract_text().
+        """
+        profile = self._open().pages[index].page_profile()
+        if profile["chars"] >= MIN_TEXT_LAYER_CHARS:
+            return "text"
+        if profile["images"]:
+            return "image"
+        return "text" if profile["chars"] else "empty"
+
+    def page_texts(self, max_pages: int | None = None) -> list[str]:
+        count = self.page_count
+        if max_pages is not None:
+            count = min(count, max_pages)
+        return [self.page_text(i) for i in range(count)]
+
+    def text(self, max_pages: int | None = None) -> str:
+        """Page texts joined with newlines, like the old per-helper extraction."""
+        return "\n".join(self.page_texts(max_pages))
+
+
+def document_path(source) -> str:
+    """Return the file path for either a StatementDocument or a plain path."""
+    if isinstance(source, StatementDocument):
+        return source.path
+    return str(source)
+
+
+@contextmanager
+def as_statement_document(source):
+    """
+    Yield a StatementDocument for `source`.
+
+    Callers may pass either a path (standalone use of a bank parser) or an already
+    open StatementDocument (master parser); only documents opened here are closed here.
+    """
+    if isinstance(source, StatementDocument):
+        yield source
+        return
+    doc = StatementDocument(source)
+    try:
+        yield doc
+    finally:
+        doc.close()
@@ -0,0 +1,21 @@
+import os
+
+# Folders of already processed statements, skipped by every scan.
+ARCHIVE_FOLDERS = {"archive", "archived"}
+
+
+def walk_statement_folders(root):
+    """os.walk(root) that does not descend into archive folders."""
+    for dirpath, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d.lower() not in ARCHIVE_FOLDERS]
+        yield dirpath, files
+
+
+def list_statement_pdfs(base_dir):
+    """Statement PDFs under `base_dir` in scan order, skipping archive folders."""
+    pdf_paths = []
+    for root, files in walk_statement_folders(base_dir):
+        for file in files:
+            if file.lower().endswith(".pdf"):
+                pdf_paths.append(os.path.join(root, file))
+    return pdf_paths
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# The parsers are flat scripts importing each other by module name, like they do when run directly.
+CODE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for folder in ("", "CC_Parser", "SB_Parser_Code", "UPI_Parser_Code"):
+    sys.path.insert(0, os.path.join(CODE_DIR, folder))
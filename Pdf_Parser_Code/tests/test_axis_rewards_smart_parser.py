@@ -0,0 +1,49 @@
+import pytest
+
+import axis_rewards_smart_parser
+import extraction_cache
+import statement_document
+
+canvas = pytest.importorskip("reportlab.pdfgen.canvas")
+
+
+def _text_layer_pdf(path, lines):
+    pdf = canvas.Canvas(str(path))
+    for i, line in enumerate(lines):
+        pdf.drawString(72, 760 - 14 * i, line)
+    pdf.save()
+    return path
+
+
+@pytest.fixture
+def isolated_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setattr(statement_document, "open_pdf", lambda path: extraction_cache.open_pdf(path, str(cache_dir)))
+
+
+def test_unreadable_text_layer_falls_back_to_ocr(tmp_path, monkeypatch, isolated_cache):
+    # A text layer with no transaction lines, as a garbled/CID-encoded statement extracts.
+    pdf_path = _text_layer_pdf(tmp_path / "axis.pdf", ["(cid:12)(cid:40)(cid:7) (cid:3)(cid:19)(cid:44)"] * 8)
+    calls = []
+    ocr_tx = [{"Period": "Dec-25", "Account": "Axis Bank Rewards CC", "Date": "01/12/2025",
+               "Description": "AMAZON", "Amount": 10.0, "Type": "Dr"}]
+
+    def fake_ocr(doc, pages=None):
+        calls.append(pages)
+        return ocr_tx
+
+    monkeypatch.setattr(axis_rewards_smart_parser, "ocr_based_parser", fake_ocr)
+
+    assert axis_rewards_smart_parser.parse_axis_rewards_smart(str(pdf_path)) == ocr_tx
+    assert calls == [[0]]
+
+
+def test_readable_text_layer_skips_ocr(tmp_path, monkeypatch, isolated_cache):
+    lines = ["Statement Generation Date 18/12/2025", "Axis Bank Rewards credit card statement summary"]
+    lines += ["01/12/2025 AMAZON PAY INDIA 1,234.50 Dr", "05/12/2025 PAYMENT RECEIVED 500.00 Cr"]
+    pdf_path = _text_layer_pdf(tmp_path / "axis.pdf", lines)
+    monkeypatch.setattr(axis_rewards_smart_parser, "ocr_based_parser", lambda doc, pages=None: pytest.fail("OCR ran"))
+
+    tx = axis_rewards_smart_parser.parse_axis_rewards_smart(str(pdf_path))
+
+    assert [(t["Period"], t["Amount"]) for t in tx] == [("Dec-25", 1234.5), ("Dec-25", -500.0)]
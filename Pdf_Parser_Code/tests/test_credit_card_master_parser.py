@@ -0,0 +1,23 @@
+import random
+
+import pytest
+
+from Credit_Card_Master_Parser import CategoryMapping, categorize
+
+KEYWORDS = ["AMAZON", "AMAZON PAY", "SWIGGY", "ZOMATO", "UBER", "UBER EATS", "IRCTC", "PAY", "A"]
+DESCRIPTIONS = [
+    "", "AMAZON PAY INDIA", "UBER EATS ORDER", "UBER TRIP", "IRCTC TICKET", "PAYMENT RECEIVED",
+    "ZOMATO SWIGGY", "FUEL SURCHARGE WAIVER", "netflix", None,
+]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_category_mapping_matches_list_scan(seed):
+    rng = random.Random(seed)
+    rows = [
+        (rng.choice(KEYWORDS), rng.choice(["", "Shopping"]), rng.choice(["", "Food"]), rng.choice(["", "Store"]))
+        for _ in range(rng.randint(1, 12))
+    ]
+    compiled = CategoryMapping(rows)
+    for description in DESCRIPTIONS:
+        assert categorize(description, compiled) == categorize(description, rows)
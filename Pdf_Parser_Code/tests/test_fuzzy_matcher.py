@@ -0,0 +1,63 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from fuzzy_matcher import FuzzyRuleSet
+from PhonePe_Parser import classify
+
+THRESHOLD = 0.55
+
+
+def _scan(rules, desc, threshold):
+    """The original classify() loop: first rule with the highest score, if it reaches threshold."""
+    best, best_score = None, 0.0
+    for i, (kw, *_) in enumerate(rules):
+        score = 1.0 if kw in desc or desc in kw else SequenceMatcher(None, kw, desc).ratio()
+        if score > best_score:
+            best, best_score = i, score
+    return best if best is not None and best_score >= threshold else None
+
+
+def _random_text(rng, alphabet, max_len):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_best_match_equals_full_scan(seed):
+    rng = random.Random(seed)
+    rules = FuzzyRuleSet((_random_text(rng, "abc ", 8), "Exp", "Merch", "Store") for _ in range(rng.randint(1, 30)))
+    for _ in range(200):
+        desc = _random_text(rng, "abcd ", 12)
+        for threshold in (THRESHOLD, 0.0, 0.9):
+            assert rules.best_match(desc, threshold) == _scan(rules, desc, threshold)
+
+
+def test_containment_scores_one_and_earliest_wins():
+    rules = FuzzyRuleSet([("swiggy instamart", "A"), ("zomato", "B"), ("swiggy", "C"), ("zomato order", "D")])
+    # desc in kw and kw in desc both score 1.0; the first such rule wins over later ones.
+    assert rules.best_match("swiggy", THRESHOLD) == 0
+    assert rules.best_match("paid to zomato order 123", THRESHOLD) == 1
+    assert rules.best_match("", THRESHOLD) == 0
+
+
+def test_tie_keeps_first_rule():
+    rules = FuzzyRuleSet([("abcx", "A"), ("abcy", "B")])
+    assert SequenceMatcher(None, "abcx", "abcz").ratio() == SequenceMatcher(None, "abcy", "abcz").ratio()
+    assert rules.best_match("abcz", THRESHOLD) == _scan(rules, "abcz", THRESHOLD) == 0
+
+
+def test_below_threshold_is_no_match():
+    rules = FuzzyRuleSet([("electricity", "A")])
+    assert rules.best_match("zomato", THRESHOLD) is None
+    assert _scan(rules, "zomato", THRESHOLD) is None
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_classify_same_for_list_and_rule_set(seed):
+    rng = random.Random(seed)
+    words = ["swiggy", "zomato", "amazon pay", "bescom electricity", "jio recharge", "uber", "irctc"]
+    rules = [(rng.choice(words), f"Exp{i}", f"Merch{i}", f"Store{i}") for i in range(12)]
+    compiled = FuzzyRuleSet(rules)
+    for description in words + ["Paid to SWIGGY", "Zomat0 Ltd", "Uber India", "Recharge Jio", "", "xyz"]:
+        assert classify(description, compiled) == classify(description, rules)
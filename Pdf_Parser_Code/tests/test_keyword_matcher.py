@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from keyword_matcher import KeywordAutomaton
+
+
+def _scan_first(keywords, text):
+    return next((i for i, keyword in enumerate(keywords) if keyword in text), None)
+
+
+def _scan_all(keywords, text):
+    return {i for i, keyword in enumerate(keywords) if keyword in text}
+
+
+def _random_text(rng, alphabet, max_len):
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_substring_scan(seed):
+    # A small alphabet makes overlapping keywords, shared prefixes and fail-link chains common.
+    rng = random.Random(seed)
+    keywords = [_random_text(rng, "ab c", 5) for _ in range(rng.randint(1, 25))]
+    automaton = KeywordAutomaton(keywords)
+    for _ in range(200):
+        text = _random_text(rng, "ab cd", 20)
+        assert automaton.first_match(text) == _scan_first(keywords, text)
+        assert automaton.all_matches(text) == _scan_all(keywords, text)
+
+
+def test_first_match_is_lowest_index_not_leftmost():
+    automaton = KeywordAutomaton(["ZOMATO", "SWIGGY", "UPI"])
+    assert automaton.first_match("UPI SWIGGY ZOMATO") == 0
+    assert automaton.all_matches("UPI SWIGGY ZOMATO") == {0, 1, 2}
+
+
+def test_duplicate_and_nested_keywords():
+    keywords = ["AMAZON PAY", "AMAZON", "AMAZON", "PAY"]
+    automaton = KeywordAutomaton(keywords)
+    assert automaton.first_match("AMAZON PAYMENTS") == 0
+    assert automaton.first_match("AMAZON PRIME") == 1
+    assert automaton.all_matches("AMAZON PRIME") == {1, 2}
+
+
+def test_empty_keyword_matches_every_text():
+    automaton = KeywordAutomaton(["NETFLIX", "", "SPOTIFY"])
+    assert automaton.first_match("") == 1
+    assert automaton.first_match("NETFLIX.COM") == 0
+    assert automaton.all_matches("SPOTIFY") == {1, 2}
+    assert KeywordAutomaton([]).first_match("ANYTHING") is None
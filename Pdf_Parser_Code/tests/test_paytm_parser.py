@@ -0,0 +1,119 @@
+import random
+
+import pandas as pd
+import pytest
+
+import Paytm_Parser
+from Paytm_Parser import PaytmAccountMap, PaytmRuleTable, derive_account_by_source, match_paytm1_rule
+
+# Rule/source vocabulary with overlapping substrings and values that normalise to "".
+WORDS = ["", "--", " _ ", "amazon", "Amazon-Pay", "pay", "zomato", "UPI", "paytm wallet", "wallet",
+         "HDFC Bank 1234", "hdfc", "1234", "swiggy instamart", "Instamart"]
+
+
+def _rules(rng, count):
+    return [
+        tuple(rng.choice(WORDS) for _ in range(4)) + (f"Exp{i}", f"Merch{i}")
+        for i in range(count)
+    ]
+
+
+def _sources(rng):
+    return tuple(rng.choice(WORDS + ["amazon pay later", "swiggy instamart order", "hdfc bank 1234 upi"]) for _ in range(4))
+
+
+def _match_both(rules, sources):
+    scanned = match_paytm1_rule(*sources, rules)
+    compiled = match_paytm1_rule(*sources, PaytmRuleTable(rules))
+    return scanned, compiled
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_rule_table_matches_top_to_bottom_scan(seed):
+    rng = random.Random(seed)
+    rules = _rules(rng, 40)
+    table = PaytmRuleTable(rules)
+    for _ in range(200):
+        sources = _sources(rng)
+        # Same row object, not just an equal one: the first match in file order wins.
+        assert match_paytm1_rule(*sources, table) is match_paytm1_rule(*sources, rules)
+
+
+def test_rule_with_only_blank_fields_never_matches():
+    rules = [("--", " ", "_", "", "Exp0", "Merch0"), ("", "amazon", "", "", "Exp1", "Merch1")]
+    scanned, compiled = _match_both(rules, ("", "amazon pay", "", ""))
+    assert scanned is compiled is rules[1]
+
+
+def test_rule_populated_only_in_a_later_field():
+    rules = [
+        ("", "", "", "hdfc", "Exp0", "Merch0"),
+        ("", "", "wallet", "", "Exp1", "Merch1"),
+        ("", "amazon", "", "", "Exp2", "Merch2"),
+    ]
+    assert _match_both(rules, ("", "amazon", "paytm wallet", "HDFC Bank 1234")) == (rules[0], rules[0])
+    assert _match_both(rules, ("", "amazon", "paytm wallet", "")) == (rules[1], rules[1])
+    assert _match_both(rules, ("", "amazon", "", "")) == (rules[2], rules[2])
+
+
+def test_empty_source_matches_no_populated_field():
+    rules = [("upi", "", "", "", "Exp0", "Merch0"), ("", "zomato", "", "", "Exp1", "Merch1")]
+    assert _match_both(rules, ("", "zomato", "", "")) == (rules[1], rules[1])
+    assert _match_both(rules, ("", "", "", "")) == (None, None)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_account_map_matches_plain_scan(seed):
+    rng = random.Random(seed)
+    account_map = [(rng.choice(WORDS), f"Account{i}") for i in range(15)]
+    compiled = PaytmAccountMap(account_map)
+    for source in WORDS + ["hdfc bank 1234 upi", "my paytm wallet", None]:
+        assert derive_account_by_source(source, compiled, "Fallback") == derive_account_by_source(
+            source, account_map, "Fallback"
+        )
+
+
+def test_empty_account_takes_longest_mapped_source():
+    # An empty source is contained in every mapped source, so the longest one wins on both paths.
+    account_map = [("hdfc", "HDFC"), ("", "Blank"), ("paytm wallet", "Wallet")]
+    assert derive_account_by_source("", account_map, "Fallback") == "Wallet"
+    assert derive_account_by_source("", PaytmAccountMap(account_map), "Fallback") == "Wallet"
+
+
+def _write_passbook(path, rows):
+    columns = ["Date", "Transaction Details", Paytm_Parser.OTHER_DETAILS_COLUMN, "Your Account", "Amount",
+               "UPI Ref No.", "Order ID", "Tags"]
+    pd.DataFrame(rows, columns=columns).to_excel(path, sheet_name="Passbook Payment History", index=False)
+    return str(path)
+
+
+def test_paytm_batch_keeps_overlapping_rows_from_the_oldest_export(tmp_path, monkeypatch):
+    mapping = tmp_path / "mapping.csv"
+    mapping.write_text("Keyword Pattern,Expense Type,Merchant Category\nzomato,Food,Delivery\n", encoding="utf-8")
+    december = _write_passbook(tmp_path / "Paytm_Statement_Dec.xlsx", [
+        ("30/12/2025", "Zomato order", "zomato@upi", "", "-250", "1001", "", "#Food"),
+        ("05/01/2026", "Zomato order", "zomato@upi", "", "-300", "1002", "", "#Food"),
+        ("06/01/2026", "Tea", "", "", "-20", "", "", ""),
+        ("06/01/2026", "Tea", "", "", "-20", "", "", ""),
+    ])
+    january = _write_passbook(tmp_path / "Paytm_Statement_Jan.xlsx", [
+        ("05/01/2026", "Zomato order", "zomato@upi", "", "-300", "1002", "", "#Food"),
+        ("06/01/2026", "Tea", "", "", "-20", "", "", ""),
+        ("06/01/2026", "Tea", "", "", "-20", "", "", ""),
+        ("20/01/2026", "Rent", "", "", "-9000", "99999999999999999999999", "", ""),
+    ])
+    written = {}
+    monkeypatch.setattr(Paytm_Parser, "load_passbook", Paytm_Parser.load_source)
+    monkeypatch.setattr(Paytm_Parser, "LOG_FILE", str(tmp_path / "log.txt"))
+    monkeypatch.setattr(Paytm_Parser, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(Paytm_Parser, "write_output", lambda path, raw, export: written.update({path: export}))
+
+    # Newest export listed first: the merge still runs oldest first.
+    outputs = Paytm_Parser.run_batch([january, december], mapping_path=str(mapping), combined=True)
+
+    assert [(name, rows) for name, _, rows in outputs] == [("Paytm_Dec'25-Jan'26.xlsx", 5)]
+    (export,) = written.values()
+    assert export["Amount"].tolist() == [-250.0, -300.0, -20.0, -20.0, -9000.0]
+    # Rows both exports had fall back to the December export's name.
+    assert export["Account"].tolist() == ["Paytm_Statement_Dec"] * 4 + ["Paytm_Statement_Jan"]
+    assert export["Expense Type"].tolist()[:2] == ["Food", "Food"]
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from SB_Master_Parser import SBRuleSet, classify_sb_description
+
+KEYWORDS = ["upi", "neft", "sbin", "sbin0011739", "hdfc bank", "bank hdfc", "imps-p2a", "imps p2a",
+            "salary credit", "amazon", "amaz", "a", "--", "zomato/upi", "ach d"]
+TOKENS = ["UPI", "NEFT", "SBIN0011739", "HDFC", "BANK", "IMPS", "P2A", "Salary", "Credit", "Amazon.in",
+          "ZOMATO", "ACH", "D-", "/", "123456", "Self"]
+FALLBACK = ("Fallback", "Derived", "", "Unknown", "Yes PJ --> IDFC PJ (Self)")
+
+
+def _rules(rng, count):
+    return [
+        (rng.choice(KEYWORDS), f"Mode{i}", rng.choice(["Derived", f"Exp{i}"]), rng.choice(["", f"MC{i}"]),
+         f"Store{i}", rng.choice(["", "HDFC --> SBI"]))
+        for i in range(count)
+    ]
+
+
+def _description(rng):
+    return rng.choice(["", " ", "/"]).join(rng.choice(TOKENS) for _ in range(rng.randint(0, 6)))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rule_set_matches_rule_scan(seed):
+    rng = random.Random(seed)
+    rules = _rules(rng, rng.randint(1, 20))
+    compiled = SBRuleSet(rules).compile()
+    for _ in range(150):
+        description = _description(rng)
+        amount = rng.choice([None, -250.0, 1000.0])
+        assert classify_sb_description(description, amount, compiled, FALLBACK) == classify_sb_description(
+            description, amount, rules, FALLBACK
+        )
+
+
+@pytest.mark.parametrize(
+    "keyword, description",
+    [
+        ("sbin", "NEFT/SBIN0011739/SALARY"),  # token prefix
+        ("bank hdfc", "HDFC BANK LTD"),  # tokens in any order
+        ("imps-p2a", "IMPS P2A 123456"),  # substring after stripping punctuation
+        ("zomato/upi", "UPI-ZOMATO"),
+    ],
+)
+def test_match_kinds_agree(keyword, description):
+    rules = [("upi salary", "M0", "E0", "MC0", "S0", ""), (keyword, "M1", "E1", "MC1", "S1", "")]
+    expected = classify_sb_description(description, 1.0, rules, FALLBACK)
+    assert classify_sb_description(description, 1.0, SBRuleSet(rules).compile(), FALLBACK) == expected
+
+
+def test_blank_keyword_never_matches():
+    rules = [("--", "M0", "E0", "MC0", "S0", ""), ("upi", "M1", "E1", "MC1", "S1", "")]
+    compiled = SBRuleSet(rules).compile()
+    assert classify_sb_description("UPI/123", 1.0, compiled, FALLBACK)[0] == "M1"
+    assert classify_sb_description("NEFT", -1.0, compiled, FALLBACK) == classify_sb_description("NEFT", -1.0, rules, FALLBACK)
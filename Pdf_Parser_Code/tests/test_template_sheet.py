@@ -0,0 +1,59 @@
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+
+from template_sheet import load_refresh_workbook, previous_data_row, write_df_to_sheet
+
+
+def _transactions(count, description="UPI/ZOMATO"):
+    return pd.DataFrame(
+        {
+            "Period": ["Jan-2026"] * count,
+            "Date": [f"{day:02d}/01/2026" for day in range(1, count + 1)],
+            "Description": [description] * count,
+            "Amount": [-100.0 * day for day in range(1, count + 1)],
+        }
+    )
+
+
+def _refresh(output_file, template_file, df):
+    wb = load_refresh_workbook(str(output_file), str(template_file))
+    write_df_to_sheet(wb["Txn"], df, max_col=6, autofit=True)
+    wb.save(output_file)
+    return load_workbook(output_file)["Txn"]
+
+
+def test_refresh_round_trip(tmp_path):
+    template_file, output_file = tmp_path / "template.xlsx", tmp_path / "summary.xlsx"
+    template = Workbook()
+    ws = template.active
+    ws.title = "Txn"
+    ws["H2"] = "side table"
+    template.save(template_file)
+
+    ws = _refresh(output_file, template_file, _transactions(10))
+    assert previous_data_row(ws) == 11
+    assert ws["C11"].value == "UPI/ZOMATO" and ws["D11"].value == -1000.0
+    widths = {col: ws.column_dimensions[col].width for col in "ABCD"}
+
+    # Fewer, longer rows: stale rows are cleared, the side table and the column widths stay.
+    ws = _refresh(output_file, template_file, _transactions(3, "NEFT/SALARY CREDIT FROM A VERY LONG EMPLOYER NAME"))
+    assert previous_data_row(ws) == 4
+    assert ws["D4"].value == -300.0
+    assert all(ws.cell(row=r, column=c).value is None for r in range(5, 12) for c in range(1, 7))
+    assert ws["H2"].value == "side table"
+    assert {col: ws.column_dimensions[col].width for col in "ABCD"} == widths
+
+
+def test_changed_columns_are_autofit_again(tmp_path):
+    template_file, output_file = tmp_path / "template.xlsx", tmp_path / "summary.xlsx"
+    template = Workbook()
+    template.active.title = "Txn"
+    template.save(template_file)
+    _refresh(output_file, template_file, _transactions(2))
+
+    df = _transactions(2).rename(columns={"Description": "Narration"})
+    df["Narration"] = "NEFT/SALARY CREDIT FROM A VERY LONG EMPLOYER NAME"
+    ws = _refresh(output_file, template_file, df)
+
+    assert ws["C1"].value == "Narration"
+    assert ws.column_dimensions["C"].width == len("NEFT/SALARY CREDIT FROM A VERY LONG EMPLOYER NAME") + 2
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from upi_batch import merge_transactions
+
+IDS = ("Transaction ID", "UTR No")
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=["Date", "Description", "Amount", "Transaction ID", "UTR No"])
+
+
+def test_overlapping_exports_keep_each_transaction_once():
+    older = _frame([
+        ("01/01/2026", "Zomato", 250.0, "T1", "U1"),
+        ("02/01/2026", "Swiggy", 180.0, "T2", "U2"),
+        ("03/01/2026", "Cash", 500.0, "", ""),
+    ])
+    newer = _frame([
+        ("02/01/2026", "Swiggy", 180.0, "T2", "U2"),
+        ("03/01/2026", "Cash", 500.0, "", ""),
+        ("04/01/2026", "Uber", 90.0, "T4", "U4"),
+    ])
+    merged = merge_transactions([older, newer], IDS)
+    assert merged["Description"].tolist() == ["Zomato", "Swiggy", "Cash", "Uber"]
+
+
+def test_any_id_column_seen_before_marks_a_repeat():
+    older = _frame([("01/01/2026", "Zomato", 250.0, "T1", "U1")])
+    # Same UTR under a different Transaction ID, and the same Transaction ID with no UTR.
+    newer = _frame([("01/01/2026", "Zomato Ltd", 250.0, "T9", "U1"), ("01/01/2026", "Zomato", 250.0, "T1", "")])
+    assert len(merge_transactions([older, newer], IDS)) == 1
+
+
+def test_float_ids_match_their_integer_form():
+    older = pd.DataFrame({"Date": ["01/01/2026"], "Description": ["Zomato"], "Amount": [250.0], "UTR No": [123456]})
+    # A blank id makes the column float64, so 123456 reads "123456.0".
+    newer = pd.DataFrame(
+        {"Date": ["01/01/2026", "05/01/2026"], "Description": ["Zomato", "Rent"], "Amount": [250.0, 9000.0],
+         "UTR No": [123456.0, float("nan")]}
+    )
+    assert merge_transactions([older, newer], ("UTR No",))["Description"].tolist() == ["Zomato", "Rent"]
+
+
+def test_identical_rows_inside_one_statement_are_all_kept():
+    rows = [("01/01/2026", "Tea", 20.0, "", "")] * 2
+    older = _frame(rows)
+    assert len(merge_transactions([older], IDS)) == 2
+    # A later export repeating both drops both; a third identical row is new.
+    newer = _frame(rows + [("01/01/2026", "Tea", 20.0, "", "")])
+    assert len(merge_transactions([older, newer], IDS)) == 3